@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import numpy as np
+import pytest
+from kneed import KneeLocator
+from sklearn.metrics import adjusted_rand_score, normalized_mutual_info_score, silhouette_score
+from tslearn.clustering import TimeSeriesKMeans
+from tslearn.metrics import dtw, dtw_path_from_metric
+from tslearn.preprocessing import TimeSeriesScalerMeanVariance
+
+from conftest import SCALES, QUADRATIC_SCALES, run_benchmark, scale_signals
+from saliency_kd.clustering import K_VALUES, MAX_ITER_BARYCENTER, SEED, determine_k_with_elbow
+from saliency_kd.clustering_metrics import clustering_scores, dtw_cluster_distances, dtw_silhouette_score, pairwise_dtw
+from saliency_kd.dtw_distance import DTWConfig, keogh_envelope, nearest_centroid
+from saliency_kd.multivariate_tensor import build_multivariate_tensor
+
+ELBOW_BASE = 10  # signals per scale unit
+ELBOW_LEN = 64  # DTW k-means (DBA) is quadratic in the length - downsampled saliency maps keep 10x feasible
+SILHOUETTE_BASE = 3  # signals per cluster and scale unit
+SILHOUETTE_LEN = 64  # DTW is quadratic in the length - downsampled signals keep 100x feasible
+CONSTRAINT_BASE = 4  # signals per cluster (full length)
+DTW_CONFIGS = {
+    "path": DTWConfig(path=True),  # reference (tslearn, as 'metrics.ipynb')
+    "unconstrained": DTWConfig(),
+    "sakoe_chiba_0.1": DTWConfig("sakoe_chiba", 0.1),
+    "sakoe_chiba_0.05": DTWConfig("sakoe_chiba", 0.05),
+    "itakura": DTWConfig("itakura")
+}
+
+
+def tslearn_dtw_matrix(series: np.ndarray, **params) -> np.ndarray:
+    """
+    DTW distance matrix (accumulated Euclidean costs via the optimal path, as 'metrics.ipynb') computed by tslearn -
+    reference of the package's DTW.
+    """
+    distances = np.array(
+        [[dtw_path_from_metric(s1, s2, metric="euclidean", **params)[1] for s2 in series] for s1 in series]
+    )
+    # float32 round-off on the diagonal
+    np.fill_diagonal(distances, 0.)
+    return distances
+
+
+def notebook_k(series: np.ndarray, metric: str, n_init: int, max_iter: int, metric_params: dict = None) -> int:
+    """
+    Elbow method as originally implemented in 'saliency_kd.ipynb' (without plotting) - reference of the package's
+    implementation.
+    """
+    inertias = []
+    for k in K_VALUES:
+        km = TimeSeriesKMeans(
+            n_clusters=k, n_init=n_init, max_iter=max_iter, metric=metric, verbose=False,
+            max_iter_barycenter=MAX_ITER_BARYCENTER if metric != "euclidean" else None, metric_params=metric_params,
+            random_state=SEED
+        )
+        inertias.append(km.fit(series).inertia_)
+    return KneeLocator(K_VALUES, inertias, curve='convex', direction='decreasing').knee
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def bench_determine_k_with_elbow(benchmark, multivariate_clustering, scale):
+    _, _, signals = multivariate_clustering
+    saliency_maps = scale_signals(signals[:ELBOW_BASE, :, 1:], scale)
+    k = run_benchmark(
+        benchmark, determine_k_with_elbow, saliency_maps, "euclidean", 2, 50, n_items=len(saliency_maps), rounds=1
+    )
+    assert k == notebook_k(saliency_maps, "euclidean", 2, 50)
+
+
+@pytest.mark.parametrize("scale", QUADRATIC_SCALES)
+def bench_determine_k_with_dtw_elbow(benchmark, multivariate_clustering, scale):
+    """
+    Elbow method as configured in 'saliency_kd.ipynb' (METRIC_FOR_ELBOW_METHOD = "dtw"), i.e., DTW k-means.
+    """
+    _, _, signals = multivariate_clustering
+    step = signals.shape[1] // ELBOW_LEN
+    saliency_maps = scale_signals(signals[:ELBOW_BASE, ::step, 1:], scale)
+    k = run_benchmark(
+        benchmark, determine_k_with_elbow, saliency_maps, "dtw", 2, 50, DTW_CONFIGS["unconstrained"],
+        n_items=len(saliency_maps), rounds=1
+    )
+    assert k == notebook_k(saliency_maps, "dtw", 2, 50)
+
+
+# tslearn's k-means only honors the global constraint - the path / distance-only modes coincide
+@pytest.mark.parametrize("config", [config for config in DTW_CONFIGS if config != "path"])
+def bench_dtw_elbow_constraint(benchmark, multivariate_clustering, config):
+    """
+    DTW elbow method (DTW k-means) per DTW configuration - the determined k is recorded along with the timings.
+    """
+    _, _, signals = multivariate_clustering
+    step = signals.shape[1] // ELBOW_LEN
+    saliency_maps = np.ascontiguousarray(signals[:ELBOW_BASE, ::step, 1:])
+    k = run_benchmark(
+        benchmark, determine_k_with_elbow, saliency_maps, "dtw", 2, 50, DTW_CONFIGS[config],
+        n_items=len(saliency_maps), rounds=1
+    )
+    benchmark.extra_info["k"] = None if k is None else int(k)
+    assert k == notebook_k(saliency_maps, "dtw", 2, 50, DTW_CONFIGS[config].tslearn_params(saliency_maps.shape[1]))
+
+
+@pytest.mark.parametrize("scale", QUADRATIC_SCALES)
+def bench_dtw_silhouette_score(benchmark, multivariate_clustering, scale):
+    pred_labels, _, signals = multivariate_clustering
+    step = signals.shape[1] // SILHOUETTE_LEN
+    labels = np.unique(pred_labels)
+    clustered = np.concatenate([
+        scale_signals(signals[pred_labels == label][:SILHOUETTE_BASE, ::step], scale) for label in labels
+    ])
+    labels_pred = np.repeat(np.arange(len(labels)), SILHOUETTE_BASE * scale)
+    silhouette, _ = run_benchmark(
+        benchmark, lambda: dtw_silhouette_score(pairwise_dtw(clustered), labels_pred, len(labels)),
+        n_items=len(clustered), rounds=1
+    )
+    # reference: tslearn DTW (as 'metrics.ipynb') and sklearn's silhouette score
+    reference = silhouette_score(tslearn_dtw_matrix(clustered), labels_pred, metric="precomputed")
+    assert silhouette == pytest.approx(reference)
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def bench_clustering_scores(benchmark, multivariate_clustering, scale):
+    pred_labels, _, _ = multivariate_clustering
+    rng = np.random.default_rng(42)
+    labels_pred = np.tile(pred_labels, scale * 100)
+    labels_true = rng.integers(0, 8, len(labels_pred))
+    scores = run_benchmark(benchmark, clustering_scores, labels_true, labels_pred, n_items=len(labels_pred))
+    assert scores["ari"] == pytest.approx(adjusted_rand_score(labels_true, labels_pred))
+    assert scores["nmi"] == pytest.approx(normalized_mutual_info_score(labels_true, labels_pred))
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def bench_nearest_centroid(benchmark, multivariate_clustering, scale):
+    _, centroids, signals = multivariate_clustering
+    queries = scale_signals(signals[:10], scale)
+    dtw_config = DTWConfig("sakoe_chiba", 0.1, metric="sqeuclidean")
+    lower, upper = keogh_envelope(centroids, dtw_config.radius(centroids.shape[1]))
+    results = run_benchmark(
+        benchmark, lambda: [nearest_centroid(q, centroids, lower, upper, dtw_config) for q in queries],
+        n_items=len(queries), rounds=3
+    )
+    # reference: exhaustive search with tslearn's (banded) DTW
+    params = dtw_config.tslearn_params(centroids.shape[1])
+    for query, (idx, dist, _) in zip(queries, results):
+        reference = [dtw(query, centroid, **params) for centroid in centroids]
+        assert idx == np.argmin(reference) and dist == pytest.approx(min(reference))
+
+
+def bench_nearest_centroid_abandoned(benchmark, multivariate_clustering):
+    """
+    An early abandoning threshold below every distance abandons all centroids - the exact nearest one is returned.
+    """
+    _, centroids, signals = multivariate_clustering
+    queries = signals[:10]
+    dtw_config = DTWConfig("sakoe_chiba", 0.1, metric="sqeuclidean", early_abandon=1e-6)
+    exact_config = DTWConfig("sakoe_chiba", 0.1, metric="sqeuclidean")
+    lower, upper = keogh_envelope(centroids, dtw_config.radius(centroids.shape[1]))
+    results = run_benchmark(
+        benchmark, lambda: [nearest_centroid(q, centroids, lower, upper, dtw_config) for q in queries],
+        n_items=len(queries), rounds=3
+    )
+    for query, (idx, dist, _) in zip(queries, results):
+        exact = [exact_config.distance(query, centroid) for centroid in centroids]
+        assert idx == np.argmin(exact) and dist == pytest.approx(min(exact))
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def bench_build_multivariate_tensor(benchmark, multivariate_clustering, scale):
+    _, _, signals = multivariate_clustering
+    scaled = scale_signals(signals, scale)
+    # notebook inputs: (n, 1, len) test signals and the saliency maps by name
+    test_signals = np.ascontiguousarray(scaled[:, np.newaxis, :, 0])
+    var_attr_maps = {"var. attr. map " + str(i): saliency_map for i, saliency_map in enumerate(scaled[:, :, 1])}
+    tensor, _ = run_benchmark(
+        benchmark, build_multivariate_tensor, test_signals, var_attr_maps, n_items=len(test_signals)
+    )
+    # reference: stacked [signal, saliency map] pairs, saliency channel normalized by tslearn (as the notebook)
+    reference = np.stack([scaled[:, :, 0], TimeSeriesScalerMeanVariance().fit_transform(scaled[:, :, 1:])[..., 0]], -1)
+    np.testing.assert_allclose(tensor, reference, rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize("config", DTW_CONFIGS)
+def bench_dtw_constraint(benchmark, multivariate_clustering, config):
+    """
+    DTW-based metrics (silhouette, intra-cluster distances) of the bundled clustering per DTW configuration - the
+    deviation from the unconstrained reference is recorded along with the timings.
+    """
+    pred_labels, centroids, signals = multivariate_clustering
+    labels = np.unique(pred_labels)
+    members = np.concatenate([np.flatnonzero(pred_labels == label)[:CONSTRAINT_BASE] for label in labels])
+    clustered, labels_pred = signals[members], np.searchsorted(labels, pred_labels[members])
+
+    def metrics(dtw_config: DTWConfig) -> tuple:
+        silhouette, _ = dtw_silhouette_score(pairwise_dtw(clustered, dtw_config=dtw_config), labels_pred, len(labels))
+        intra, _ = dtw_cluster_distances(clustered, centroids, labels_pred, len(labels), dtw_config)
+        return silhouette, float(np.mean(intra))
+
+    silhouette, intra = run_benchmark(benchmark, metrics, DTW_CONFIGS[config], n_items=len(clustered), rounds=1)
+    # the banded distance-only DTW equals tslearn's DTW with the corresponding global constraint
+    np.testing.assert_allclose(
+        pairwise_dtw(clustered, dtw_config=DTW_CONFIGS[config]),
+        tslearn_dtw_matrix(clustered, **DTW_CONFIGS[config].tslearn_params(clustered.shape[1])),
+        rtol=1e-5, atol=1e-5
+    )
+    ref_silhouette, ref_intra = metrics(DTW_CONFIGS["unconstrained"])
+    benchmark.extra_info["silhouette"] = round(silhouette, 4)
+    benchmark.extra_info["silhouette_delta"] = round(silhouette - ref_silhouette, 4)
+    benchmark.extra_info["intra_rel_delta"] = round(intra / ref_intra - 1, 4)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import random
+
+import pytest
+
+from conftest import SCALES, run_benchmark
+from saliency_kd.llm_evaluation import LLMEvaluation
+
+RUNS_PER_SCALE = 100
+TRUTH = ["class_1", "class_4", "class_7"]
+
+
+@pytest.fixture
+def evaluation():
+    return LLMEvaluation()
+
+
+def gen_results(evaluation, n_runs):
+    rng = random.Random(42)
+    return evaluation.to_frame([
+        evaluation.gen_rows(
+            str(i), ["Mallat", "UWaveGestureLibraryAll", "InsectWingbeatSound"][i % 3], f"input_{i % 12}",
+            ["o3-2025-04-16", "gpt-4o"][i % 2], "ts", i, [f"class_{rng.randint(1, 8)}" for _ in TRUTH], TRUTH
+        ) for i in range(n_runs)
+    ])
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def bench_summarize(benchmark, evaluation, scale):
+    results = gen_results(evaluation, RUNS_PER_SCALE * scale)
+    _, per_model = run_benchmark(benchmark, evaluation.summarize, results, n_items=RUNS_PER_SCALE * scale)
+    # reference: accuracy per dataset and model counted row by row
+    counts = {}
+    for row in results.itertuples():
+        correct, labeled = counts.get((row.dataset, row.model), (0, 0))
+        counts[(row.dataset, row.model)] = (correct + (row.predicted_class == row.true_class), labeled + 1)
+    accuracy = {(row.dataset, row.model): row.accuracy for row in per_model.itertuples()}
+    assert accuracy == pytest.approx({key: correct / labeled for key, (correct, labeled) in counts.items()})
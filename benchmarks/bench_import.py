@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import pytest
+
+from import_time import ENTRY_POINTS, measure_import_time
+
+# import time budget of the CLI entry points (fresh interpreter, excl. start-up) - heavy dependencies (OpenAI SDK,
+# numpy, rdflib, ontology) have to be loaded lazily, otherwise each invocation (e.g., 20 per 'run_exp.sh') pays ~0.7s
+IMPORT_BUDGET_MS = 150
+
+
+@pytest.mark.parametrize("entry_point", ENTRY_POINTS)
+def bench_import_time(benchmark, entry_point: str) -> None:
+    import_times = []
+
+    def measure():
+        import_ms, deps = measure_import_time(entry_point)
+        import_times.append(import_ms)
+        return deps
+
+    dependencies = benchmark.pedantic(measure, rounds=3, iterations=1)
+    benchmark.extra_info["import_ms"] = min(import_times)
+    benchmark.extra_info["dependencies"] = dict(dependencies[:5])
+    assert min(import_times) < IMPORT_BUDGET_MS, \
+        f"{entry_point} exceeds the import time budget ({min(import_times):.1f} ms): {dependencies[:5]}"
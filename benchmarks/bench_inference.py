@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import numpy as np
+import pytest
+
+pytest.importorskip("tsai")
+
+from tsai.all import TSDatasets, TSDataLoaders, TSStandardize, TSClassification, Learner, accuracy  # noqa: E402
+from tsai.models.XCM import XCM  # noqa: E402
+
+from conftest import run_benchmark  # noqa: E402
+from saliency_kd.xcm_inference import XCMInference  # noqa: E402
+
+N_SIGNALS = 60
+SIGNAL_LEN = 32
+BATCH_SIZE = 16
+LABELS = np.array(["class_2", "class_5", "class_7"])  # non-contiguous, i.e., labels differ from the vocab indices
+
+
+def bench_xcm_predict(benchmark, tmp_path):
+    """
+    Batched CPU inference with an exported (untrained) XCM learner - the predicted labels equal the decoded
+    predictions of tsai's 'get_X_preds' (vectorized label transform, i.e., decoded as array of labels).
+    """
+    signals = np.random.default_rng(42).normal(size=(N_SIGNALS, 1, SIGNAL_LEN)).astype(np.float32)
+    labels = LABELS[np.arange(N_SIGNALS) % len(LABELS)]
+    n_train = N_SIGNALS * 4 // 5
+    splits = (list(range(n_train)), list(range(n_train, N_SIGNALS)))
+    dsets = TSDatasets(signals, labels, tfms=[None, [TSClassification()]], splits=splits)
+    dls = TSDataLoaders.from_dsets(dsets.train, dsets.valid, bs=BATCH_SIZE, batch_tfms=[TSStandardize()], num_workers=0)
+    learn = Learner(dls, XCM(dls.vars, dls.c, dls.len), metrics=accuracy)
+    learn.save_all(path=str(tmp_path), dls_fname='dls', model_fname='model', learner_fname='learner')
+
+    inference = XCMInference(str(tmp_path), batch_size=BATCH_SIZE)
+    predictions = run_benchmark(benchmark, inference.predict, signals, n_items=N_SIGNALS)
+    _, _, decoded = inference.learn.get_X_preds(signals, bs=BATCH_SIZE, with_decoded=True)
+    assert predictions.tolist() == np.asarray(decoded).astype(str).tolist()
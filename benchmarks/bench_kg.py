@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import gzip
+
+import pytest
+import requests
+from rdflib import Graph
+
+from conftest import SCALES, FusekiStubHandler, repo_path, run_benchmark
+from fact_conversion import gen_facts, legacy_fact_to_triple
+from saliency_kd.config import ONTOLOGY_PREFIX
+from saliency_kd.connection_controller import ConnectionController
+from saliency_kd.kg_snapshot import KnowledgeGraphSnapshot
+from saliency_kd.knowledge_graph_generator import KnowledgeGraphGenerator
+from saliency_kd.knowledge_graph_query_tool import KnowledgeGraphQueryTool
+from saliency_kd.symbolic_fault_info import list_datasets, load_symbolic_fault_info
+
+BASE_FACTS = 1000
+SAMPLE_SNAPSHOT = repo_path("knowledge_base", "sample_kg_mallat_2025-08-27_14-51-11.nq.gz")
+HEATMAP_LEN = 256
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def bench_fact_to_triple(benchmark, scale):
+    facts = gen_facts(BASE_FACTS * scale, HEATMAP_LEN)
+    connection = ConnectionController(namespace=ONTOLOGY_PREFIX, verbose=False)
+    triples = run_benchmark(benchmark, lambda: [connection.fact_to_triple(fact) for fact in facts], n_items=len(facts))
+    assert triples == [legacy_fact_to_triple(connection, fact) for fact in facts]
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def bench_extend_knowledge_graph(benchmark, fuseki_url, scale):
+    facts = gen_facts(BASE_FACTS * scale, HEATMAP_LEN)
+    connection = ConnectionController(namespace=ONTOLOGY_PREFIX, fuseki_url=fuseki_url, verbose=False)
+    run_benchmark(benchmark, connection.extend_knowledge_graph, facts, n_items=len(facts), rounds=3)
+    uploaded = Graph().parse(data=FusekiStubHandler.data, format="turtle")
+    assert set(uploaded) == {connection.fact_to_triple(fact) for fact in facts}
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def bench_extend_knowledge_graph_streamed(benchmark, fuseki_url, scale):
+    facts = gen_facts(BASE_FACTS * scale, HEATMAP_LEN)
+    connection = ConnectionController(namespace=ONTOLOGY_PREFIX, fuseki_url=fuseki_url, verbose=False)
+    run_benchmark(benchmark, connection.extend_knowledge_graph_streamed, facts, n_items=len(facts), rounds=3)
+    uploaded = Graph().parse(data=FusekiStubHandler.data, format="nt")
+    assert set(uploaded) == {connection.fact_to_triple(fact) for fact in facts}
+
+
+def bench_extend_knowledge_graph_with_datasets(benchmark, fuseki_url):
+    """
+    Initial load of all datasets (named graphs) - a single streamed N-Quads upload.
+    """
+    directory = repo_path("knowledge_base", "symbolic_fault_info")
+    datasets = list_datasets(directory)
+    kg_gen = KnowledgeGraphGenerator(kg_url=fuseki_url, verbose=False)
+    n_uploads = len(FusekiStubHandler.uploads)
+    run_benchmark(
+        benchmark, lambda: kg_gen.extend_knowledge_graph_with_datasets(datasets, directory=directory),
+        n_items=len(datasets), rounds=1
+    )
+    # memory run + benchmark round - one upload each
+    assert FusekiStubHandler.uploads[n_uploads:] == [("POST", "/saliency_kd/data", "application/n-quads")] * 2
+
+
+def bench_query_all_fault_desc(benchmark, fuseki_url):
+    qt = KnowledgeGraphQueryTool(kg_url=fuseki_url)
+    name_desc_pairs = run_benchmark(benchmark, qt.query_all_fault_desc, False, n_items=1)
+    # the stub answers with the Mallat fault information
+    fault_info = load_symbolic_fault_info("Mallat", directory=repo_path("knowledge_base", "symbolic_fault_info"))
+    assert name_desc_pairs == [(info["name"], info["fault_desc"]) for info in fault_info]
+
+
+def bench_kg_snapshot_round_trip(benchmark, fuseki_url, tmp_path):
+    """
+    Loads the bundled snapshot and exports it again - the exported N-Quads equal the loaded ones.
+    """
+    snapshot = KnowledgeGraphSnapshot(kg_url=fuseki_url, verbose=False)
+    stats = snapshot.load(SAMPLE_SNAPSHOT)
+    path = str(tmp_path / "snapshot.nq.gz")
+    run_benchmark(benchmark, snapshot.export, path, n_items=stats['lines'])
+    with gzip.open(SAMPLE_SNAPSHOT, "rb") as loaded, gzip.open(path, "rb") as exported:
+        assert exported.read() == loaded.read()
+
+
+def bench_kg_snapshot_failure(benchmark, fuseki_url, tmp_path):
+    """
+    Rejected loads / exports raise an HTTPError and do not leave a snapshot file.
+    """
+    snapshot = KnowledgeGraphSnapshot(kg_url=fuseki_url + "/missing", verbose=False)
+    path = tmp_path / "snapshot.nq.gz"
+    with pytest.raises(requests.HTTPError):
+        snapshot.load(SAMPLE_SNAPSHOT)
+    with pytest.raises(requests.HTTPError):
+        benchmark.pedantic(snapshot.export, args=(str(path),), rounds=1, iterations=1)
+    assert not path.exists()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import numpy as np
+import pytest
+
+from conftest import SCALES, repo_path, run_benchmark, scale_signals
+from saliency_kd.llm_analysis import LLMAnalysis
+from saliency_kd.symbolic_fault_info import load_symbolic_fault_info
+
+CENTROIDS = repo_path("llm_input", "Mallat", "class_0", "centroids4llm.npy")
+
+
+@pytest.fixture
+def name_desc_pairs():
+    fault_info = load_symbolic_fault_info("Mallat", directory=repo_path("knowledge_base", "symbolic_fault_info"))
+    return [(info["name"], info["fault_desc"]) for info in fault_info]
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def bench_gen_prompt_ts(benchmark, tmp_path, name_desc_pairs, scale):
+    centroids = scale_signals(np.load(CENTROIDS), scale)
+    llm_input = str(tmp_path / "centroids.npy")
+    np.save(llm_input, centroids)
+    llma = LLMAnalysis()
+    prompt = run_benchmark(benchmark, llma.gen_prompt_ts, llm_input, name_desc_pairs, n_items=len(centroids))
+    text = prompt[0]["content"][0]["text"]
+    assert all(f"{name}: {desc}" in text for name, desc in name_desc_pairs)
+    # the signals are appended in order, each value rounded to two decimals
+    signals = text.split("\n\nsignal ")[1:]
+    assert len(signals) == len(centroids)
+    for signal, centroid in zip(signals, centroids):
+        np.testing.assert_allclose(np.array(signal.split("\n")[1].split(), dtype=float), centroid, atol=0.005 + 1e-9)
+
+
+def bench_prompt_gpt(benchmark, openai_stub, name_desc_pairs):
+    llma = LLMAnalysis()
+    llma.client = openai_stub
+    prompt = llma.gen_prompt_ts(CENTROIDS, name_desc_pairs)
+    answer = run_benchmark(benchmark, llma.prompt_gpt, "stub", prompt, n_items=1)
+    # last line of the (canned) response
+    assert answer == "class_1, class_7, class_3"
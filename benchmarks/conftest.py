@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import json
+import os
+import sys
+import threading
+import tracemalloc
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator
+
+import joblib
+import numpy as np
+import pytest
+from tslearn.metrics import dtw, dtw_path_from_metric
+
+from saliency_kd.config import DATA_ENDPOINT
+from saliency_kd.dtw_distance import DTWConfig
+from saliency_kd.symbolic_fault_info import load_symbolic_fault_info
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# synthetic input scaling, e.g., BENCH_SCALES=1,10 for a quick run
+SCALES = [int(s) for s in os.environ.get("BENCH_SCALES", "1,10,100").split(",")]
+# pairwise DTW is quadratic in the number of signals - 100x would take hours
+QUADRATIC_SCALES = [s for s in SCALES if s <= 10]
+
+# the OpenAI key is not needed - the client is replaced by a local stub
+try:
+    import saliency_kd.secret_config  # noqa: F401
+except ImportError:
+    sys.modules["saliency_kd.secret_config"] = types.SimpleNamespace(OPENAI_API_KEY="benchmark")
+
+
+def repo_path(*parts: str) -> str:
+    """
+    Resolves the specified path relative to the repository root (bundled fixtures).
+
+    :param parts: path components, e.g., 'llm_input', 'Mallat', 'class_0', 'centroids4llm.npy'
+    :return: absolute path
+    """
+    return os.path.join(REPO_ROOT, *parts)
+
+
+class FusekiStubHandler(BaseHTTPRequestHandler):
+    """
+    Local Fuseki stand-in: consumes uploads / updates, answers each SPARQL query with the Mallat fault information
+    and returns the last upload to the data endpoint on export (GET), i.e., snapshots can be round-tripped.
+    """
+    protocol_version = "HTTP/1.1"
+    bindings = json.dumps({"results": {"bindings": [
+        {
+            "fault_name": {"type": "literal", "value": info["name"]},
+            "fault_desc": {"type": "literal", "value": info["fault_desc"]},
+            "severity": {"type": "literal", "value": info["severity"]}
+        } for info in load_symbolic_fault_info("Mallat", directory=repo_path("knowledge_base", "symbolic_fault_info"))
+    ]}}).encode()
+    # (method, path, content type) of each upload / update and the last upload to the data endpoint - shared by all
+    # handler instances
+    uploads = []
+    data = b""
+
+    def read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+                if size == 0:
+                    break
+            return b"".join(chunks)
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def reply(self, body: bytes, status: int = 200, content_type: str = "application/json") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != DATA_ENDPOINT:
+            self.reply(b"", status=404)
+            return
+        self.reply(FusekiStubHandler.data, content_type="application/n-quads")
+
+    def do_POST(self) -> None:
+        body = self.read_body()
+        if not self.path.startswith(DATA_ENDPOINT.rsplit("/", 1)[0] + "/"):
+            self.reply(b"", status=404)
+            return
+        if not self.path.endswith("/sparql"):
+            self.uploads.append((self.command, self.path, self.headers.get("Content-Type")))
+        if self.path.split("?")[0] == DATA_ENDPOINT:
+            FusekiStubHandler.data = body
+        self.reply(self.bindings if self.path.endswith("/sparql") else b"{}")
+
+    def do_PUT(self) -> None:
+        self.do_POST()
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture(scope="session")
+def fuseki_url() -> Iterator[str]:
+    """
+    URL of the local Fuseki stand-in (served in a background thread).
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FusekiStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+class OpenAIStub:
+    """
+    Replaces the OpenAI client - returns a canned response immediately.
+    """
+
+    def __init__(self) -> None:
+        usage = types.SimpleNamespace(
+            input_tokens=5000, output_tokens=800, total_tokens=5800,
+            input_tokens_details=types.SimpleNamespace(cached_tokens=0)
+        )
+        response = types.SimpleNamespace(
+            id="resp_benchmark", model="stub", output_text="signal 1: ...\nclass_1, class_7, class_3",
+            temperature=1.0, max_output_tokens=None, usage=usage
+        )
+        self.responses = types.SimpleNamespace(create=lambda **kwargs: response)
+
+
+@pytest.fixture
+def openai_stub() -> OpenAIStub:
+    return OpenAIStub()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def jit_warmup() -> None:
+    """
+    Compiles the numba-based DTW functions once, i.e., the compilation isn't part of any measurement.
+    """
+    series = np.zeros((8, 2))
+    dtw_path_from_metric(series, series)
+    dtw(series, series, global_constraint="sakoe_chiba", sakoe_chiba_radius=1)
+    DTWConfig().distance(series, series)
+
+
+@pytest.fixture(scope="session")
+def multivariate_clustering() -> tuple:
+    """
+    Bundled multivariate (signal + saliency map) clustering of Mallat class 0: (pred labels, centroids, signals).
+    """
+    _, pred_labels, _, centroids, signals = joblib.load(
+        repo_path("trained_models", "multivariate_Mallat_class_0_znorm_len_256.pkl")
+    )
+    return np.asarray(pred_labels), np.asarray(centroids), np.asarray(signals)
+
+
+def scale_signals(signals: np.ndarray, scale: int, noise: float = 0.05, seed: int = 42) -> np.ndarray:
+    """
+    Scales the input synthetically, i.e., tiles the signals and adds small noise (avoids identical copies).
+
+    :param signals: signals, shape (n, ...)
+    :param scale: scaling factor
+    :param noise: std of the added gaussian noise
+    :param seed: random seed
+    :return: scaled signals, shape (n * scale, ...)
+    """
+    tiled = np.concatenate([signals] * scale)
+    return tiled + np.random.default_rng(seed).normal(0, noise, tiled.shape) if scale > 1 else tiled
+
+
+def run_benchmark(benchmark, func: Callable, *args, n_items: int, rounds: int = 0):
+    """
+    Benchmarks the specified function and records peak memory (tracemalloc, separate run) and throughput.
+
+    :param benchmark: pytest-benchmark fixture
+    :param func: function to be benchmarked
+    :param args: arguments of the function
+    :param n_items: number of processed items (facts, signals, ...) per call
+    :param rounds: number of rounds for expensive functions (0: calibrated by pytest-benchmark)
+    :return: result of the function
+    """
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if rounds > 0:
+        res = benchmark.pedantic(func, args=args, rounds=rounds, iterations=1)
+    else:
+        res = benchmark(func, *args)
+    benchmark.extra_info["items"] = n_items
+    benchmark.extra_info["peak_mb"] = round(peak / 1e6, 3)
+    if benchmark.stats is not None:
+        # no timings with --benchmark-disable
+        benchmark.extra_info["items_per_s"] = round(n_items / benchmark.stats.stats.mean, 1)
+    return res
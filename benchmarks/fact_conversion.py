@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import re
+import time
+import uuid
+from typing import List
+
+from nesy_diag_ontology.fact import Fact
+from rdflib import RDF, Literal, URIRef
+
+from saliency_kd.config import ONTOLOGY_PREFIX
+from saliency_kd.connection_controller import ConnectionController
+
+N_FACTS = 100000
+
+
+def gen_facts(n_facts: int, heatmap_len: int) -> List[Fact]:
+    """
+    Generates sensor fault facts (four per instance) including heatmap-sized literals.
+
+    :param n_facts: number of facts
+    :param heatmap_len: number of values of the heatmap literals
+    :return: semantic facts
+    """
+    heatmap = ",".join(str(i / heatmap_len) for i in range(heatmap_len))
+    facts = []
+    for i in range(n_facts // 4):
+        sensor_fault_id = "sensor_fault_" + str(uuid.uuid4())
+        facts += [
+            Fact((sensor_fault_id, RDF.type, ONTOLOGY_PREFIX + "SensorFault")),
+            Fact((sensor_fault_id, ONTOLOGY_PREFIX + "name", "class_" + str(i % 8)), property_fact=True),
+            Fact((sensor_fault_id, ONTOLOGY_PREFIX + "severity", "X"), property_fact=True),
+            Fact((sensor_fault_id, ONTOLOGY_PREFIX + "fault_desc", heatmap), property_fact=True)
+        ]
+    return facts
+
+
+def legacy_fact_to_triple(connection: ConnectionController, fact: Fact) -> tuple:
+    """
+    Previous conversion (uncompiled URI pattern per element, no memoization) - reference for the comparison.
+
+    :param connection: connection controller (namespace)
+    :param fact: semantic fact to be converted
+    :return: RDF triple
+    """
+    def get_uri(triple_ele):
+        if re.match(r"(http|https)://([\w_-]+(?:\.[\w_-]+)+)([\w.,@?^=%&:/~+]*[\w@?^=%&/~+])", triple_ele):
+            return URIRef(triple_ele)
+        return URIRef(connection.namespace[triple_ele])
+
+    obj = Literal(fact.triple[2]) if fact.property_fact else URIRef(get_uri(fact.triple[2]))
+    return URIRef(get_uri(fact.triple[0])), URIRef(get_uri(fact.triple[1])), obj
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='microbenchmark: fact to RDF triple conversion')
+    parser.add_argument('--facts', type=int, default=N_FACTS, help='number of facts')
+    parser.add_argument('--heatmap-len', type=int, default=512, help='number of values of the heatmap literals')
+    args = parser.parse_args()
+
+    bench_facts = gen_facts(args.facts, args.heatmap_len)
+    controller = ConnectionController(namespace=ONTOLOGY_PREFIX, verbose=False)
+
+    start = time.perf_counter()
+    legacy = [legacy_fact_to_triple(controller, fact) for fact in bench_facts]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    current = [controller.fact_to_triple(fact) for fact in bench_facts]
+    current_time = time.perf_counter() - start
+
+    assert legacy == current
+    print(f"{len(bench_facts)} facts")
+    print(f"legacy:  {legacy_time:.3f} s ({len(bench_facts) / legacy_time:.0f} facts/s)")
+    print(f"current: {current_time:.3f} s ({len(bench_facts) / current_time:.0f} facts/s)")
+    print(f"speedup: {legacy_time / current_time:.2f}x")
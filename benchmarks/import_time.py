@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import List, Tuple, Dict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINTS = ["saliency_kd.llm_analysis", "saliency_kd.gen_symbolic_class_desc"]
+N_RUNS = 5
+
+
+def subprocess_env() -> Dict[str, str]:
+    """
+    Environment of the measured interpreters - the package is resolved from the repository (no installation needed).
+
+    :return: environment variables
+    """
+    return {**os.environ, "PYTHONPATH": os.pathsep.join([REPO_ROOT, os.environ.get("PYTHONPATH", "")])}
+
+
+def measure_import_time(module: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    Measures the import time of the specified module in a fresh interpreter ('python -X importtime').
+
+    :param module: module to be imported, e.g., 'saliency_kd.llm_analysis'
+    :return: (cumulative import time of the module in ms, [(direct dependency, cumulative import time in ms)])
+    """
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True,
+        cwd=REPO_ROOT, env=subprocess_env()
+    )
+    assert res.returncode == 0, res.stderr
+    # nested imports are listed before the importing module, indented by two additional spaces per level
+    children: List[Tuple[str, float]] = []
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("   "):
+            if name.strip() == module:
+                return int(cumulative) / 1000, sorted(children, key=lambda child: -child[1])
+            children = []
+        elif not name.startswith("     "):
+            children.append((name.strip(), int(cumulative) / 1000))
+    raise ValueError(f"{module} not found in the import time report")
+
+
+def measure_help_time(module: str, n_runs: int = N_RUNS) -> float:
+    """
+    Measures the wall time of '<entry point> --help' (interpreter start-up incl. imports), i.e., the fixed cost of each
+    CLI invocation.
+
+    :param module: entry point, e.g., 'saliency_kd.llm_analysis'
+    :param n_runs: number of runs (the minimum is reported)
+    :return: wall time in ms
+    """
+    script = os.path.join(REPO_ROOT, *module.split(".")) + ".py"
+    times = []
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, script, "--help"], capture_output=True, check=True, cwd=REPO_ROOT, env=subprocess_env()
+        )
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='import time report of the CLI entry points')
+    parser.add_argument('--entry-points', type=str, nargs='+', default=ENTRY_POINTS, help='modules to be measured')
+    parser.add_argument('--top', type=int, default=10, help='number of listed dependencies')
+    args = parser.parse_args()
+
+    for entry_point in args.entry_points:
+        import_ms, deps = measure_import_time(entry_point)
+        print(f"{entry_point}: import {import_ms:.1f} ms, '--help' {measure_help_time(entry_point):.1f} ms")
+        for dep, dep_ms in deps[:args.top]:
+            print(f"    {dep:<40} {dep_ms:>8.1f} ms")
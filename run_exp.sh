@@ -1,3 +1,32 @@
+#!/bin/bash
+# the worker keeps the clients, connection pools, inputs and KG results warm across the runs
+SOCKET=.cache/llm_worker.sock
+STARTUP_TIMEOUT=60  # seconds
+# each experiment is logged into its own file, i.e., the evaluation only covers the runs of this experiment
+RUN_LOG=output_$(date +%Y%m%d_%H%M%S).txt
+
+mkdir -p .cache
+rm -f "$SOCKET"
+python saliency_kd/llm_worker.py --socket "$SOCKET" --metrics metrics.jsonl > llm_worker.log 2>&1 &
+WORKER_PID=$!
+trap 'python saliency_kd/llm_worker.py --socket "$SOCKET" --cmd shutdown > /dev/null 2>&1 || kill "$WORKER_PID" 2> /dev/null' EXIT
+
+for ((t = 0; t < STARTUP_TIMEOUT * 10; t++)); do
+    [ -S "$SOCKET" ] && break
+    if ! kill -0 "$WORKER_PID" 2> /dev/null; then
+        echo "LLM worker exited during startup, see llm_worker.log" >&2
+        exit 1
+    fi
+    sleep 0.1
+done
+if [ ! -S "$SOCKET" ]; then
+    echo "LLM worker not ready after ${STARTUP_TIMEOUT}s, see llm_worker.log" >&2
+    exit 1
+fi
+
 for i in {1..20}; do
-    python saliency_kd/llm_analysis.py --mode ts --input llm_input/Mallat/class_0/centroids4llm.npy --model o3-2025-04-16 >> output.txt
+    python saliency_kd/llm_analysis.py --mode ts --input llm_input/Mallat/class_0/centroids4llm.npy --model o3-2025-04-16 --dataset Mallat --worker "$SOCKET" >> "$RUN_LOG"
 done
+
+# agreement across the runs (accuracy if the ground truth of the centroids is specified via --truth)
+python saliency_kd/llm_evaluation.py --logs --input "$RUN_LOG" --dataset Mallat --model o3-2025-04-16
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+from typing import List, Optional
+
+import numpy as np
+from kneed import KneeLocator
+from tslearn.clustering import TimeSeriesKMeans
+
+from saliency_kd.dtw_distance import DTWConfig, configure_dtw, get_dtw_config
+
+N_INIT = 20  # ensures stability; avoids bad local minima - default in many packages is ~10
+MAX_ITER = 500  # more than sufficient for convergence in most cases
+SEED = 42
+MAX_ITER_BARYCENTER = 300  # might drop this to ~100–200 for short sequences
+K_VALUES = range(1, 10)
+
+
+def k_means(
+        series: np.ndarray, k: int, metric: str = "dtw", n_init: int = N_INIT, max_iter: int = MAX_ITER,
+        dtw_config: Optional[DTWConfig] = None, verbose: bool = False
+) -> TimeSeriesKMeans:
+    """
+    Performs k-means clustering of the provided time series as in 'saliency_kd.ipynb', i.e., DBA k-means for "dtw".
+
+    :param series: time series to cluster (e.g., saliency maps), shape (n_ts, sz[, d])
+    :param k: number of clusters
+    :param metric: distance metric to use, e.g., "dtw" (constrained as configured, see 'configure_dtw') or "euclidean"
+    :param n_init: number of k-means runs
+    :param max_iter: max number of iterations per k-means run
+    :param dtw_config: DTW configuration (global configuration if not specified)
+    :param verbose: whether tslearn reports the progress
+    :return: fitted k-means model (labels: 'labels_', centroids: 'cluster_centers_', inertia: 'inertia_')
+    """
+    dtw_config = get_dtw_config() if dtw_config is None else dtw_config
+    km = TimeSeriesKMeans(
+        n_clusters=k,
+        n_init=n_init,
+        max_iter=max_iter,
+        metric=metric,  # dtw: expensive, huge runtime (!)
+        verbose=verbose,
+        max_iter_barycenter=MAX_ITER_BARYCENTER if metric != "euclidean" else None,  # only used with dtw
+        metric_params=dtw_config.tslearn_params(series.shape[1]) if metric == "dtw" else None,
+        random_state=SEED
+    )
+    return km.fit(series)
+
+
+def elbow_inertias(
+        series: np.ndarray, metric: str = "dtw", n_init: int = N_INIT, max_iter: int = MAX_ITER,
+        dtw_config: Optional[DTWConfig] = None
+) -> List[float]:
+    """
+    Performs k-means clustering of the provided time series for each k in 'K_VALUES' (elbow method).
+
+    :param series: time series to cluster (e.g., saliency maps), shape (n_ts, sz[, d])
+    :param metric: distance metric to use, e.g., "dtw" or "euclidean"
+    :param n_init: number of k-means runs per k
+    :param max_iter: max number of iterations per k-means run
+    :param dtw_config: DTW configuration (global configuration if not specified)
+    :return: inertia per k (sum of distances to the closest centroid)
+    """
+    return [k_means(series, k, metric, n_init, max_iter, dtw_config).inertia_ for k in K_VALUES]
+
+
+def elbow_k(inertias: List[float]) -> Optional[int]:
+    """
+    Determines the number of clusters at the elbow (knee) of the inertia curve.
+
+    :param inertias: inertia per k in 'K_VALUES'
+    :return: number of clusters (k), None if the curve has no knee
+    """
+    return KneeLocator(K_VALUES, inertias, curve='convex', direction='decreasing').knee
+
+
+def determine_k_with_elbow(
+        series: np.ndarray, metric: str = "dtw", n_init: int = N_INIT, max_iter: int = MAX_ITER,
+        dtw_config: Optional[DTWConfig] = None
+) -> Optional[int]:
+    """
+    Determines the number of clusters of the provided time series with the elbow method.
+
+    :param series: time series to cluster (e.g., saliency maps), shape (n_ts, sz[, d])
+    :param metric: distance metric to use, e.g., "dtw" (constrained as configured, see 'configure_dtw') or "euclidean"
+    :param n_init: number of k-means runs per k
+    :param max_iter: max number of iterations per k-means run
+    :param dtw_config: DTW configuration (global configuration if not specified)
+    :return: number of clusters (k)
+    """
+    return elbow_k(elbow_inertias(series, metric, n_init, max_iter, dtw_config))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='number of clusters of time series (elbow method)')
+    parser.add_argument('--input', type=str, required=True, help='time series to cluster (.npy, (n_ts, sz[, d]))')
+    parser.add_argument('--metric', choices=["dtw", "euclidean", "softdtw"], default="dtw", help='k-means metric')
+    parser.add_argument('--n-init', type=int, default=N_INIT, help='number of k-means runs per k')
+    parser.add_argument('--max-iter', type=int, default=MAX_ITER, help='max number of iterations per k-means run')
+    parser.add_argument(
+        '--dtw-constraint', choices=["sakoe_chiba", "itakura"], default=None, help='global constraint of the DTW'
+    )
+    parser.add_argument(
+        '--dtw-window', type=float, default=0.1, help='Sakoe-Chiba window (fraction of len, or time steps if >= 1)'
+    )
+    parser.add_argument('--dtw-max-slope', type=float, default=2., help='max slope of the Itakura parallelogram')
+    args = parser.parse_args()
+
+    configure_dtw(
+        constraint=args.dtw_constraint, window=int(args.dtw_window) if args.dtw_window >= 1 else args.dtw_window,
+        itakura_max_slope=args.dtw_max_slope
+    )
+    inertia_per_k = elbow_inertias(np.load(args.input), args.metric, args.n_init, args.max_iter)
+    for k_value, inertia in zip(K_VALUES, inertia_per_k):
+        print(f"k = {k_value}: inertia {inertia:.4f}")
+    print("optimal number of clusters:", elbow_k(inertia_per_k))
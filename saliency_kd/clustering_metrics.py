@@ -0,0 +1,441 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import copy
+import glob
+import os
+import re
+from typing import List, Dict, Tuple, Union, Optional, TYPE_CHECKING
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from saliency_kd.profiling import timed
+
+if TYPE_CHECKING:
+    from saliency_kd.dtw_distance import DTWConfig
+    from saliency_kd.saliency_compression import SaliencyCompressor
+
+# clustering artifacts: (model, pred_labels, ground_truth_per_cluster, centroids, clustered_signals), e.g.,
+# 'dba_km_input_Mallat_CLASS1.pkl' or 'multivariate_Mallat_class_0_znorm_len_256.pkl'
+ARTIFACT_PATTERN = "*.pkl"
+ARTIFACT_NAME_PATTERN = re.compile(r"^(?:dba_km_)?(input|saliency|multivariate)_(.+?)_(?:CLASS|class_)(\d+)")
+EXTERNAL_SCORES = ["ari", "nmi", "v_measure", "homogeneity", "completeness", "purity"]
+
+
+def labels_from_clusters(
+        gt_labels_per_cluster: Union[Dict[int, List[int]], List[List[int]]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flattens the ground truth labels of the samples assigned to each cluster into label arrays, e.g.,
+    [[1, 1, 2], [2, 3]] -> true labels [1, 1, 2, 2, 3], cluster assignments [0, 0, 0, 1, 1].
+
+    :param gt_labels_per_cluster: ground truth labels per cluster (cluster ID -> labels, or list in cluster order)
+    :return: (ground truth labels, cluster assignments)
+    """
+    if not isinstance(gt_labels_per_cluster, dict):
+        gt_labels_per_cluster = dict(enumerate(gt_labels_per_cluster))
+    sizes = [len(labels) for labels in gt_labels_per_cluster.values()]
+    labels_true = np.concatenate([np.asarray(labels) for labels in gt_labels_per_cluster.values()] or [[]])
+    return labels_true, np.repeat(np.asarray(list(gt_labels_per_cluster.keys())), sizes)
+
+
+def contingency_table(labels_true: np.ndarray, labels_pred: np.ndarray) -> np.ndarray:
+    """
+    Computes the contingency table of the ground truth labels and the cluster assignments (shared by all external
+    scores).
+
+    :param labels_true: ground truth labels, shape (n,)
+    :param labels_pred: cluster assignments, shape (n,)
+    :return: number of samples per (ground truth class, cluster), shape (n_classes, n_clusters)
+    """
+    classes, class_idx = np.unique(labels_true, return_inverse=True)
+    clusters, cluster_idx = np.unique(labels_pred, return_inverse=True)
+    table = np.bincount(class_idx * len(clusters) + cluster_idx, minlength=len(classes) * len(clusters))
+    return table.reshape(len(classes), len(clusters))
+
+
+def entropy(counts: np.ndarray) -> float:
+    """
+    Computes the entropy (natural logarithm) of the distribution given by the specified counts.
+
+    :param counts: counts per category
+    :return: entropy
+    """
+    probs = counts[counts > 0] / counts.sum()
+    return float(-np.sum(probs * np.log(probs)))
+
+
+def external_scores(table: np.ndarray) -> Dict[str, float]:
+    """
+    Computes the external clustering scores from the contingency table (as 'sklearn.metrics', NMI with arithmetic
+    normalization), i.e., adjusted Rand index, normalized mutual information, V-measure, homogeneity, completeness
+    and purity.
+
+    :param table: contingency table (ground truth classes x clusters)
+    :return: scores
+    """
+    table = table.astype(np.float64)
+    n = table.sum()
+    class_sums, cluster_sums = table.sum(axis=1), table.sum(axis=0)
+
+    # ARI - pair counts
+    sum_comb = np.sum(table * (table - 1)) / 2
+    sum_comb_classes = np.sum(class_sums * (class_sums - 1)) / 2
+    sum_comb_clusters = np.sum(cluster_sums * (cluster_sums - 1)) / 2
+    expected = sum_comb_classes * sum_comb_clusters / (n * (n - 1) / 2) if n > 1 else 0.
+    max_index = (sum_comb_classes + sum_comb_clusters) / 2
+    ari = 1. if max_index == expected else (sum_comb - expected) / (max_index - expected)
+
+    # information-theoretic scores
+    h_classes, h_clusters = entropy(class_sums), entropy(cluster_sums)
+    nz = table > 0
+    outer = np.outer(class_sums, cluster_sums)[nz]
+    mi = float(np.sum(table[nz] / n * np.log(table[nz] * n / outer))) if n > 0 else 0.
+    homogeneity = mi / h_classes if h_classes > 0 else 1.
+    completeness = mi / h_clusters if h_clusters > 0 else 1.
+    v_measure = (2 * homogeneity * completeness / (homogeneity + completeness)
+                 if homogeneity + completeness > 0 else 0.)
+    mean_entropy = (h_classes + h_clusters) / 2
+    nmi = mi / mean_entropy if mean_entropy > 0 else 1.
+
+    return {
+        "ari": float(ari), "nmi": float(nmi), "v_measure": float(v_measure), "homogeneity": float(homogeneity),
+        "completeness": float(completeness), "purity": float(table.max(axis=0).sum() / n) if n > 0 else 0.
+    }
+
+
+def clustering_scores(labels_true: np.ndarray, labels_pred: np.ndarray) -> Dict[str, float]:
+    """
+    Computes the external clustering scores (ARI, NMI, V-measure, homogeneity, completeness, purity) of the
+    specified label arrays from one shared contingency table.
+
+    :param labels_true: ground truth labels, shape (n,)
+    :param labels_pred: cluster assignments, shape (n,)
+    :return: scores
+    """
+    return external_scores(contingency_table(labels_true, labels_pred))
+
+
+def cluster_sizes(labels_pred: np.ndarray, k: int) -> np.ndarray:
+    """
+    Number of samples per cluster.
+
+    :param labels_pred: cluster assignments (0, ..., k - 1), shape (n,)
+    :param k: number of clusters
+    :return: cluster sizes, shape (k,)
+    """
+    return np.bincount(labels_pred, minlength=k)
+
+
+def normalized_size_entropy(labels_pred: np.ndarray, k: int) -> float:
+    """
+    Entropy of the cluster sizes normalized by its maximum (log k), i.e., the balance of the clustering.
+
+    :param labels_pred: cluster assignments (0, ..., k - 1), shape (n,)
+    :param k: number of clusters
+    :return: normalized entropy in [0, 1]
+    """
+    return entropy(cluster_sizes(labels_pred, k)) / np.log(k) if k > 1 else 1.
+
+
+def cluster_variance_across_samples(signals: np.ndarray, labels_pred: np.ndarray, k: int) -> np.ndarray:
+    """
+    Spread of each cluster, i.e., the variance across its samples per time step (and variable), averaged over the
+    time steps - computed for all clusters at once.
+
+    :param signals: clustered signals, shape (n, sz) or (n, sz, d)
+    :param labels_pred: cluster assignments (0, ..., k - 1), shape (n,)
+    :param k: number of clusters
+    :return: variance per cluster, shape (k,)
+    """
+    flat = np.asarray(signals, dtype=np.float64).reshape(len(signals), -1)
+    one_hot = np.eye(k)[labels_pred]
+    sizes = cluster_sizes(labels_pred, k)[:, np.newaxis]
+    means = one_hot.T @ flat / sizes
+    return np.mean(one_hot.T @ flat ** 2 / sizes - means ** 2, axis=1)
+
+
+def intra_class_variance(
+        signals: np.ndarray, centroids: np.ndarray, labels_pred: np.ndarray, k: int
+) -> np.ndarray:
+    """
+    Mean squared (Euclidean) distance of the samples to their cluster centroid per cluster.
+
+    :param signals: clustered signals, shape (n, sz) or (n, sz, d)
+    :param centroids: cluster centroids, same layout as the signals, shape (k, ...)
+    :param labels_pred: cluster assignments (0, ..., k - 1), shape (n,)
+    :param k: number of clusters
+    :return: variance per cluster, shape (k,)
+    """
+    signals = np.asarray(signals, dtype=np.float64).reshape(len(signals), -1)
+    centroids = np.asarray(centroids, dtype=np.float64).reshape(len(centroids), -1)
+    squared_dists = np.mean((signals - centroids[labels_pred]) ** 2, axis=1)
+    return np.bincount(labels_pred, weights=squared_dists, minlength=k) / cluster_sizes(labels_pred, k)
+
+
+def dtw_row(query: np.ndarray, candidates: np.ndarray, dtw_config: "DTWConfig") -> np.ndarray:
+    """
+    Computes the DTW distances between the query and each candidate.
+
+    :param query: query time series, shape (sz, d)
+    :param candidates: candidate time series, shape (n, sz, d)
+    :param dtw_config: DTW configuration
+    :return: distances, shape (n,)
+    """
+    return np.array([dtw_config.distance(query, candidate) for candidate in candidates])
+
+
+def pairwise_dtw(
+        dataset: np.ndarray, other: Optional[np.ndarray] = None, dtw_config: Optional["DTWConfig"] = None,
+        n_jobs: int = 1
+) -> np.ndarray:
+    """
+    Computes the DTW distance matrix of the specified time series - the symmetric matrix of a single dataset is
+    computed only once per pair.
+
+    :param dataset: time series, shape (n, sz) or (n, sz, d)
+    :param other: time series to compare with (dataset itself if not specified)
+    :param dtw_config: DTW configuration, i.e., constraint, local cost metric, ... (global configuration if not
+                       specified - default: accumulated Euclidean costs, unconstrained, as 'metrics.ipynb')
+    :param n_jobs: number of parallel jobs (-1: all cores)
+    :return: distance matrix, shape (n, n) or (n, len(other))
+    """
+    from saliency_kd.dtw_distance import to_time_series_dataset, get_dtw_config
+    # passed explicitly - the workers don't share the global configuration
+    dtw_config = get_dtw_config() if dtw_config is None else dtw_config
+    # contiguous, e.g., the signal channel of memory-mapped multivariate signals
+    dataset = np.ascontiguousarray(to_time_series_dataset(dataset))
+    other = None if other is None else np.ascontiguousarray(to_time_series_dataset(other))
+    if dtw_config.path and dtw_config.metric == "sqeuclidean" and dtw_config.early_abandon is None:
+        from tslearn.metrics import cdist_dtw
+        return cdist_dtw(dataset, other, n_jobs=n_jobs, **dtw_config.tslearn_params(dataset.shape[1]))
+    rows = joblib.Parallel(n_jobs=n_jobs)(
+        joblib.delayed(dtw_row)(query, dataset[i + 1:] if other is None else other, dtw_config)
+        for i, query in enumerate(dataset)
+    )
+    if other is not None:
+        return np.stack(rows)
+    distances = np.zeros((len(dataset), len(dataset)))
+    for i, row in enumerate(rows):
+        distances[i, i + 1:] = row
+    return distances + distances.T
+
+
+def dtw_silhouette_score(
+        distances: np.ndarray, labels_pred: np.ndarray, k: int
+) -> Tuple[float, np.ndarray]:
+    """
+    Silhouette score w.r.t. a precomputed (DTW) distance matrix - overall and per cluster. Samples in singleton
+    clusters score 0.
+
+    :param distances: pairwise distances of the clustered signals, shape (n, n)
+    :param labels_pred: cluster assignments (0, ..., k - 1), shape (n,)
+    :param k: number of clusters
+    :return: (silhouette score, silhouette score per cluster)
+    """
+    sizes = cluster_sizes(labels_pred, k)
+    # summed distance of each sample to each cluster, shape (n, k)
+    sums = distances @ np.eye(k)[labels_pred]
+    idx = np.arange(len(labels_pred))
+    own_size = sizes[labels_pred] - 1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        a = sums[idx, labels_pred] / own_size
+        mean_other = sums / sizes
+    mean_other[idx, labels_pred] = np.inf
+    b = mean_other.min(axis=1)
+    denom = np.maximum(a, b)
+    scores = np.where((own_size > 0) & (denom > 0), (b - a) / np.where(denom > 0, denom, 1.), 0.)
+    return float(scores.mean()), np.bincount(labels_pred, weights=scores, minlength=k) / sizes
+
+
+def dtw_medoids(
+        signals: np.ndarray, labels_pred: np.ndarray, k: int, dtw_config: Optional["DTWConfig"] = None,
+        n_jobs: int = 1
+) -> np.ndarray:
+    """
+    Determines the medoid of each cluster, i.e., the sample with the smallest summed DTW distance to the other
+    samples of its cluster.
+
+    :param signals: clustered signals, shape (n, sz) or (n, sz, d)
+    :param labels_pred: cluster assignments (0, ..., k - 1), shape (n,)
+    :param k: number of clusters
+    :param dtw_config: DTW configuration (global configuration if not specified)
+    :param n_jobs: number of parallel jobs (-1: all cores)
+    :return: index of the medoid of each cluster (-1: empty cluster), shape (k,)
+    """
+    medoids = np.full(k, -1, dtype=np.int64)
+    for c in range(k):
+        members = np.flatnonzero(labels_pred == c)
+        if len(members) > 0:
+            distances = pairwise_dtw(signals[members], dtw_config=dtw_config, n_jobs=n_jobs)
+            medoids[c] = members[np.argmin(distances.sum(axis=1))]
+    return medoids
+
+
+def dtw_cluster_distances(
+        signals: np.ndarray, centroids: np.ndarray, labels_pred: np.ndarray, k: int,
+        dtw_config: Optional["DTWConfig"] = None, n_jobs: int = 1
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Intra-cluster (median DTW distance of the samples to their centroid) and inter-cluster (DTW distances between
+    the centroids) distances.
+
+    :param signals: clustered signals, shape (n, sz) or (n, sz, d)
+    :param centroids: cluster centroids, shape (k, sz) or (k, sz, d)
+    :param labels_pred: cluster assignments (0, ..., k - 1), shape (n,)
+    :param k: number of clusters
+    :param dtw_config: DTW configuration (global configuration if not specified)
+    :param n_jobs: number of parallel jobs (-1: all cores)
+    :return: (intra-cluster distance per cluster, shape (k,), centroid distance matrix, shape (k, k))
+    """
+    to_centroids = pairwise_dtw(signals, centroids, dtw_config, n_jobs)[np.arange(len(labels_pred)), labels_pred]
+    intra = np.array([np.median(to_centroids[labels_pred == c]) for c in range(k)])
+    return intra, pairwise_dtw(centroids, dtw_config=dtw_config, n_jobs=n_jobs)
+
+
+def parse_artifact_name(path: str) -> Dict[str, Optional[Union[str, int]]]:
+    """
+    Parses the clustering target, dataset and class from the artifact name.
+
+    :param path: clustering artifact, e.g., 'dba_km_input_Mallat_CLASS1.pkl'
+    :return: {'target': ..., 'dataset': ..., 'class': ...} - None if not part of the name
+    """
+    match = ARTIFACT_NAME_PATTERN.match(os.path.basename(path))
+    if match is None:
+        return {"target": None, "dataset": None, "class": None}
+    return {"target": match.group(1), "dataset": match.group(2), "class": int(match.group(3))}
+
+
+@timed("clustering_metrics")
+def evaluate_artifact(
+        path: str, dtw: bool = False, dtw_config: Optional["DTWConfig"] = None, n_jobs: int = 1,
+        representation: Optional["SaliencyCompressor"] = None
+) -> Dict:
+    """
+    Evaluates the specified clustering artifact - the arrays are memory-mapped, i.e., the external scores only read
+    the labels. The internal metrics are computed on the signal channel (as in 'metrics.ipynb').
+
+    :param path: clustering artifact (model, pred_labels, ground_truth_per_cluster, centroids, clustered_signals)
+    :param dtw: whether the (expensive) DTW-based metrics are computed as well (silhouette, intra / inter distances)
+    :param dtw_config: DTW configuration (global configuration if not specified)
+    :param n_jobs: number of parallel jobs of the DTW computations (-1: all cores)
+    :param representation: compact representation the internal metrics are computed on (fitted to the signals of
+                           the artifact), e.g., SaliencyCompressor('paa') - dense signals if not specified
+    :return: summary of the clustering
+    """
+    _, pred_labels, gt_labels_per_cluster, centroids, signals = joblib.load(path, mmap_mode="r")
+    labels_pred = np.asarray(pred_labels, dtype=np.int64)
+    k = len(centroids)
+    # signal channel of multivariate (signal + saliency map) clusterings - a view, not a copy of the memory map
+    signals = signals[:, :, 0] if signals.ndim == 3 else signals
+    centroids = np.asarray(centroids)
+    centroids = centroids[:, :, 0] if centroids.ndim == 3 else centroids
+
+    res = {"artifact": os.path.basename(path), **parse_artifact_name(path), "k": k, "n": len(labels_pred)}
+    if representation is not None:
+        if dtw and representation.method == "pca":
+            # PCA coefficients have no temporal order
+            raise ValueError("the DTW-based metrics require a time series representation, i.e., 'paa' or 'topk'")
+        compressor = copy.copy(representation).fit(signals)
+        signals, centroids = compressor.features(signals), compressor.features(centroids)
+        res["representation"] = representation.method
+    res.update(clustering_scores(*labels_from_clusters(gt_labels_per_cluster)))
+    res["sizes"] = cluster_sizes(labels_pred, k).tolist()
+    res["normalized_entropy"] = normalized_size_entropy(labels_pred, k)
+    res["cluster_variance"] = float(np.mean(cluster_variance_across_samples(signals, labels_pred, k)))
+    res["intra_class_variance"] = float(np.mean(intra_class_variance(signals, centroids, labels_pred, k)))
+    if dtw:
+        from saliency_kd.dtw_distance import get_dtw_config
+        dtw_config = get_dtw_config() if dtw_config is None else dtw_config
+        res["dtw_constraint"] = dtw_config.constraint
+        distances = pairwise_dtw(signals, dtw_config=dtw_config, n_jobs=n_jobs)
+        res["silhouette"], _ = dtw_silhouette_score(distances, labels_pred, k)
+        intra, inter = dtw_cluster_distances(signals, centroids, labels_pred, k, dtw_config, n_jobs)
+        res["intra"] = float(np.mean(intra))
+        res["inter"] = float(np.mean(inter[~np.eye(k, dtype=bool)])) if k > 1 else 0.
+        res["intra_inter"] = res["intra"] / res["inter"] if res["inter"] > 0 else np.nan
+    return res
+
+
+def evaluate_artifacts(
+        directory: str, pattern: str = ARTIFACT_PATTERN, dtw: bool = False,
+        dtw_config: Optional["DTWConfig"] = None, n_jobs: int = -1,
+        representation: Optional["SaliencyCompressor"] = None
+) -> pd.DataFrame:
+    """
+    Evaluates all clustering artifacts of the specified directory (recursively) in parallel.
+
+    :param directory: artifact directory, e.g., 'trained_models'
+    :param pattern: file name pattern of the artifacts
+    :param dtw: whether the (expensive) DTW-based metrics are computed as well
+    :param dtw_config: DTW configuration (global configuration if not specified)
+    :param n_jobs: number of parallel jobs, one artifact each (-1: all cores)
+    :param representation: compact representation the internal metrics are computed on (dense if not specified)
+    :return: summary table, one row per artifact
+    """
+    paths = sorted(
+        p for p in glob.glob(os.path.join(directory, "**", pattern), recursive=True)
+        if parse_artifact_name(p)["target"] is not None
+    )
+    assert len(paths) > 0, f"no clustering artifacts in {directory}"
+    if dtw and dtw_config is None:
+        from saliency_kd.dtw_distance import get_dtw_config
+        # passed explicitly - the workers don't share the global configuration
+        dtw_config = get_dtw_config()
+    rows = joblib.Parallel(n_jobs=min(n_jobs, len(paths)) if n_jobs > 0 else n_jobs)(
+        joblib.delayed(evaluate_artifact)(path, dtw, dtw_config, 1, representation) for path in paths
+    )
+    return pd.DataFrame(rows).sort_values(["dataset", "class", "target"], ignore_index=True)
+
+
+if __name__ == "__main__":
+    from saliency_kd.saliency_compression import SaliencyCompressor, METHODS, N_SEGMENTS, TOP_K, N_COMPONENTS
+
+    parser = argparse.ArgumentParser(description='clustering quality metrics of the clustering artifacts')
+    parser.add_argument('--dir', type=str, default="trained_models", help='directory of the clustering artifacts')
+    parser.add_argument('--pattern', type=str, default=ARTIFACT_PATTERN, help='file name pattern of the artifacts')
+    parser.add_argument('--dtw', action='store_true', help='compute the DTW-based metrics (silhouette, intra / inter)')
+    parser.add_argument(
+        '--dtw-metric', type=str, default="euclidean",
+        help="local cost metric of the DTW distance ('sqeuclidean': standard DTW as the DBA k-means)"
+    )
+    parser.add_argument(
+        '--dtw-constraint', choices=["sakoe_chiba", "itakura"], default=None, help='global constraint of the DTW'
+    )
+    parser.add_argument(
+        '--dtw-window', type=float, default=0.1, help='Sakoe-Chiba window (fraction of len, or time steps if >= 1)'
+    )
+    parser.add_argument('--dtw-max-slope', type=float, default=2., help='max slope of the Itakura parallelogram')
+    parser.add_argument('--dtw-path', action='store_true', help='compute the DTW via the optimal path (reference)')
+    parser.add_argument(
+        '--representation', choices=METHODS, default=None,
+        help='compute the internal metrics on the compact representation of the signals (saliency_compression.py)'
+    )
+    parser.add_argument('--segments', type=int, default=N_SEGMENTS, help='number of PAA segments (paa, topk)')
+    parser.add_argument('--top-k', type=int, default=TOP_K, help='segments kept per signal (topk)')
+    parser.add_argument('--components', type=int, default=N_COMPONENTS, help='size of the PCA basis (pca)')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='number of parallel jobs (-1: all cores)')
+    parser.add_argument('--out', type=str, default=None, help='file the summary table is written to (.csv)')
+    args = parser.parse_args()
+    if args.dtw and args.representation == "pca":
+        parser.error("the DTW-based metrics require a time series representation, i.e., 'paa' or 'topk'")
+
+    dtw_conf = None
+    if args.dtw:
+        from saliency_kd.dtw_distance import configure_dtw
+        dtw_conf = configure_dtw(
+            constraint=args.dtw_constraint, window=int(args.dtw_window) if args.dtw_window >= 1 else args.dtw_window,
+            itakura_max_slope=args.dtw_max_slope, metric=args.dtw_metric, path=args.dtw_path
+        )
+    compact = None
+    if args.representation is not None:
+        compact = SaliencyCompressor(args.representation, args.segments, args.top_k, args.components)
+    summary = evaluate_artifacts(args.dir, args.pattern, args.dtw, dtw_conf, args.n_jobs, compact)
+    with pd.option_context("display.max_rows", None, "display.width", 250, "display.float_format", "{:.3f}".format):
+        print(summary.drop(columns=["artifact"]).to_string(index=False))
+    if args.out is not None:
+        summary.to_csv(args.out, index=False)
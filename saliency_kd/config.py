@@ -7,3 +7,16 @@ FUSEKI_URL = "http://127.0.0.1:3030"
 SPARQL_ENDPOINT = "/saliency_kd/sparql"
 DATA_ENDPOINT = "/saliency_kd/data"
 UPDATE_ENDPOINT = "/saliency_kd/update"
+DATASET_GRAPH_PREFIX = "http://www.semanticweb.org/sensor_fault_ontology/graph/"
+DATASETS_DIR = "datasets"
+DATASET_CACHE_DIR = ".cache/datasets"
+DATASET_CATALOG = ".cache/datasets/catalog.json"
+UCR_SUMMARY = "res/ucr_summary.csv"
+CLASSIFIER_PERFORMANCE = "res/classifier_performance_ucr.csv"
+TRAINED_MODELS_CACHE_DIR = "trained_models/cache"
+SYMBOLIC_FAULT_INFO_DIR = "knowledge_base/symbolic_fault_info"
+SNAPSHOT_DIR = "knowledge_base"
+LLM_WORKER_SOCKET = ".cache/llm_worker.sock"
+IMAGE_CACHE_DIR = ".cache/images"
+CLUSTER_IMG = "img/filtered_clusters.png"
+EVAL_RESULTS_DIR = "res/llm_eval"
@@ -3,14 +3,27 @@
 # @author Tim Bohne
 
 import re
-from typing import List, Dict, Union
+import time
+from typing import List, Dict, Union, Iterable, Iterator, Tuple, Set, Optional, TYPE_CHECKING
 
+import httpx
 import requests
-from nesy_diag_ontology.fact import Fact
-from rdflib import Namespace, Literal, Graph, URIRef
+from rdflib import Namespace, Literal, Graph, URIRef, BNode, XSD
 from termcolor import colored
 
-from saliency_kd.config import FUSEKI_URL, SPARQL_ENDPOINT, DATA_ENDPOINT, UPDATE_ENDPOINT
+from saliency_kd.config import FUSEKI_URL, SPARQL_ENDPOINT, DATA_ENDPOINT, UPDATE_ENDPOINT, DATASET_GRAPH_PREFIX
+from saliency_kd.logger import get_logger, log_metrics
+from saliency_kd.profiling import stage, count
+
+if TYPE_CHECKING:
+    # only needed for annotations - the ontology package is not loaded by the (query-only) LLM entry points
+    from nesy_diag_ontology.fact import Fact
+
+logger = get_logger("connection_controller")
+
+URI_PATTERN = re.compile(r"(http|https)://([\w_-]+(?:\.[\w_-]+)+)([\w.,@?^=%&:/~+]*[\w@?^=%&/~+])")
+URI_SCHEMES = ("http://", "https://")
+URI_CACHE_SIZE = 100000  # max number of memoized triple elements
 
 
 class ConnectionController:
@@ -32,28 +45,89 @@ class ConnectionController:
         self.graph = Graph()
         self.graph.bind("", self.namespace)
         self.verbose = verbose
+        # created lazily, bound to the event loop it is first used in
+        self.async_client = None
+        # triple element -> URI reference (subjects / predicates recur across facts)
+        self.uri_cache = {}
 
     def query_knowledge_graph(self, query: str, verbose: bool) -> List[Dict]:
         """
         Sends an HTTP request containing the specified query to the knowledge graph server.
 
         :param query: query to be sent to knowledge graph server
-        :param verbose: if true, queries are logged
+        :param verbose: if true, queries are logged (log level 'DEBUG')
         :return: query results (JSON list)
         """
         if verbose and self.verbose:
-            print("query knowledge graph..")
-            print(query)
-        res = requests.post(
-            self.fuseki_url + SPARQL_ENDPOINT,
-            query.encode(),
-            headers={'Content-Type': 'application/sparql-query', 'Accept': 'application/json'}
+            logger.debug("query knowledge graph..\n%s", query)
+        start = time.perf_counter()
+        with stage("kg_query"):
+            res = requests.post(
+                self.fuseki_url + SPARQL_ENDPOINT,
+                query.encode(),
+                headers={'Content-Type': 'application/sparql-query', 'Accept': 'application/json'}
+            )
+        self.record_http(len(query), res.content)
+        if res.status_code != 200:
+            logger.warning("HTTP status code: %s", res.status_code)
+        bindings = res.json()["results"]["bindings"]
+        log_metrics(
+            "kg_query", latency_s=time.perf_counter() - start, request_bytes=len(query),
+            response_bytes=len(res.content), rows=len(bindings)
         )
+        return bindings
+
+    async def query_knowledge_graph_async(self, query: str, verbose: bool) -> List[Dict]:
+        """
+        Sends an asynchronous HTTP request containing the specified query to the knowledge graph server, i.e.,
+        other work (e.g., an LLM request) can proceed while waiting for the response.
+
+        :param query: query to be sent to knowledge graph server
+        :param verbose: if true, queries are logged (log level 'DEBUG')
+        :return: query results (JSON list)
+        """
+        if verbose and self.verbose:
+            logger.debug("query knowledge graph (async)..\n%s", query)
+        if self.async_client is None:
+            self.async_client = httpx.AsyncClient()
+        start = time.perf_counter()
+        with stage("kg_query_async"):
+            res = await self.async_client.post(
+                self.fuseki_url + SPARQL_ENDPOINT,
+                content=query.encode(),
+                headers={'Content-Type': 'application/sparql-query', 'Accept': 'application/json'}
+            )
+        self.record_http(len(query), res.content)
         if res.status_code != 200:
-            print("HTTP status code:", res.status_code)
-        return res.json()["results"]["bindings"]
+            logger.warning("HTTP status code: %s", res.status_code)
+        bindings = res.json()["results"]["bindings"]
+        log_metrics(
+            "kg_query_async", latency_s=time.perf_counter() - start, request_bytes=len(query),
+            response_bytes=len(res.content), rows=len(bindings)
+        )
+        return bindings
+
+    @staticmethod
+    def record_http(n_bytes_sent: int, response_content: bytes) -> None:
+        """
+        Records an HTTP request in the profiling counters.
+
+        :param n_bytes_sent: number of bytes of the request body
+        :param response_content: response body
+        """
+        count("http_calls")
+        count("bytes_sent", n_bytes_sent)
+        count("bytes_received", len(response_content))
+
+    async def close_async_client(self) -> None:
+        """
+        Closes the asynchronous HTTP client (to be called before its event loop is closed).
+        """
+        if self.async_client is not None:
+            await self.async_client.aclose()
+            self.async_client = None
 
-    def extend_knowledge_graph(self, facts: List[Fact]) -> None:
+    def extend_knowledge_graph(self, facts: List["Fact"]) -> None:
         """
         Sends an HTTP request containing the facts to be entered into the knowledge graph to the knowledge graph server.
 
@@ -65,21 +139,196 @@ class ConnectionController:
         for fact in facts:
             # for very long facts, only print the first segment (e.g., heatmaps)
             if self.verbose:
-                print("fact:", str(fact)[:200] + "..." if len(str(fact)) > 0 else fact)
-            if fact.property_fact:
-                graph.add((self.get_uri(fact.triple[0]), self.get_uri(fact.triple[1]), Literal(fact.triple[2])))
-            else:
-                graph.add((self.get_uri(fact.triple[0]), self.get_uri(fact.triple[1]), self.get_uri(fact.triple[2])))
+                fact_str = str(fact)
+                print("fact:", fact_str[:200] + "..." if len(fact_str) > 200 else fact_str)
+            graph.add(self.fact_to_triple(fact))
 
-        res = requests.post(
-            self.fuseki_url + DATA_ENDPOINT,
-            data=graph.serialize(format="ttl").encode(),
-            headers={'Content-Type': 'text/turtle'}
-        )
+        data = graph.serialize(format="ttl").encode()
+        with stage("kg_upload"):
+            res = requests.post(self.fuseki_url + DATA_ENDPOINT, data=data, headers={'Content-Type': 'text/turtle'})
+        self.record_http(len(data), res.content)
         if res.status_code != 200:
             print("HTTP status code:", res.status_code)
 
-    def remove_outdated_facts_from_knowledge_graph(self, facts: List[Fact]) -> None:
+    @staticmethod
+    def dataset_graph(dataset: str) -> str:
+        """
+        Returns the IRI of the named graph holding the facts of the specified dataset.
+
+        :param dataset: name of the dataset, e.g., 'Mallat'
+        :return: named graph IRI
+        """
+        return DATASET_GRAPH_PREFIX + dataset
+
+    def extend_knowledge_graph_streamed(
+            self, facts: Iterable["Fact"], chunk_size: int = 1000, graph: Optional[str] = None
+    ) -> None:
+        """
+        Sends a single (chunked) HTTP request streaming the facts to be entered into the knowledge graph as
+        N-Triples, i.e., the facts are serialized on the fly without building an intermediate graph.
+
+        :param facts: semantic facts to be entered into the knowledge graph (e.g., a generator)
+        :param chunk_size: number of triples per transferred chunk
+        :param graph: named graph the facts are entered into (default graph if none is specified)
+        """
+        self.upload_triples_streamed((self.fact_to_triple(fact) for fact in facts), chunk_size, graph)
+
+    def upload_triples_streamed(
+            self, triples: Iterable[Tuple], chunk_size: int = 1000, graph: Optional[str] = None, replace: bool = False
+    ) -> None:
+        """
+        Sends a single (chunked) HTTP request streaming the specified RDF triples into the knowledge graph
+        (Graph Store Protocol).
+
+        :param triples: RDF triples to be entered into the knowledge graph
+        :param chunk_size: number of triples per transferred chunk
+        :param graph: named graph the triples are entered into (default graph if none is specified)
+        :param replace: if true, the content of the graph is replaced (PUT), otherwise, the triples are added (POST)
+        """
+        if self.verbose:
+            action = "replacing" if replace else "extending"
+            print(colored(f"\n{action} knowledge graph (streamed, {graph or 'default graph'})..", "green", "on_grey",
+                          ["bold"]))
+        if graph is not None:
+            params = {'graph': graph}
+        else:
+            # a PUT without target would replace the entire dataset
+            params = {'default': ''} if replace else {}
+        with stage("kg_upload"):
+            res = requests.request(
+                "PUT" if replace else "POST",
+                self.fuseki_url + DATA_ENDPOINT,
+                params=params,
+                data=self.gen_n_triples_chunks(triples, chunk_size),
+                headers={'Content-Type': 'application/n-triples'}
+            )
+        # the streamed body is counted chunk by chunk
+        self.record_http(0, res.content)
+        if res.status_code not in [200, 201, 204]:
+            print("HTTP status code:", res.status_code)
+
+    def upload_quads_streamed(self, quads: Iterable[Tuple], chunk_size: int = 1000) -> None:
+        """
+        Sends a single (chunked) HTTP request streaming the specified RDF quads into the knowledge graph as N-Quads
+        (Graph Store Protocol), i.e., the statements of several named graphs are added with one upload.
+
+        :param quads: RDF quads (subject, predicate, object, graph) to be entered into the knowledge graph
+        :param chunk_size: number of quads per transferred chunk
+        """
+        if self.verbose:
+            print(colored("\nextending knowledge graph (streamed, N-Quads)..", "green", "on_grey", ["bold"]))
+        with stage("kg_upload"):
+            res = requests.post(
+                self.fuseki_url + DATA_ENDPOINT,
+                data=self.gen_n_triples_chunks(quads, chunk_size),
+                headers={'Content-Type': 'application/n-quads'}
+            )
+        # the streamed body is counted chunk by chunk
+        self.record_http(0, res.content)
+        if res.status_code not in [200, 201, 204]:
+            print("HTTP status code:", res.status_code)
+
+    def drop_graph(self, graph: str) -> None:
+        """
+        Removes the specified named graph from the knowledge graph (Graph Store Protocol).
+
+        :param graph: named graph to be removed
+        """
+        if self.verbose:
+            print(colored(f"\ndropping graph {graph}..", "green", "on_grey", ["bold"]))
+        with stage("kg_update"):
+            res = requests.delete(self.fuseki_url + DATA_ENDPOINT, params={'graph': graph})
+        self.record_http(0, res.content)
+        # 404: graph does not exist (anymore)
+        if res.status_code not in [200, 204, 404]:
+            print("HTTP status code:", res.status_code)
+
+    @staticmethod
+    def gen_n_triples_chunks(triples: Iterable[Tuple], chunk_size: int) -> Iterator[bytes]:
+        """
+        Serializes the RDF triples as N-Triples in chunks (quads, i.e., triples extended by the graph, as N-Quads).
+
+        :param triples: RDF triples (or quads) to be serialized
+        :param chunk_size: number of triples per chunk
+        :return: encoded N-Triples (N-Quads) chunks
+        """
+        lines = []
+        for triple in triples:
+            lines.append(" ".join(ele.n3() for ele in triple) + " .\n")
+            if len(lines) == chunk_size:
+                chunk = "".join(lines).encode()
+                count("bytes_sent", len(chunk))
+                yield chunk
+                lines = []
+        if len(lines) > 0:
+            chunk = "".join(lines).encode()
+            count("bytes_sent", len(chunk))
+            yield chunk
+
+    def fact_to_triple(self, fact: "Fact") -> Tuple[URIRef, URIRef, Union[URIRef, Literal]]:
+        """
+        Converts the specified fact into an RDF triple.
+
+        :param fact: semantic fact to be converted
+        :return: RDF triple
+        """
+        obj = Literal(fact.triple[2]) if fact.property_fact else self.get_uri(fact.triple[2])
+        return self.get_uri(fact.triple[0]), self.get_uri(fact.triple[1]), obj
+
+    def query_graph_triples(self, graph: str) -> Set[Tuple]:
+        """
+        Retrieves all triples of the specified named graph.
+
+        :param graph: named graph IRI
+        :return: RDF triples
+        """
+        query = f"SELECT ?s ?p ?o WHERE {{ GRAPH <{graph}> {{ ?s ?p ?o }} }}"
+        return {
+            (self.binding_to_term(row['s']), self.binding_to_term(row['p']), self.binding_to_term(row['o']))
+            for row in self.query_knowledge_graph(query, False)
+        }
+
+    @staticmethod
+    def binding_to_term(binding: Dict) -> Union[URIRef, Literal, BNode]:
+        """
+        Converts a binding of the SPARQL JSON results into the corresponding RDF term.
+
+        :param binding: SPARQL JSON result binding
+        :return: RDF term
+        """
+        if binding['type'] == "uri":
+            return URIRef(binding['value'])
+        if binding['type'] == "bnode":
+            return BNode(binding['value'])
+        # simple literals are equivalent to xsd:string literals (RDF 1.1)
+        datatype = binding.get('datatype')
+        datatype = None if datatype is None or datatype == str(XSD.string) else URIRef(datatype)
+        return Literal(binding['value'], lang=binding.get('xml:lang'), datatype=datatype)
+
+    def remove_triples(self, triples: Iterable[Tuple], graph: Optional[str] = None) -> None:
+        """
+        Sends a single HTTP request removing all specified RDF triples from the knowledge graph.
+
+        :param triples: RDF triples to be removed
+        :param graph: named graph the triples are removed from (default graph if none is specified)
+        """
+        body = "".join(" ".join(ele.n3() for ele in triple) + " .\n" for triple in triples)
+        if len(body) == 0:
+            return
+        if graph is not None:
+            body = f"GRAPH <{graph}> {{\n{body}}}\n"
+        if self.verbose:
+            print(colored("\nremoving triples from knowledge graph..", "green", "on_grey", ["bold"]))
+        data = f"DELETE DATA {{\n{body}}}".encode()
+        with stage("kg_update"):
+            res = requests.post(
+                self.fuseki_url + UPDATE_ENDPOINT, data=data, headers={'Content-Type': 'application/sparql-update'}
+            )
+        self.record_http(len(data), res.content)
+        if res.status_code != 200 and res.status_code != 204:
+            print("HTTP status code:", res.status_code)
+
+    def remove_outdated_facts_from_knowledge_graph(self, facts: List["Fact"]) -> None:
         """
         Sends an HTTP request containing the facts to be removed from the knowledge graph.
 
@@ -102,24 +351,32 @@ class ConnectionController:
                 query = f"DELETE DATA {{ <{f[0]}> <{f[1]}> <{f[2]}> . }}"
             if self.verbose:
                 print("*** DELETION QUERY:", query)
-            res = requests.post(
-                self.fuseki_url + UPDATE_ENDPOINT,
-                data=query.encode(),
-                headers={'Content-Type': 'application/sparql-update'}
-            )
+            with stage("kg_update"):
+                res = requests.post(
+                    self.fuseki_url + UPDATE_ENDPOINT,
+                    data=query.encode(),
+                    headers={'Content-Type': 'application/sparql-update'}
+                )
+            self.record_http(len(query), res.content)
             if res.status_code != 200 and res.status_code != 204:
                 print("HTTP status code:", res.status_code)
 
-    def get_uri(self, triple_ele: str) -> Union[URIRef, str]:
+    def get_uri(self, triple_ele: str) -> URIRef:
         """
-        Returns the specified triple element as feasible URI reference.
+        Returns the specified triple element as feasible URI reference (memoized).
 
         :param triple_ele: triple element to get URI reference for
         :return: URI reference for triple element
         """
-        if re.match("(http|https)://([\w_-]+(?:\.[\w_-]+)+)([\w.,@?^=%&:/~+]*[\w@?^=%&/~+])", triple_ele):
-            return URIRef(triple_ele)
-        elif triple_ele == "http://www.w3.org/1999/02/22-rdf-syntax-ns#type":
-            return triple_ele
-        else:
-            return URIRef(self.namespace[triple_ele])
+        uri = self.uri_cache.get(triple_ele)
+        if uri is None:
+            # cheap prefix check first - the URI pattern is only evaluated for candidates
+            # (str.startswith explicitly, rdflib terms override it without support for tuples)
+            if str.startswith(triple_ele, URI_SCHEMES) and URI_PATTERN.match(triple_ele):
+                uri = URIRef(triple_ele)
+            else:
+                uri = URIRef(self.namespace + triple_ele)
+            if len(self.uri_cache) >= URI_CACHE_SIZE:
+                self.uri_cache.clear()
+            self.uri_cache[triple_ele] = uri
+        return uri
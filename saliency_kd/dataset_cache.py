@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import hashlib
+import json
+import os
+from typing import Tuple, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from tslearn.preprocessing import TimeSeriesResampler, TimeSeriesScalerMeanVariance
+
+from saliency_kd.config import DATASETS_DIR, DATASET_CACHE_DIR
+
+
+def to_zero_based_labels(labels: np.ndarray) -> np.ndarray:
+    """
+    Shifts UCR labels starting at 1 to start at 0.
+
+    :param labels: multiclass labels
+    :return: zero-based labels
+    """
+    labels = np.asarray(labels)
+    return labels - 1 if 0 not in labels else labels
+
+
+def to_binary_labels(labels: np.ndarray) -> np.ndarray:
+    """
+    Turns the multiclass labels into binary labels by subsuming them in alternating fashion (label % 2).
+
+    :param labels: multiclass labels
+    :return: binary labels
+    """
+    return to_zero_based_labels(labels) % 2
+
+
+class DatasetView:
+    """
+    View of a cached dataset split, i.e., a label overlay (binary, relabeled, ...) and optional sample indices
+    (e.g., a reduced test set) on the memory-mapped base samples - the sample matrix isn't duplicated.
+    """
+
+    def __init__(self, labels: np.ndarray, samples: np.ndarray, indices: Optional[np.ndarray] = None) -> None:
+        """
+        Initializes the dataset view.
+
+        :param labels: labels of the view, shape (m,)
+        :param samples: (memory-mapped) samples of the base dataset, shape (n, len)
+        :param indices: indices of the view's samples in the base dataset (None: all samples)
+        """
+        self.labels = labels
+        self.base_samples = samples
+        self.indices = indices
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __getitem__(self, idx: int) -> Tuple[int, np.ndarray]:
+        """
+        Retrieves the specified sample of the view (without materializing the view).
+
+        :param idx: index within the view
+        :return: (label, sample)
+        """
+        return self.labels[idx], self.base_samples[idx if self.indices is None else self.indices[idx]]
+
+    @property
+    def samples(self) -> np.ndarray:
+        """
+        Samples of the view - the base samples (memory-mapped) if the view contains all of them, otherwise only the
+        selected samples are read (copied).
+
+        :return: samples of shape (m, len)
+        """
+        return self.base_samples if self.indices is None else self.base_samples[self.indices]
+
+
+class DatasetCache:
+    """
+    Caches the UCR datasets (TSV files) as '.npy' arrays that are loaded memory-mapped, i.e., each TSV file is
+    only parsed once and the sample matrices can be shared across processes.
+    """
+
+    def __init__(self, datasets_dir: str = DATASETS_DIR, cache_dir: str = DATASET_CACHE_DIR) -> None:
+        """
+        Initializes the dataset cache.
+
+        :param datasets_dir: directory containing the datasets ('<name>/<name>_<split>.tsv')
+        :param cache_dir: directory the cached arrays are stored in
+        """
+        self.datasets_dir = datasets_dir
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def tsv_path(self, dataset: str, split: str) -> str:
+        """
+        Returns the path of the TSV file of the specified dataset split.
+
+        :param dataset: name of the dataset, e.g., 'Mallat'
+        :param split: dataset split, e.g., 'TRAIN' or 'TEST'
+        :return: path of the TSV file
+        """
+        return os.path.join(self.datasets_dir, dataset, dataset + "_" + split + ".tsv")
+
+    def fingerprint(self, dataset: str, split: str) -> str:
+        """
+        Fingerprint of the TSV file of the specified dataset split (path, size and modification time).
+
+        :param dataset: name of the dataset
+        :param split: dataset split
+        :return: fingerprint of the source file
+        """
+        stat = os.stat(self.tsv_path(dataset, split))
+        return f"{self.tsv_path(dataset, split)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def content_hash(self, dataset: str, split: str) -> str:
+        """
+        Hash of the content of the TSV file of the specified dataset split (unaffected by checkouts / copies).
+
+        :param dataset: name of the dataset
+        :param split: dataset split
+        :return: hex digest of the file content
+        """
+        sha = hashlib.sha1()
+        with open(self.tsv_path(dataset, split), "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        return sha.hexdigest()[:16]
+
+    @staticmethod
+    def hash_config(config: dict) -> str:
+        """
+        Hashes the specified (JSON serializable) configuration.
+
+        :param config: configuration to be hashed
+        :return: hex digest of the configuration
+        """
+        return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+    def cache_prefix(self, dataset: str, split: str, suffix: str = "") -> str:
+        """
+        Returns the path prefix of the cached arrays of the specified dataset split.
+
+        :param dataset: name of the dataset
+        :param split: dataset split
+        :param suffix: optional suffix, e.g., the hash of the preprocessing configuration
+        :return: path prefix of the cached arrays
+        """
+        return os.path.join(self.cache_dir, dataset + "_" + split + ("_" + suffix if suffix else ""))
+
+    @staticmethod
+    def is_cached(prefix: str, fingerprint: str, array: str = "_samples.npy") -> bool:
+        """
+        Checks whether the arrays with the specified prefix are cached and up-to-date.
+
+        :param prefix: path prefix of the cached arrays
+        :param fingerprint: fingerprint of the source file
+        :param array: suffix of the array that has to exist
+        :return: whether the cache entry is valid
+        """
+        if not os.path.isfile(prefix + array) or not os.path.isfile(prefix + ".fingerprint"):
+            return False
+        with open(prefix + ".fingerprint", "r") as f:
+            return f.read() == fingerprint
+
+    @staticmethod
+    def write(prefix: str, fingerprint: str, labels: np.ndarray, samples: np.ndarray) -> None:
+        """
+        Writes the specified arrays to the cache.
+
+        :param prefix: path prefix of the cached arrays
+        :param fingerprint: fingerprint of the source file
+        :param labels: labels to be cached
+        :param samples: samples to be cached
+        """
+        np.save(prefix + "_labels.npy", np.asarray(labels, dtype=np.int64))
+        np.save(prefix + "_samples.npy", np.ascontiguousarray(samples, dtype=np.float32))
+        # written last - marks the entry as complete
+        with open(prefix + ".fingerprint", "w") as f:
+            f.write(fingerprint)
+
+    @staticmethod
+    def read(prefix: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Reads the cached arrays (memory-mapped).
+
+        :param prefix: path prefix of the cached arrays
+        :return: (labels, samples)
+        """
+        return np.load(prefix + "_labels.npy", mmap_mode="r"), np.load(prefix + "_samples.npy", mmap_mode="r")
+
+    def load(self, dataset: str, split: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Loads the specified dataset split - the TSV file is only parsed if it isn't cached yet.
+
+        :param dataset: name of the dataset, e.g., 'Mallat'
+        :param split: dataset split, e.g., 'TRAIN' or 'TEST'
+        :return: (labels, samples) as memory-mapped arrays, shapes (n,) and (n, len)
+        """
+        prefix = self.cache_prefix(dataset, split)
+        fingerprint = self.fingerprint(dataset, split)
+        if not self.is_cached(prefix, fingerprint):
+            # dataframe containing all signals from the dataset + labels in col 0
+            df = pd.read_csv(self.tsv_path(dataset, split), delimiter='\t', header=None, na_values=['-∞', '∞'])
+            self.write(prefix, fingerprint, df.iloc[:, 0].values, df.iloc[:, 1:].values)
+        return self.read(prefix)
+
+    def load_preprocessed(
+            self, dataset: str, split: str, target_len: int, znorm: bool
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Loads the specified dataset split resampled to the target length (and optionally z-normalized).
+        The preprocessed arrays are cached as well, keyed by the preprocessing configuration.
+
+        :param dataset: name of the dataset
+        :param split: dataset split
+        :param target_len: length the samples are resampled to
+        :param znorm: whether each sample is z-normalized individually
+        :return: (labels, samples) as memory-mapped arrays, shapes (n,) and (n, target_len)
+        """
+        labels, samples = self.load(dataset, split)
+        prefix = self.cache_prefix(dataset, split, self.preprocessing_hash(target_len, znorm))
+        fingerprint = self.fingerprint(dataset, split)
+        if not self.is_cached(prefix, fingerprint):
+            # reshape to (n_ts, sz, d)
+            processed = TimeSeriesResampler(sz=target_len).fit_transform(np.asarray(samples)[:, :, np.newaxis])
+            if znorm:
+                processed = TimeSeriesScalerMeanVariance().fit_transform(processed)
+            self.write(prefix, fingerprint, labels, processed.squeeze(-1))
+        return self.read(prefix)
+
+    def preprocessing_hash(self, target_len: int, znorm: bool) -> str:
+        """
+        Hash of the preprocessing configuration.
+
+        :param target_len: length the samples are resampled to
+        :param znorm: whether each sample is z-normalized individually
+        :return: hash of the preprocessing configuration
+        """
+        return self.hash_config({"target_len": target_len, "znorm": znorm})
+
+    def load_view(
+            self, dataset: str, split: str, binary: bool = False, zero_based: bool = False,
+            relabel: Optional[Dict[int, int]] = None, reduced: Optional[float] = None, seed: int = 42,
+            target_len: Optional[int] = None, znorm: bool = False
+    ) -> DatasetView:
+        """
+        Loads a view of the specified dataset split, e.g., the binary variant or a reduced (stratified) test set,
+        replacing the '*_BINARY.tsv' / '*_REDUCED.tsv' files. Only the labels (and sample indices) of the view are
+        cached - as overlays on the cached base samples, i.e., shareable across processes via memory mapping.
+
+        :param dataset: name of the dataset, e.g., 'Mallat'
+        :param split: dataset split, e.g., 'TEST'
+        :param binary: whether the labels are subsumed in alternating fashion (label % 2, zero-based)
+        :param zero_based: whether the labels are shifted to start at 0
+        :param relabel: mapping of the original labels to new labels (applied first)
+        :param reduced: fraction of the samples kept (stratified by the original labels), e.g., 0.2 - None: all
+        :param seed: seed of the stratified reduction
+        :param target_len: length the base samples are resampled to (None: original samples)
+        :param znorm: whether the base samples are z-normalized individually (only with target_len)
+        :return: dataset view
+        """
+        labels, samples = self.load(dataset, split) if target_len is None else self.load_preprocessed(
+            dataset, split, target_len, znorm
+        )
+        view_config = {
+            "binary": binary, "zero_based": zero_based, "reduced": reduced,
+            "relabel": None if relabel is None else sorted((int(k), int(v)) for k, v in relabel.items()),
+            "seed": seed if reduced is not None else None
+        }
+        # independent of the preprocessing - the order of the samples is preserved
+        prefix = self.cache_prefix(dataset, split, "view_" + self.hash_config(view_config))
+        fingerprint = self.fingerprint(dataset, split)
+        if not self.is_cached(prefix, fingerprint, "_labels.npy"):
+            self.write_view(prefix, fingerprint, *self.gen_view(np.asarray(labels), view_config))
+        view_labels = np.load(prefix + "_labels.npy", mmap_mode="r")
+        indices = np.load(prefix + "_indices.npy", mmap_mode="r") if reduced is not None else None
+        return DatasetView(view_labels, samples, indices)
+
+    @staticmethod
+    def gen_view(labels: np.ndarray, view_config: dict) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Generates the labels (and sample indices) of the specified view.
+
+        :param labels: original labels of the base dataset
+        :param view_config: configuration of the view (cf. 'load_view')
+        :return: (view labels, sample indices or None)
+        """
+        indices = None
+        if view_config["reduced"] is not None:
+            from sklearn.model_selection import StratifiedShuffleSplit
+            sss = StratifiedShuffleSplit(n_splits=1, test_size=view_config["reduced"], random_state=view_config["seed"])
+            (_, indices) = next(sss.split(np.zeros(len(labels)), labels))
+            labels = labels[indices]
+        if view_config["relabel"]:
+            # vectorized lookup, unmapped labels are kept
+            keys, values = np.array(view_config["relabel"]).T
+            lookup = np.searchsorted(keys, labels).clip(max=len(keys) - 1)
+            labels = np.where(keys[lookup] == labels, values[lookup], labels)
+        if view_config["binary"]:
+            labels = to_binary_labels(labels)
+        elif view_config["zero_based"]:
+            labels = to_zero_based_labels(labels)
+        return labels, indices
+
+    @staticmethod
+    def write_view(prefix: str, fingerprint: str, labels: np.ndarray, indices: Optional[np.ndarray]) -> None:
+        """
+        Writes the specified view overlay to the cache.
+
+        :param prefix: path prefix of the cached view
+        :param fingerprint: fingerprint of the source file
+        :param labels: labels of the view
+        :param indices: sample indices of the view (None: all samples)
+        """
+        if indices is not None:
+            np.save(prefix + "_indices.npy", np.asarray(indices, dtype=np.int64))
+        np.save(prefix + "_labels.npy", np.asarray(labels, dtype=np.int64))
+        # written last - marks the entry as complete
+        with open(prefix + ".fingerprint", "w") as f:
+            f.write(fingerprint)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import glob
+import json
+import os
+from collections import Counter
+from typing import List, Dict, Tuple, Optional
+
+import joblib
+import pandas as pd
+
+from saliency_kd.config import DATASETS_DIR, DATASET_CACHE_DIR, DATASET_CATALOG, UCR_SUMMARY, CLASSIFIER_PERFORMANCE
+from saliency_kd.dataset_cache import DatasetCache
+from saliency_kd.profiling import timed, count
+
+# selection criteria of 'dataset_selection.ipynb'
+MIN_CLASSES = 6
+MAX_CLASSES = 16
+MIN_LENGTH = 100
+MAX_LENGTH = 3000
+MIN_ACCURACY = 0.6
+MIN_SAMPLES_PER_TEST_CLASS = 100
+EXCLUDED_TYPES = ("Image",)
+
+
+def scan_tsv(path: str) -> Dict:
+    """
+    Computes the label histogram and length statistics of the specified UCR dataset file by streaming it line by
+    line - only the label column is parsed, the length is derived from the number of fields (minus the 'NaN' padding
+    of variable-length datasets).
+
+    :param path: TSV file (label in column 0)
+    :return: {'samples': ..., 'labels': {label: count}, 'min_len': ..., 'max_len': ..., 'mean_len': ...}
+    """
+    labels = Counter()
+    min_len, max_len, total_len = None, 0, 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            labels[line[:line.find(b"\t")]] += 1
+            length = line.count(b"\t") - line.count(b"NaN")
+            min_len = length if min_len is None else min(min_len, length)
+            max_len = max(max_len, length)
+            total_len += length
+    n = sum(labels.values())
+    return {
+        "samples": n,
+        # e.g., '1', '-1' or '1.0000000e+00'
+        "labels": {str(int(float(label))): cnt for label, cnt in sorted(labels.items(), key=lambda x: float(x[0]))},
+        "min_len": min_len or 0,
+        "max_len": max_len,
+        "mean_len": total_len / n if n > 0 else 0.
+    }
+
+
+class DatasetCatalog:
+    """
+    Catalog of the UCR datasets: the label histograms and length statistics of the local dataset files are computed
+    once (in parallel, streaming only the label column) and cached by file fingerprint; joined with the UCR summary
+    and the classifier accuracies, the dataset selection is answered from an in-memory index.
+    """
+
+    def __init__(
+            self, datasets_dir: str = DATASETS_DIR, catalog_file: str = DATASET_CATALOG, ucr_summary: str = UCR_SUMMARY,
+            classifier_performance: str = CLASSIFIER_PERFORMANCE
+    ) -> None:
+        """
+        Initializes the dataset catalog.
+
+        :param datasets_dir: directory containing the datasets ('<name>/<name>_<split>.tsv')
+        :param catalog_file: file the per-file statistics are cached in (.json)
+        :param ucr_summary: UCR archive summary (.csv, see https://www.cs.ucr.edu/~eamonn/time_series_data_2018/)
+        :param classifier_performance: classifier accuracies per UCR dataset (.csv)
+        """
+        self.dataset_cache = DatasetCache(datasets_dir, os.path.dirname(catalog_file) or DATASET_CACHE_DIR)
+        self.catalog_file = catalog_file
+        self.ucr_summary = ucr_summary
+        self.classifier_performance = classifier_performance
+        # TSV path -> {'fingerprint': ..., 'dataset': ..., 'split': ..., statistics}
+        self.entries: Dict[str, Dict] = {}
+        if os.path.isfile(catalog_file):
+            with open(catalog_file, "r") as f:
+                self.entries = json.load(f)
+        self.index: Optional[pd.DataFrame] = None
+
+    def dataset_files(self) -> List[Tuple[str, str]]:
+        """
+        Lists the local dataset files.
+
+        :return: (dataset, split) pairs, e.g., ('Mallat', 'TRAIN_BINARY')
+        """
+        files = []
+        for path in sorted(glob.glob(os.path.join(self.dataset_cache.datasets_dir, "*", "*.tsv"))):
+            dataset = os.path.basename(os.path.dirname(path))
+            name = os.path.splitext(os.path.basename(path))[0]
+            if name.startswith(dataset + "_"):
+                files.append((dataset, name[len(dataset) + 1:]))
+        return files
+
+    @timed("dataset_scan")
+    def scan(self, n_jobs: int = -1) -> int:
+        """
+        Scans the local dataset files whose statistics aren't cached (or outdated) in parallel and updates the catalog.
+
+        :param n_jobs: number of parallel jobs, one file each (-1: all cores)
+        :return: number of scanned files
+        """
+        stale = []
+        for dataset, split in self.dataset_files():
+            path = self.dataset_cache.tsv_path(dataset, split)
+            fingerprint = self.dataset_cache.fingerprint(dataset, split)
+            if self.entries.get(path, {}).get("fingerprint") != fingerprint:
+                stale.append((dataset, split, path, fingerprint))
+        if len(stale) > 0:
+            stats = joblib.Parallel(n_jobs=min(n_jobs, len(stale)) if n_jobs > 0 else n_jobs)(
+                joblib.delayed(scan_tsv)(path) for _, _, path, _ in stale
+            )
+            for (dataset, split, path, fingerprint), file_stats in zip(stale, stats):
+                self.entries[path] = {"fingerprint": fingerprint, "dataset": dataset, "split": split, **file_stats}
+            os.makedirs(os.path.dirname(self.catalog_file) or ".", exist_ok=True)
+            with open(self.catalog_file, "w") as f:
+                json.dump(self.entries, f, indent=1)
+            self.index = None
+        count("scanned_dataset_files", len(stale))
+        return len(stale)
+
+    def file_stats(self, split: str = "TEST") -> pd.DataFrame:
+        """
+        Statistics of the cached dataset files of the specified split.
+
+        :param split: dataset split, e.g., 'TEST'
+        :return: statistics per dataset (classes, samples, min / max class size, min / max / mean length)
+        """
+        rows = [
+            {
+                "dataset": entry["dataset"], "classes": len(entry["labels"]), "samples": entry["samples"],
+                "min_class_size": min(entry["labels"].values(), default=0),
+                "max_class_size": max(entry["labels"].values(), default=0),
+                "min_len": entry["min_len"], "max_len": entry["max_len"], "mean_len": entry["mean_len"]
+            } for entry in self.entries.values() if entry["split"] == split
+        ]
+        columns = [
+            "dataset", "classes", "samples", "min_class_size", "max_class_size", "min_len", "max_len", "mean_len"
+        ]
+        return pd.DataFrame(rows, columns=columns).set_index("dataset").add_prefix(split.lower() + "_")
+
+    def label_histogram(self, dataset: str, split: str = "TEST") -> Dict[int, int]:
+        """
+        Label histogram of the specified dataset split (from the catalog).
+
+        :param dataset: name of the dataset
+        :param split: dataset split
+        :return: number of samples per label
+        """
+        entry = self.entries[self.dataset_cache.tsv_path(dataset, split)]
+        return {int(label): cnt for label, cnt in entry["labels"].items()}
+
+    @timed("dataset_index")
+    def build_index(self, split: str = "TEST") -> pd.DataFrame:
+        """
+        Builds the dataset index, i.e., joins the UCR summary, the best classifier accuracy per dataset and the
+        statistics of the local dataset files (of the specified split).
+
+        :param split: dataset split the class sizes are taken from
+        :return: index, one row per UCR dataset
+        """
+        summary = pd.read_csv(self.ucr_summary, encoding="utf-8-sig")
+        summary.columns = [col.strip() for col in summary.columns]
+        summary["Length_num"] = pd.to_numeric(summary["Length"], errors="coerce")
+        summary = summary.set_index("Name")
+        accuracies = pd.read_csv(self.classifier_performance)
+        summary["max_accuracy"] = accuracies.groupby("dataset_name")["accuracy"].max()
+        self.index = summary.join(self.file_stats(split))
+        return self.index
+
+    @timed("dataset_selection")
+    def select(
+            self, min_classes: int = MIN_CLASSES, max_classes: int = MAX_CLASSES, min_length: int = MIN_LENGTH,
+            max_length: int = MAX_LENGTH, min_accuracy: float = MIN_ACCURACY,
+            min_samples_per_class: Optional[int] = MIN_SAMPLES_PER_TEST_CLASS,
+            excluded_types: Tuple[str, ...] = EXCLUDED_TYPES, split: str = "TEST"
+    ) -> List[str]:
+        """
+        Selects the UCR datasets matching the criteria of 'dataset_selection.ipynb' (vectorized on the index). The
+        class sizes are only known for the locally available dataset files, i.e., the other datasets are excluded
+        if a minimum class size is required.
+
+        :param min_classes: min number of classes
+        :param max_classes: max number of classes
+        :param min_length: min length of the time series
+        :param max_length: max length of the time series
+        :param min_accuracy: min accuracy of (at least) one of the reference classifiers
+        :param min_samples_per_class: min number of samples of each class (in the specified split) - None: no filter
+        :param excluded_types: excluded dataset types, e.g., 'Image'
+        :param split: dataset split the class sizes are taken from
+        :return: names of the selected datasets
+        """
+        index = self.index if self.index is not None else self.build_index(split)
+        mask = (
+            index["Class"].between(min_classes, max_classes) & index["Length_num"].between(min_length, max_length)
+            & ~index["Type"].isin(excluded_types) & (index["max_accuracy"] >= min_accuracy)
+        )
+        if min_samples_per_class is not None:
+            mask &= index[split.lower() + "_min_class_size"] >= min_samples_per_class
+        return list(index.index[mask])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='UCR dataset catalog (cached label histograms, dataset selection)')
+    parser.add_argument('--datasets', type=str, default=DATASETS_DIR, help='directory containing the datasets')
+    parser.add_argument('--catalog', type=str, default=DATASET_CATALOG, help='catalog cache file (.json)')
+    parser.add_argument('--split', type=str, default="TEST", help='dataset split the class sizes are taken from')
+    parser.add_argument('--min-classes', type=int, default=MIN_CLASSES, help='min number of classes')
+    parser.add_argument('--max-classes', type=int, default=MAX_CLASSES, help='max number of classes')
+    parser.add_argument('--min-length', type=int, default=MIN_LENGTH, help='min length of the time series')
+    parser.add_argument('--max-length', type=int, default=MAX_LENGTH, help='max length of the time series')
+    parser.add_argument('--min-accuracy', type=float, default=MIN_ACCURACY, help='min reference classifier accuracy')
+    parser.add_argument(
+        '--min-samples-per-class', type=int, default=MIN_SAMPLES_PER_TEST_CLASS,
+        help='min number of samples of each class in the split (0: no filter, also includes non-local datasets)'
+    )
+    parser.add_argument('--n-jobs', type=int, default=-1, help='number of parallel scan jobs (-1: all cores)')
+    parser.add_argument('--stats', action='store_true', help='print the statistics of the local dataset files')
+    args = parser.parse_args()
+
+    catalog = DatasetCatalog(args.datasets, args.catalog)
+    print("scanned files:", catalog.scan(args.n_jobs))
+    if args.stats:
+        with pd.option_context("display.width", 200, "display.float_format", "{:.1f}".format):
+            print(catalog.file_stats(args.split).to_string())
+    selected = catalog.select(
+        args.min_classes, args.max_classes, args.min_length, args.max_length, args.min_accuracy,
+        args.min_samples_per_class or None, split=args.split
+    )
+    print("selected datasets:", selected)
@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+from functools import lru_cache
+from typing import Tuple, Union, Optional, Dict
+
+import numpy as np
+from numba import njit
+from numpy.lib.stride_tricks import sliding_window_view
+from tslearn.metrics import dtw_path, dtw_path_from_metric
+
+from saliency_kd.profiling import timed
+
+GLOBAL_CONSTRAINTS = [None, "sakoe_chiba", "itakura"]
+DTW_METRIC = "euclidean"  # local cost metric, as 'metrics.ipynb'
+DTW_WINDOW = 0.1  # Sakoe-Chiba band as fraction of the series length
+ITAKURA_MAX_SLOPE = 2.
+
+
+def to_time_series(ts: np.ndarray) -> np.ndarray:
+    """
+    Brings the specified (univariate or multivariate) time series into the (sz, d) layout used by tslearn.
+
+    :param ts: time series of shape (sz,) or (sz, d)
+    :return: time series of shape (sz, d)
+    """
+    ts = np.asarray(ts, dtype=np.float64)
+    return ts[:, np.newaxis] if ts.ndim == 1 else ts
+
+
+def to_time_series_dataset(dataset: np.ndarray) -> np.ndarray:
+    """
+    Brings the specified set of (univariate or multivariate) time series into the (n_ts, sz, d) layout.
+
+    :param dataset: time series of shape (n_ts, sz) or (n_ts, sz, d)
+    :return: time series of shape (n_ts, sz, d)
+    """
+    dataset = np.asarray(dataset, dtype=np.float64)
+    return dataset[:, :, np.newaxis] if dataset.ndim == 2 else dataset
+
+
+def sakoe_chiba_radius(sz: int, window: Union[int, float]) -> int:
+    """
+    Determines the Sakoe-Chiba radius for the specified window, which is either given as fraction of the series
+    length (float in [0, 1]) or as absolute number of time steps (int).
+
+    :param sz: length of the time series
+    :param window: window size (fraction of the series length or absolute number of time steps)
+    :return: Sakoe-Chiba radius (number of time steps)
+    """
+    if isinstance(window, float):
+        assert 0. <= window <= 1.
+        return max(int(round(window * sz)), 1)
+    return max(int(window), 1)
+
+
+@lru_cache(maxsize=64)
+def band_limits(
+        sz1: int, sz2: int, constraint: Optional[str], radius: Optional[int], max_slope: Optional[float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Determines the admissible columns of each row of the (sz1, sz2) alignment matrix for the specified global
+    constraint - the same region as 'tslearn.metrics.compute_mask' (vectorized, i.e., without its JIT compilation),
+    the admissible columns of a row are contiguous. An Itakura parallelogram that admits no path for the lengths
+    raises a ValueError.
+
+    :param sz1: length of the first time series
+    :param sz2: length of the second time series
+    :param constraint: global constraint, i.e., None, 'sakoe_chiba' or 'itakura'
+    :param radius: Sakoe-Chiba radius
+    :param max_slope: max slope of the Itakura parallelogram
+    :return: (first admissible column, last admissible column + 1) of each row, shapes (sz1,)
+    """
+    if constraint is None:
+        return np.zeros(sz1, dtype=np.int64), np.full(sz1, sz2, dtype=np.int64)
+    if constraint == "sakoe_chiba":
+        # band around the diagonal, widened by the length difference (along the longer series)
+        short, long = min(sz1, sz2), max(sz1, sz2)
+        idx = np.arange(short)
+        lower, upper = np.maximum(0, idx - radius), np.minimum(long, idx + long - short + radius) + 1
+        if sz1 <= sz2:
+            return lower, np.minimum(upper, sz2)
+        # band given per column - transposed to rows
+        rows = np.arange(sz1)[:, np.newaxis]
+        mask = (rows >= lower) & (rows < upper)
+    else:
+        # Itakura parallelogram given per column
+        cols = np.arange(sz2)
+        slope_min, slope_max = sz1 / sz2 / max_slope, max_slope * sz1 / sz2
+        lower = np.ceil(np.maximum(
+            np.round(slope_min * cols, 2), np.round((sz1 - 1) - slope_max * (sz2 - 1) + slope_max * cols, 2)
+        ))
+        upper = np.floor(np.minimum(
+            np.round(slope_max * cols, 2), np.round((sz1 - 1) - slope_min * (sz2 - 1) + slope_min * cols, 2)
+        ) + 1)
+        rows = np.arange(sz1)[:, np.newaxis]
+        mask = (rows >= lower) & (rows < upper)
+        if not (mask.any(axis=1).all() and mask.any(axis=0).all()):
+            # rows / columns without admissible cells, e.g., very different lengths (tslearn: RuntimeWarning)
+            raise ValueError(
+                f"'itakura_max_slope' constraint ({max_slope}) is unfeasible (no admissible path) for the series "
+                f"lengths {sz1} and {sz2}"
+            )
+    first = np.argmax(mask, axis=1)
+    last = sz2 - np.argmax(mask[:, ::-1], axis=1)
+    return first, last
+
+
+@njit(cache=True)
+def banded_dtw(
+        s1: np.ndarray, s2: np.ndarray, lower: np.ndarray, upper: np.ndarray, squared: bool, threshold: float
+) -> float:
+    """
+    Computes the DTW distance (accumulated local costs, no path) within the admissible band - only the band is
+    visited, i.e., O(sz * window) - and abandons early as soon as a whole row exceeds the threshold.
+
+    :param s1: first time series, shape (sz1, d)
+    :param s2: second time series, shape (sz2, d)
+    :param lower: first admissible column of each row, shape (sz1,)
+    :param upper: last admissible column + 1 of each row, shape (sz1,)
+    :param squared: whether the local costs are squared Euclidean distances (standard DTW: sqrt of the sum)
+    :param threshold: abandoning threshold (accumulated costs, i.e., squared for standard DTW)
+    :return: DTW distance (inf if abandoned)
+    """
+    sz2 = s2.shape[0]
+    # prev[j + 1]: accumulated costs of (i - 1, j), prev[0]: virtual origin
+    prev = np.full(sz2 + 1, np.inf)
+    curr = np.full(sz2 + 1, np.inf)
+    prev[0] = 0.
+    for i in range(s1.shape[0]):
+        curr[:] = np.inf
+        row_min = np.inf
+        for j in range(lower[i], upper[i]):
+            cost = 0.
+            for k in range(s1.shape[1]):
+                cost += (s1[i, k] - s2[j, k]) ** 2
+            if not squared:
+                cost = np.sqrt(cost)
+            acc = cost + min(prev[j], prev[j + 1], curr[j])
+            curr[j + 1] = acc
+            row_min = min(row_min, acc)
+        if row_min > threshold:
+            return np.inf
+        prev, curr = curr, prev
+        prev[0] = np.inf
+    return np.sqrt(prev[sz2]) if squared else prev[sz2]
+
+
+class DTWConfig:
+    """
+    DTW configuration honored by the clustering, medoid and metric functions (global default: 'get_dtw_config'):
+    global constraint (Sakoe-Chiba band / Itakura parallelogram), local cost metric, optional early-abandon threshold
+    and distance-only (no path) mode. The default is the unconstrained DTW of 'metrics.ipynb'.
+    """
+
+    def __init__(
+            self, constraint: Optional[str] = None, window: Union[int, float] = DTW_WINDOW,
+            itakura_max_slope: float = ITAKURA_MAX_SLOPE, metric: str = DTW_METRIC,
+            early_abandon: Optional[float] = None, path: bool = False
+    ) -> None:
+        """
+        Initializes the DTW configuration.
+
+        :param constraint: global constraint, i.e., None (unconstrained), 'sakoe_chiba' or 'itakura'
+        :param window: Sakoe-Chiba window (fraction of the series length or absolute number of time steps)
+        :param itakura_max_slope: max slope of the Itakura parallelogram
+        :param metric: local cost metric - 'euclidean' (accumulated Euclidean distances, as 'metrics.ipynb'),
+                       'sqeuclidean' (standard DTW, as the DBA k-means) or any scipy metric (path mode only)
+        :param early_abandon: distances exceeding the threshold are abandoned (reported as inf)
+        :param path: whether the distances are computed via the optimal path (tslearn, reference) instead of the
+                     distance-only band computation
+        """
+        assert constraint in GLOBAL_CONSTRAINTS
+        self.constraint = constraint
+        self.window = window
+        self.itakura_max_slope = itakura_max_slope
+        self.metric = metric
+        self.early_abandon = early_abandon
+        # the band computation supports the (squared) Euclidean costs only
+        self.path = path or metric not in ["euclidean", "sqeuclidean"]
+
+    def __repr__(self) -> str:
+        return "DTWConfig(" + ", ".join(f"{key}={val!r}" for key, val in self.to_dict().items()) + ")"
+
+    def to_dict(self) -> Dict:
+        """
+        Configuration as dictionary, e.g., for reports.
+
+        :return: configuration
+        """
+        return {
+            "constraint": self.constraint, "window": self.window, "itakura_max_slope": self.itakura_max_slope,
+            "metric": self.metric, "early_abandon": self.early_abandon, "path": self.path
+        }
+
+    def radius(self, sz: int) -> int:
+        """
+        Sakoe-Chiba radius for series of the specified length - the whole series if not banded (e.g., for
+        LB_Keogh envelopes, which remain valid, but loose).
+
+        :param sz: length of the time series
+        :return: radius (number of time steps)
+        """
+        return sakoe_chiba_radius(sz, self.window) if self.constraint == "sakoe_chiba" else sz
+
+    def tslearn_params(self, sz: int) -> Dict:
+        """
+        Global constraint parameters of the tslearn DTW functions, e.g., 'TimeSeriesKMeans(metric_params=...)' or
+        'cdist_dtw(**...)'.
+
+        :param sz: length of the time series
+        :return: keyword arguments
+        """
+        if self.constraint == "sakoe_chiba":
+            return {"global_constraint": "sakoe_chiba", "sakoe_chiba_radius": self.radius(sz)}
+        if self.constraint == "itakura":
+            return {"global_constraint": "itakura", "itakura_max_slope": self.itakura_max_slope}
+        return {}
+
+    def distance(self, s1: np.ndarray, s2: np.ndarray, threshold: float = np.inf) -> float:
+        """
+        Computes the DTW distance between the specified time series.
+
+        :param s1: first time series, shape (sz1, d)
+        :param s2: second time series, shape (sz2, d)
+        :param threshold: early-abandon threshold of this computation (combined with the configured one)
+        :return: DTW distance (inf if abandoned)
+        """
+        if self.early_abandon is not None:
+            threshold = min(threshold, self.early_abandon)
+        if self.path:
+            if self.constraint == "itakura":
+                # unfeasible parallelogram - ValueError instead of the RuntimeWarning of tslearn
+                band_limits(len(s1), len(s2), self.constraint, None, self.itakura_max_slope)
+            if self.metric == "sqeuclidean":
+                dist = dtw_path(s1, s2, **self.tslearn_params(len(s1)))[1]
+            else:
+                dist = dtw_path_from_metric(s1, s2, metric=self.metric, **self.tslearn_params(len(s1)))[1]
+            return dist if dist <= threshold else np.inf
+        squared = self.metric == "sqeuclidean"
+        lower, upper = band_limits(
+            len(s1), len(s2), self.constraint, self.radius(len(s1)) if self.constraint == "sakoe_chiba" else None,
+            self.itakura_max_slope if self.constraint == "itakura" else None
+        )
+        return banded_dtw(s1, s2, lower, upper, squared, threshold ** 2 if squared else threshold)
+
+
+_dtw_config = DTWConfig()
+
+
+def get_dtw_config() -> DTWConfig:
+    """
+    Returns the global DTW configuration.
+
+    :return: global DTW configuration
+    """
+    return _dtw_config
+
+
+def configure_dtw(dtw_config: Optional[DTWConfig] = None, **kwargs) -> DTWConfig:
+    """
+    Sets the global DTW configuration - either the specified one or one created from the keyword arguments (see
+    'DTWConfig'). Parallel workers (joblib) don't share the global configuration, i.e., it is passed explicitly.
+
+    :param dtw_config: DTW configuration
+    :param kwargs: arguments of 'DTWConfig', e.g., constraint="sakoe_chiba", window=0.1
+    :return: global DTW configuration
+    """
+    global _dtw_config
+    _dtw_config = DTWConfig(**kwargs) if dtw_config is None else dtw_config
+    return _dtw_config
+
+
+def keogh_envelope(dataset: np.ndarray, radius: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the LB_Keogh envelopes (lower, upper) of the specified time series.
+
+    :param dataset: time series of shape (n_ts, sz, d)
+    :param radius: Sakoe-Chiba radius the envelopes are computed for
+    :return: (lower envelopes, upper envelopes), each of shape (n_ts, sz, d)
+    """
+    padded = np.pad(dataset, ((0, 0), (radius, radius), (0, 0)), mode="edge")
+    # (n_ts, sz, d, 2 * radius + 1)
+    windows = sliding_window_view(padded, 2 * radius + 1, axis=1)
+    return windows.min(axis=-1), windows.max(axis=-1)
+
+
+def lb_keogh(query: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """
+    Computes the LB_Keogh lower bounds of the (dependent) DTW distance between the query and each enveloped
+    candidate - vectorized over all candidates.
+
+    :param query: query time series of shape (sz, d)
+    :param lower: lower envelopes of the candidates, shape (n_ts, sz, d)
+    :param upper: upper envelopes of the candidates, shape (n_ts, sz, d)
+    :return: lower bounds, shape (n_ts,)
+    """
+    above = np.clip(query - upper, 0., None)
+    below = np.clip(lower - query, 0., None)
+    return np.sqrt(np.sum(above ** 2 + below ** 2, axis=(1, 2)))
+
+
+@timed("dtw_assignment")
+def nearest_centroid(
+        query: np.ndarray, centroids: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+        dtw_config: Optional[DTWConfig] = None
+) -> Tuple[int, float, int]:
+    """
+    Determines the centroid closest to the query w.r.t. the configured DTW distance.
+    Candidates are visited in the order of their LB_Keogh bounds; the exact DTW computation is skipped for every
+    candidate whose lower bound already exceeds the best distance found so far and abandoned as soon as it does.
+    If the configured 'early_abandon' threshold abandons every candidate, the nearest centroid is determined by the
+    exact (not abandoned) DTW distances instead.
+
+    :param query: query time series of shape (sz, d)
+    :param centroids: centroids of shape (k, sz, d)
+    :param lower: lower envelopes of the centroids (radius: 'DTWConfig.radius'), shape (k, sz, d)
+    :param upper: upper envelopes of the centroids (radius: 'DTWConfig.radius'), shape (k, sz, d)
+    :param dtw_config: DTW configuration (global configuration if not specified)
+    :return: (index of the nearest centroid, DTW distance to it, number of pruned candidates)
+    """
+    dtw_config = get_dtw_config() if dtw_config is None else dtw_config
+    bounds = lb_keogh(query, lower, upper)
+    best_idx, best_dist = -1, np.inf
+    for cnt, idx in enumerate(np.argsort(bounds)):
+        if bounds[idx] >= best_dist:
+            # bounds are sorted - none of the remaining candidates can be closer
+            return best_idx, best_dist, len(bounds) - cnt
+        dist = dtw_config.distance(query, centroids[idx], best_dist)
+        if dist < best_dist:
+            best_idx, best_dist = int(idx), dist
+    if best_idx == -1:
+        # every candidate exceeded the early abandoning threshold
+        exact_config = DTWConfig(**{**dtw_config.to_dict(), "early_abandon": None})
+        dists = [exact_config.distance(query, centroid) for centroid in centroids]
+        best_idx = int(np.argmin(dists))
+        best_dist = dists[best_idx]
+    return best_idx, best_dist, 0
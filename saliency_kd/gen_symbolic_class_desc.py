@@ -3,13 +3,20 @@
 # @author Tim Bohne
 
 import argparse
-from typing import List, Dict
+import time
+from typing import List, Dict, Optional, TYPE_CHECKING
 
-import numpy as np
-from openai import OpenAI
+from saliency_kd.llm_client import create_client, record_response
+from saliency_kd.logger import (
+    get_logger, configure_logging, log_metrics, metrics_enabled, json_size, LOG_LEVELS, SEPARATOR
+)
+from saliency_kd.profiling import timed, count, cprofile, summary_table, write_report
 
-from saliency_kd.knowledge_graph_query_tool import KnowledgeGraphQueryTool
-from saliency_kd.secret_config import OPENAI_API_KEY
+if TYPE_CHECKING:
+    import numpy as np
+    from openai import OpenAI
+
+logger = get_logger("gen_symbolic_class_desc")
 
 INIT_PROMPT = "There is a number of signals:"
 MODE_PROMPT_TS = ("\n\nIn the following separated lists of values, describe each list, i.e., signal, in a similar"
@@ -23,13 +30,23 @@ PROMPT_APPENDIX = ("\n\nDescribe them at roughly the same granularity as the exa
 
 class LLMSymbolicDescGen:
 
-    def __init__(self) -> None:
+    def __init__(
+            self, client: Optional["OpenAI"] = None, record: Optional[str] = None, dataset: Optional[str] = None
+    ) -> None:
         """
         Initializes the symbolic description generator.
+
+        :param client: OpenAI client (see 'llm_client.create_client') - OpenAI's API if not specified
+        :param record: file the responses are recorded to (replayable by the mock server)
+        :param dataset: dataset the KG queries are scoped to (named graph), e.g., 'Mallat'
         """
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
-        self.kgqt = KnowledgeGraphQueryTool()
+        self.client = client if client is not None else create_client()
+        self.record = record
+        # heavy dependencies (KG access, OpenAI SDK) are loaded on first use, i.e., not for '--help'
+        from saliency_kd.knowledge_graph_query_tool import KnowledgeGraphQueryTool
+        self.kgqt = KnowledgeGraphQueryTool(dataset=dataset)
 
+    @timed("llm_request")
     def prompt_gpt(self, model: str, input_prompt: List[Dict]) -> str:
         """
         Prompt GPT model.
@@ -38,27 +55,34 @@ class LLMSymbolicDescGen:
         :param input_prompt: input prompt(s)
         :return: parsed GPT response string
         """
+        start = time.perf_counter()
         response = self.client.responses.create(
             # "o3-2025-04-16" (best, but expensive), "gpt-4o" (works), "gpt-4o-mini", "gpt-4.1-2025-04-14", "gpt-4.1"
             model=model,
             # max_tokens=300,  # controlling costs (meant for responses)
             input=input_prompt
         )
-        print("response..")
-        print(response.id)
-        print(response.model)
-        print(response.output_text)
-        print(response.temperature)
-        print(response.max_output_tokens)
-        print(response.usage)
-        # print(response.usage.input_tokens)
-        # print(response.usage.output_tokens)
-        # print(response.usage.total_tokens)
+        if self.record is not None:
+            record_response(response, self.record)
+        count("llm_requests")
+        count("input_tokens", response.usage.input_tokens)
+        count("output_tokens", response.usage.output_tokens)
+        logger.info("response..\n%s", response.output_text)
+        logger.debug(
+            "id: %s, model: %s, temperature: %s, max output tokens: %s, usage: %s", response.id, response.model,
+            response.temperature, response.max_output_tokens, response.usage
+        )
+        if metrics_enabled():
+            log_metrics(
+                "llm_response", model=response.model, latency_s=time.perf_counter() - start,
+                input_tokens=response.usage.input_tokens, output_tokens=response.usage.output_tokens,
+                payload_bytes=json_size(input_prompt)
+            )
 
         return response.output_text.split("\n")[-1]
 
     @staticmethod
-    def get_medoids_ts(llm_input: str) -> np.ndarray:
+    def get_medoids_ts(llm_input: str) -> "np.ndarray":
         """
         Retrieves the medoids (time series) to generate textual descriptions for.
 
@@ -66,8 +90,10 @@ class LLMSymbolicDescGen:
         :return: numpy array of medoids
         """
         assert llm_input.endswith(".npy")
+        import numpy as np
         return np.load(llm_input)
 
+    @timed("prompt_building")
     def gen_prompt_ts(self, llm_input: str) -> List[Dict]:
         """
         Generates prompt for textual description of time series signals.
@@ -79,9 +105,7 @@ class LLMSymbolicDescGen:
         medoid_lst = [" ".join([str(round(v, 2)) for v in c.tolist()]) for i, c in enumerate(arr)]
         str_medoids = "\n\n".join(f"signal {i + 1}:\n{c}" for i, c in enumerate(medoid_lst))
         prompt = INIT_PROMPT + MODE_PROMPT_TS + SYMBOLIC_EXAMPLE + PROMPT_APPENDIX + "\n\n" + str_medoids
-        print("-----------------------------------------------------")
-        print("prompt..\n", prompt)
-        print("-----------------------------------------------------")
+        logger.debug("%s\nprompt..\n%s\n%s", SEPARATOR, prompt, SEPARATOR)
         return [
             {
                 "role": "user",
@@ -98,13 +122,34 @@ class LLMSymbolicDescGen:
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='generate textual class descriptions with LLM')
     parser.add_argument('--input', type=str, required=True, help='medoids for LLM description')
+    parser.add_argument(
+        '--dataset', type=str, default=None, help='dataset (named graph in the KG) the medoids stem from'
+    )
     parser.add_argument(
         "--model",
         choices=["o3-2025-04-16", "gpt-4o", "gpt-4.1", "gpt-4.1-2025-04-14", "gpt-4o-mini"],
         default="o3-2025-04-16",
         help="choose LLM model between o3-2025-04-16 (default), gpt-4o, gpt-4.1, gpt-4.1-2025-04-14 and gpt-4o-mini"
     )
+    parser.add_argument(
+        '--log-level', choices=LOG_LEVELS, default="INFO",
+        help='INFO logs the responses, DEBUG additionally the prompts'
+    )
+    parser.add_argument('--metrics', type=str, default=None, help='file the metrics are appended to (JSON lines)')
+    parser.add_argument(
+        '--base-url', type=str, default=None, help='base URL of the Responses API, e.g., the local mock server'
+    )
+    parser.add_argument('--record', type=str, default=None, help='file the responses are recorded to (.jsonl)')
+    parser.add_argument(
+        '--profile', type=str, default=None, help='print the per-stage summary and write the profile report (JSON)'
+    )
+    parser.add_argument('--cprofile', type=str, default=None, help='dump cProfile statistics to the file (.prof)')
     args = parser.parse_args()
-    llm_sym_desc_gen = LLMSymbolicDescGen()
-    output = llm_sym_desc_gen.prompt_gpt(args.model, llm_sym_desc_gen.gen_prompt_ts(args.input))
+    configure_logging(args.log_level, args.metrics)
+    llm_sym_desc_gen = LLMSymbolicDescGen(create_client(args.base_url), args.record, args.dataset)
+    with cprofile(args.cprofile):
+        output = llm_sym_desc_gen.prompt_gpt(args.model, llm_sym_desc_gen.gen_prompt_ts(args.input))
+    if args.profile is not None:
+        print(summary_table())
+        write_report(args.profile)
     print("output:", output)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import base64
+import hashlib
+import io
+import os
+from typing import Dict, Tuple, TYPE_CHECKING
+
+from saliency_kd.config import IMAGE_CACHE_DIR
+from saliency_kd.logger import get_logger, log_metrics
+from saliency_kd.profiling import timed, count
+
+if TYPE_CHECKING:
+    import numpy as np
+    from PIL import Image
+
+logger = get_logger("image_payload")
+
+IMG_MAX_SIZE = 1024
+IMG_COLORS = 16
+IMG_FORMATS = {"png": "image/png", "webp": "image/webp"}
+WEBP_QUALITY = 80
+RENDER_DPI = 100
+
+
+class ImagePayloadBuilder:
+    """
+    Prepares the images of the LLM prompts, i.e., renders (centroids) or trims and downscales the plots to the target
+    resolution, encodes them as palette-quantized PNG or WebP and caches the encoded payload by content hash.
+    """
+
+    def __init__(
+            self, max_size: int = IMG_MAX_SIZE, colors: int = IMG_COLORS, img_format: str = "png",
+            cache_dir: str = IMAGE_CACHE_DIR
+    ) -> None:
+        """
+        Initializes the image payload builder.
+
+        :param max_size: max width / height of the encoded image in pixels
+        :param colors: number of palette colors (PNG) - the plots only consist of a few colors
+        :param img_format: 'png' (palette-quantized) or 'webp' (lossy)
+        :param cache_dir: directory the encoded payloads are cached in (by content hash)
+        """
+        assert img_format in IMG_FORMATS
+        self.max_size = max_size
+        self.colors = colors
+        self.img_format = img_format
+        self.cache_dir = cache_dir
+        # (path, modification time, size) -> data URL, i.e., repeated requests don't even read the file
+        self.memory_cache: Dict[Tuple[str, int, int], str] = {}
+
+    @staticmethod
+    def render_centroids(centroids: "np.ndarray") -> bytes:
+        """
+        Renders the centroids side by side (as 'centroids4llm.png' in the notebook, but without the blank margin).
+
+        :param centroids: centroid time series, shape (n, len) or (n, len, 1)
+        :return: PNG image
+        """
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        fig, axes = plt.subplots(1, len(centroids), figsize=(5 * len(centroids), 8 / 3), squeeze=False)
+        for idx, (ax, centroid) in enumerate(zip(axes[0], centroids)):
+            ax.plot(centroid.ravel(), "r-")
+            ax.text(0.55, 0.85, "centroid %d" % idx, transform=ax.transAxes)
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=RENDER_DPI)
+        plt.close(fig)
+        return buffer.getvalue()
+
+    @staticmethod
+    def trim(img: "Image.Image") -> "Image.Image":
+        """
+        Removes the blank (white) margin of the specified image.
+
+        :param img: RGB image
+        :return: trimmed image
+        """
+        from PIL import ImageChops, Image
+        bbox = ImageChops.difference(img, Image.new(img.mode, img.size, (255, 255, 255))).getbbox()
+        return img.crop(bbox) if bbox is not None else img
+
+    def encode(self, img_bytes: bytes) -> bytes:
+        """
+        Trims, downscales and encodes the specified image in the target format.
+
+        :param img_bytes: image (any format supported by Pillow)
+        :return: encoded image
+        """
+        from PIL import Image
+        img = Image.open(io.BytesIO(img_bytes))
+        if img.mode in ("RGBA", "LA", "P"):
+            # flatten transparency onto white (the plots have a transparent or white background)
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            rgba = img.convert("RGBA")
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            img = background
+        img = self.trim(img.convert("RGB"))
+        img.thumbnail((self.max_size, self.max_size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        if self.img_format == "png":
+            img.quantize(self.colors).save(buffer, "PNG", optimize=True)
+        else:
+            img.save(buffer, "WEBP", quality=WEBP_QUALITY, method=6)
+        return buffer.getvalue()
+
+    def read_source(self, path: str) -> bytes:
+        """
+        Reads the source image - '.npy' centroids are rendered.
+
+        :param path: image ('.png', ...) or centroids ('.npy')
+        :return: source image
+        """
+        if path.endswith(".npy"):
+            import numpy as np
+            return self.render_centroids(np.load(path))
+        with open(path, "rb") as f:
+            return f.read()
+
+    @timed("image_preparation")
+    def data_url(self, path: str) -> str:
+        """
+        Prepares the specified image as data URL to be embedded in the prompt - served from memory if the file didn't
+        change, otherwise from the on-disk cache (by content hash) or encoded.
+
+        :param path: image ('.png', ...) or centroids ('.npy')
+        :return: data URL, e.g., 'data:image/png;base64,...'
+        """
+        stat = os.stat(path)
+        memory_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        if memory_key in self.memory_cache:
+            count("image_cache_hits")
+            return self.memory_cache[memory_key]
+
+        with open(path, "rb") as f:
+            content_hash = hashlib.sha256(f.read()).hexdigest()
+        cache_file = os.path.join(
+            self.cache_dir, f"{content_hash}_{self.max_size}_{self.colors}.{self.img_format}"
+        )
+        cached = os.path.exists(cache_file)
+        if cached:
+            with open(cache_file, "rb") as f:
+                payload = f.read()
+            raw_bytes = stat.st_size
+        else:
+            raw = self.read_source(path)
+            raw_bytes = len(raw)
+            payload = self.encode(raw)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cache_file, "wb") as f:
+                f.write(payload)
+        url = f"data:{IMG_FORMATS[self.img_format]};base64,{base64.b64encode(payload).decode('utf-8')}"
+        self.memory_cache[memory_key] = url
+        count("image_bytes_raw", raw_bytes)
+        count("image_bytes_payload", len(payload))
+        logger.debug("image payload %s: %d -> %d bytes (cached: %s)", path, raw_bytes, len(payload), cached)
+        log_metrics("image_payload", path=path, raw_bytes=raw_bytes, payload_bytes=len(payload), cached=cached)
+        return url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='prepare (render / downscale / compress) images for LLM prompts')
+    parser.add_argument('--input', type=str, nargs='+', required=True, help='images (.png) or centroids (.npy)')
+    parser.add_argument('--max-size', type=int, default=IMG_MAX_SIZE, help='max width / height in pixels')
+    parser.add_argument('--colors', type=int, default=IMG_COLORS, help='number of palette colors (PNG)')
+    parser.add_argument('--format', choices=list(IMG_FORMATS), default="png", help='format of the payload')
+    parser.add_argument('--out', type=str, default=None, help='directory the encoded images are written to')
+    args = parser.parse_args()
+
+    builder = ImagePayloadBuilder(args.max_size, args.colors, args.format)
+    for img_path in args.input:
+        encoded = builder.encode(builder.read_source(img_path))
+        print(f"{img_path}: {os.path.getsize(img_path)} -> {len(encoded)} bytes")
+        if args.out is not None:
+            os.makedirs(args.out, exist_ok=True)
+            out_file = os.path.join(args.out, os.path.splitext(os.path.basename(img_path))[0] + "." + args.format)
+            with open(out_file, "wb") as f:
+                f.write(encoded)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import gzip
+import os
+import time
+from datetime import datetime
+from typing import Iterator, Optional, BinaryIO
+
+import requests
+from termcolor import colored
+
+from saliency_kd.config import FUSEKI_URL, DATA_ENDPOINT, SNAPSHOT_DIR
+
+CHUNK_SIZE = 1 << 20  # bytes per transferred chunk
+CONTENT_TYPES = {
+    ".nq": "application/n-quads",
+    ".nt": "application/n-triples",
+    ".ttl": "text/turtle",
+    ".trig": "application/trig"
+}
+
+
+class KnowledgeGraphSnapshot:
+    """
+    Bulk loader / exporter for knowledge graph snapshots (e.g., 'knowledge_base/sample_kg_mallat_*.nq.gz').
+    Snapshots are streamed chunk by chunk between the file and the Fuseki dataset (Graph Store Protocol), i.e.,
+    they are never fully held in memory nor parsed on the client side.
+    """
+
+    def __init__(self, kg_url: str = FUSEKI_URL, chunk_size: int = CHUNK_SIZE, verbose: bool = True) -> None:
+        """
+        Initializes the snapshot loader / exporter.
+
+        :param kg_url: URL of the server hosting the knowledge graph
+        :param chunk_size: number of bytes per transferred chunk
+        :param verbose: whether the progress should be reported
+        """
+        self.kg_url = kg_url
+        self.chunk_size = chunk_size
+        self.verbose = verbose
+
+    @staticmethod
+    def content_type(path: str) -> str:
+        """
+        Determines the content type of the specified snapshot based on its extension (optionally gzipped).
+
+        :param path: snapshot file, e.g., 'sample_kg.nq.gz'
+        :return: content type, e.g., 'application/n-quads'
+        """
+        ext = os.path.splitext(path[:-len(".gz")] if path.endswith(".gz") else path)[1]
+        if ext not in CONTENT_TYPES:
+            raise ValueError(f"unsupported snapshot format: {path} (supported: {', '.join(CONTENT_TYPES)} [.gz])")
+        return CONTENT_TYPES[ext]
+
+    @staticmethod
+    def open_snapshot(path: str, mode: str) -> BinaryIO:
+        """
+        Opens the specified snapshot file - gzipped snapshots are (de)compressed on the fly.
+
+        :param path: snapshot file
+        :param mode: 'rb' or 'wb'
+        :return: binary file object
+        """
+        return gzip.open(path, mode) if path.endswith(".gz") else open(path, mode)
+
+    def report_progress(self, n_bytes: int, n_lines: int, start: float, done: bool = False) -> None:
+        """
+        Reports the transferred volume and the throughput.
+
+        :param n_bytes: number of transferred (uncompressed) bytes
+        :param n_lines: number of transferred lines (statements for N-Triples / N-Quads)
+        :param start: start time of the transfer (perf counter)
+        :param done: whether the transfer is complete
+        """
+        if not self.verbose:
+            return
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        print(
+            f"\r{n_bytes / 1e6:.1f} MB, {n_lines} lines in {elapsed:.1f} s "
+            f"({n_bytes / 1e6 / elapsed:.1f} MB/s, {n_lines / elapsed:.0f} lines/s)",
+            end="\n" if done else "", flush=True
+        )
+
+    def gen_chunks(self, path: str, stats: dict) -> Iterator[bytes]:
+        """
+        Reads the specified snapshot chunk by chunk (decompressed) and keeps track of the progress.
+
+        :param path: snapshot file
+        :param stats: transfer statistics ('bytes', 'lines', 'start'), updated in place
+        :return: chunks of the snapshot
+        """
+        with self.open_snapshot(path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                stats['bytes'] += len(chunk)
+                stats['lines'] += chunk.count(b"\n")
+                self.report_progress(stats['bytes'], stats['lines'], stats['start'])
+                yield chunk
+
+    def load(self, path: str, graph: Optional[str] = None, replace: bool = False) -> dict:
+        """
+        Streams the specified snapshot ('.nq', '.nt', '.ttl', '.trig', optionally gzipped) into the knowledge graph
+        with a single chunked HTTP request.
+
+        :param path: snapshot file
+        :param graph: named graph the triples are loaded into (triple formats only, default graph if none is specified)
+        :param replace: if true, the target (graph or entire dataset) is replaced, otherwise, the snapshot is added
+        :return: transfer statistics ('bytes', 'lines', 'seconds'), an HTTPError is raised if the server rejects it
+        """
+        content_type = self.content_type(path)
+        if graph is not None and content_type in ["application/n-quads", "application/trig"]:
+            raise ValueError("quad snapshots specify their graphs themselves - no target graph allowed")
+        if self.verbose:
+            print(colored(f"\nloading snapshot {path}..", "green", "on_grey", ["bold"]))
+        stats = {'bytes': 0, 'lines': 0, 'start': time.perf_counter()}
+        res = requests.request(
+            "PUT" if replace else "POST",
+            self.kg_url + DATA_ENDPOINT,
+            params={'graph': graph} if graph is not None else {},
+            data=self.gen_chunks(path, stats),
+            headers={'Content-Type': content_type}
+        )
+        self.report_progress(stats['bytes'], stats['lines'], stats['start'], done=True)
+        if res.status_code not in [200, 201, 204]:
+            raise requests.HTTPError(f"loading {path} failed - HTTP status code: {res.status_code}", response=res)
+        return {'bytes': stats['bytes'], 'lines': stats['lines'], 'seconds': time.perf_counter() - stats['start']}
+
+    def export(self, path: Optional[str] = None) -> str:
+        """
+        Exports the entire knowledge graph (all graphs) as (gzipped) N-Quads snapshot - the response is streamed
+        into the file chunk by chunk.
+
+        :param path: snapshot file (default: 'knowledge_base/kg_<timestamp>.nq.gz')
+        :return: path of the snapshot, an HTTPError is raised (and no file is left) if the export fails
+        """
+        if path is None:
+            path = os.path.join(SNAPSHOT_DIR, "kg_" + datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + ".nq.gz")
+        if self.content_type(path) != "application/n-quads":
+            raise ValueError("snapshots are exported as N-Quads ('.nq' / '.nq.gz')")
+        if self.verbose:
+            print(colored(f"\nexporting knowledge graph to {path}..", "green", "on_grey", ["bold"]))
+        start = time.perf_counter()
+        n_bytes, n_lines = 0, 0
+        with requests.get(
+                self.kg_url + DATA_ENDPOINT, headers={'Accept': 'application/n-quads'}, stream=True
+        ) as res:
+            if res.status_code != 200:
+                raise requests.HTTPError(f"export failed - HTTP status code: {res.status_code}", response=res)
+            try:
+                with self.open_snapshot(path, "wb") as f:
+                    for chunk in res.iter_content(chunk_size=self.chunk_size):
+                        f.write(chunk)
+                        n_bytes += len(chunk)
+                        n_lines += chunk.count(b"\n")
+                        self.report_progress(n_bytes, n_lines, start)
+            except BaseException:
+                # an interrupted transfer must not leave a truncated snapshot
+                os.remove(path)
+                raise
+        self.report_progress(n_bytes, n_lines, start, done=True)
+        return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='bulk load / export knowledge graph snapshots')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--load', type=str, help='snapshot to be loaded, e.g., knowledge_base/sample_kg_mallat.nq.gz')
+    group.add_argument(
+        '--export', type=str, nargs='?', const="", help='export the KG to an N-Quads snapshot (default: timestamped)'
+    )
+    parser.add_argument('--graph', type=str, default=None, help='named graph to load a triple snapshot into')
+    parser.add_argument('--replace', action='store_true', help='replace the target instead of adding the snapshot')
+    parser.add_argument('--kg-url', type=str, default=FUSEKI_URL, help='URL of the Fuseki server')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='bytes per transferred chunk')
+    args = parser.parse_args()
+
+    snapshot = KnowledgeGraphSnapshot(args.kg_url, args.chunk_size)
+    try:
+        if args.load is not None:
+            snapshot.load(args.load, args.graph, args.replace)
+        else:
+            print("snapshot saved to", snapshot.export(args.export or None))
+    except requests.RequestException as e:
+        parser.exit(1, f"{e}\n")
@@ -2,10 +2,16 @@
 # -*- coding: utf-8 -*-
 # @author Tim Bohne
 
-from typing import List, Tuple
+import argparse
+from typing import List, Tuple, Dict, Optional
 
 from saliency_kd.config import ONTOLOGY_PREFIX, FUSEKI_URL
 from saliency_kd.connection_controller import ConnectionController
+from saliency_kd.logger import get_logger, configure_logging, LOG_LEVELS
+from saliency_kd.profiling import timed
+
+logger = get_logger("knowledge_graph_query_tool")
+BANNER = "####################################"
 
 
 class KnowledgeGraphQueryTool:
@@ -14,14 +20,17 @@ class KnowledgeGraphQueryTool:
     the knowledge graph hosted on a Fuseki server.
     """
 
-    def __init__(self, kg_url: str = FUSEKI_URL) -> None:
+    def __init__(self, kg_url: str = FUSEKI_URL, dataset: Optional[str] = None) -> None:
         """
         Initializes the KG query tool.
 
         :param kg_url: URL of the server hosting the knowledge graph
+        :param dataset: dataset the queries are scoped to (named graph), e.g., 'Mallat' - if none is specified, the
+                        default graph (e.g., a launched snapshot) and all named graphs are queried
         """
         self.ontology_prefix = ONTOLOGY_PREFIX
         self.fuseki_connection = ConnectionController(namespace=ONTOLOGY_PREFIX, fuseki_url=kg_url)
+        self.dataset = dataset
 
     def complete_ontology_entry(self, entry: str) -> str:
         """
@@ -32,58 +41,151 @@ class KnowledgeGraphQueryTool:
         """
         return "<" + self.ontology_prefix.replace('#', '#' + entry) + ">"
 
-    def query_all_fault_desc(self, verbose: bool = True) -> List[Tuple[str, str]]:
+    def gen_where_clause(self, pattern: str) -> str:
         """
-        Queries all symbolic fault descriptions stored in the knowledge graph.
+        Generates the dataset and WHERE clause for the specified graph pattern: scoped to the named graph of the
+        selected dataset or, if none is selected, matched against the default graph (e.g., a launched snapshot) and
+        all named graphs (the KG generator stores each dataset in its own named graph).
 
-        :param verbose: if true, logging is activated
-        :return: all fault descriptions stored in the knowledge graph
+        :param pattern: graph pattern (triples)
+        :return: ['FROM' clause] 'WHERE' clause
+        """
+        if self.dataset is not None:
+            return f"FROM <{self.fuseki_connection.dataset_graph(self.dataset)}> WHERE {{{pattern}}}"
+        return f"WHERE {{ {{{pattern}}} UNION {{ GRAPH ?g {{{pattern}}} }} }}"
+
+    def gen_all_fault_desc_query(self) -> str:
+        """
+        Generates the query for all symbolic fault descriptions stored in the knowledge graph.
+
+        :return: SPARQL query
         """
-        if verbose:
-            print("####################################")
-            print("QUERY: all symbolic fault descriptions")
-            print("####################################")
         sensor_fault_entry = self.complete_ontology_entry('SensorFault')
         desc_entry = self.complete_ontology_entry('fault_desc')
         name_entry = self.complete_ontology_entry('name')
-        s = f"""
-            SELECT ?fault_name ?fault_desc WHERE {{
+        pattern = f"""
                 ?sensor_fault a {sensor_fault_entry} .
                 ?sensor_fault {desc_entry} ?fault_desc .
                 ?sensor_fault {name_entry} ?fault_name .
-            }}
             """
-        return [(row['fault_name']['value'], row['fault_desc']['value'])
-                for row in self.fuseki_connection.query_knowledge_graph(s, verbose)]
+        return f"""
+            SELECT DISTINCT ?fault_name ?fault_desc {self.gen_where_clause(pattern)}
+            """
 
-    def query_fault_information_by_name(self, name: str, verbose: bool = True) -> List[Tuple[str, str, str]]:
+    def gen_fault_information_query(self, name: Optional[str] = None, names: Optional[List[str]] = None) -> str:
         """
-        Queries the symbolic fault information stored in the knowledge graph for the specified fault name.
+        Generates the query for the symbolic fault information (name, description, severity) stored in the
+        knowledge graph - for the specified fault name(s) or, if none is specified, for all faults.
 
-        :param name: name of the fault
-        :param verbose: if true, logging is activated
-        :return: fault information stored in the knowledge graph for the specified name
+        :param name: name of the fault (optional)
+        :param names: names of the faults (optional), i.e., several faults are resolved in a single query
+        :return: SPARQL query
         """
-        if verbose:
-            print("####################################")
-            print("QUERY: all symbolic fault information by name")
-            print("####################################")
+        if name is not None:
+            names = [name]
         sensor_fault_entry = self.complete_ontology_entry('SensorFault')
         desc_entry = self.complete_ontology_entry('fault_desc')
         name_entry = self.complete_ontology_entry('name')
         severity_entry = self.complete_ontology_entry('severity')
-        s = f"""
-            SELECT ?fault_name ?fault_desc ?severity WHERE {{
+        name_filter = ""
+        if names is not None:
+            name_filter = "FILTER(STR(?fault_name) IN (" + ", ".join(f'"{n}"' for n in names) + "))"
+        pattern = f"""
                 ?sensor_fault a {sensor_fault_entry} .
                 ?sensor_fault {desc_entry} ?fault_desc .
                 ?sensor_fault {name_entry} ?fault_name .
                 ?sensor_fault {severity_entry} ?severity .
-                FILTER(STR(?fault_name) = "{name}")
-            }}
+                {name_filter}
             """
+        return f"""
+            SELECT DISTINCT ?fault_name ?fault_desc ?severity {self.gen_where_clause(pattern)}
+            """
+
+    @timed("kg_query_tool")
+    def query_all_fault_desc(self, verbose: bool = True) -> List[Tuple[str, str]]:
+        """
+        Queries all symbolic fault descriptions stored in the knowledge graph.
+
+        :param verbose: if true, logging is activated
+        :return: all fault descriptions stored in the knowledge graph
+        """
+        if verbose:
+            logger.info("%s\nQUERY: all symbolic fault descriptions\n%s", BANNER, BANNER)
+        s = self.gen_all_fault_desc_query()
+        return [(row['fault_name']['value'], row['fault_desc']['value'])
+                for row in self.fuseki_connection.query_knowledge_graph(s, verbose)]
+
+    @timed("kg_query_tool")
+    async def query_all_fault_desc_async(self, verbose: bool = True) -> List[Tuple[str, str]]:
+        """
+        Queries all symbolic fault descriptions stored in the knowledge graph (asynchronously).
+
+        :param verbose: if true, logging is activated
+        :return: all fault descriptions stored in the knowledge graph
+        """
+        if verbose:
+            logger.info("%s\nQUERY: all symbolic fault descriptions (async)\n%s", BANNER, BANNER)
+        res = await self.fuseki_connection.query_knowledge_graph_async(self.gen_all_fault_desc_query(), verbose)
+        return [(row['fault_name']['value'], row['fault_desc']['value']) for row in res]
+
+    @timed("kg_query_tool")
+    def query_fault_information_by_name(self, name: str, verbose: bool = True) -> List[Tuple[str, str, str]]:
+        """
+        Queries the symbolic fault information stored in the knowledge graph for the specified fault name.
+
+        :param name: name of the fault
+        :param verbose: if true, logging is activated
+        :return: fault information stored in the knowledge graph for the specified name
+        """
+        if verbose:
+            logger.info("%s\nQUERY: all symbolic fault information by name\n%s", BANNER, BANNER)
+        s = self.gen_fault_information_query(name)
         return [(row['fault_name']['value'], row['fault_desc']['value'], row['severity']['value'])
                 for row in self.fuseki_connection.query_knowledge_graph(s, verbose)]
 
+    @timed("kg_query_tool")
+    def query_fault_information_by_names(
+            self, names: List[str], verbose: bool = True
+    ) -> Dict[str, List[Tuple[str, str, str]]]:
+        """
+        Queries the symbolic fault information stored in the knowledge graph for the specified fault names in a single
+        request, e.g., for all classes predicted in an LLM response.
+
+        :param names: names of the faults
+        :param verbose: if true, logging is activated
+        :return: fault information stored in the knowledge graph per fault name (empty for unknown names)
+        """
+        if verbose:
+            logger.info("%s\nQUERY: symbolic fault information by names\n%s", BANNER, BANNER)
+        fault_info = {name: [] for name in names}
+        if len(names) == 0:
+            return fault_info
+        s = self.gen_fault_information_query(names=list(dict.fromkeys(names)))
+        for row in self.fuseki_connection.query_knowledge_graph(s, verbose):
+            fault_info.setdefault(row['fault_name']['value'], []).append(
+                (row['fault_name']['value'], row['fault_desc']['value'], row['severity']['value'])
+            )
+        return fault_info
+
+    @timed("kg_query_tool")
+    async def query_all_fault_information_async(self, verbose: bool = True) -> Dict[str, List[Tuple[str, str, str]]]:
+        """
+        Queries the symbolic fault information of all faults stored in the knowledge graph in a single request
+        (asynchronously), e.g., to prefetch the information for every known fault.
+
+        :param verbose: if true, logging is activated
+        :return: fault information stored in the knowledge graph per fault name
+        """
+        if verbose:
+            logger.info("%s\nQUERY: all symbolic fault information (async)\n%s", BANNER, BANNER)
+        res = await self.fuseki_connection.query_knowledge_graph_async(self.gen_fault_information_query(), verbose)
+        fault_info = {}
+        for row in res:
+            fault_info.setdefault(row['fault_name']['value'], []).append(
+                (row['fault_name']['value'], row['fault_desc']['value'], row['severity']['value'])
+            )
+        return fault_info
+
     @staticmethod
     def print_res(res: List[str]) -> None:
         """
@@ -96,5 +198,17 @@ class KnowledgeGraphQueryTool:
 
 
 if __name__ == '__main__':
-    qt = KnowledgeGraphQueryTool()
-    qt.print_res(qt.query_all_fault_desc())
+    parser = argparse.ArgumentParser(description='query symbolic fault descriptions from the knowledge graph')
+    parser.add_argument('--dataset', type=str, default=None, help='dataset (named graph) to scope the query to')
+    parser.add_argument(
+        '--names', type=str, nargs='+', default=None, help='query the fault information of the specified classes'
+    )
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default="INFO", help='DEBUG additionally logs the queries')
+    args = parser.parse_args()
+    configure_logging(args.log_level)
+
+    qt = KnowledgeGraphQueryTool(dataset=args.dataset)
+    if args.names is not None:
+        qt.print_res([info for infos in qt.query_fault_information_by_names(args.names).values() for info in infos])
+    else:
+        qt.print_res(qt.query_all_fault_desc())
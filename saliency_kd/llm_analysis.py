@@ -3,14 +3,25 @@
 # @author Tim Bohne
 
 import argparse
-import base64
-from typing import List, Dict
+import json
+import os
+import re
+import time
+from typing import List, Dict, Tuple, Optional, TYPE_CHECKING
 
-import numpy as np
-from openai import OpenAI
+from saliency_kd.config import LLM_WORKER_SOCKET, CLUSTER_IMG
+from saliency_kd.image_payload import ImagePayloadBuilder, IMG_MAX_SIZE, IMG_COLORS, IMG_FORMATS
+from saliency_kd.llm_client import create_client, record_response
+from saliency_kd.logger import (
+    get_logger, configure_logging, log_metrics, metrics_enabled, json_size, LOG_LEVELS, SEPARATOR
+)
+from saliency_kd.profiling import timed, count, cprofile, summary_table, write_report
 
-from saliency_kd.knowledge_graph_query_tool import KnowledgeGraphQueryTool
-from saliency_kd.secret_config import OPENAI_API_KEY
+if TYPE_CHECKING:
+    import numpy as np
+    from openai import OpenAI
+
+logger = get_logger("llm_analysis")
 
 INIT_PROMPT = "There is a number of symbolic descriptions of signals:\n\n"
 MODE_PROMPT_IMG = ("\n\nIn the following img, describe each red signal in a similar fashion to the above symbolic"
@@ -29,13 +40,35 @@ PROMPT_APPENDIX = ("\n\nDescribe them at the same granularity as the examples ab
                    " should allow some tolerance for deviations; they should only roughly match.")
 END_NOTE = ("\nThe final line of the response string should be just the names of the predicted classes (comma"
             " separated) - exactly in the above notation.")
+STRUCTURED_NOTE = ("\nReturn the description and the predicted class of each signal in the specified JSON format"
+                   " (predicted class 'none' if no class matches).")
+NO_MATCH = "none"
+# cheap model for the follow-up request extracting the predictions from a malformed response (no re-analysis)
+FORMAT_MODEL = "gpt-4o-mini"
+FORMAT_PROMPT = ("The following analysis matches signals to classes. Extract the predicted class of each signal (in"
+                 " order of the signals) - exactly one of: {classes} or '" + NO_MATCH + "' if no class matches.\n\n")
 
 
 class LLMAnalysis:
 
-    def __init__(self) -> None:
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
-        self.kgqt = KnowledgeGraphQueryTool()
+    def __init__(
+            self, dataset: Optional[str] = None, client: Optional["OpenAI"] = None, record: Optional[str] = None,
+            image_builder: Optional[ImagePayloadBuilder] = None
+    ) -> None:
+        """
+        Initializes the LLM analysis.
+
+        :param dataset: dataset the KG queries are scoped to, i.e., only its classes are part of the prompt
+        :param client: OpenAI client (see 'llm_client.create_client') - OpenAI's API if not specified
+        :param record: file the responses are recorded to (replayable by the mock server)
+        :param image_builder: preparation of the images (img mode) - defaults to downscaled, palette-quantized PNGs
+        """
+        self.client = client if client is not None else create_client()
+        self.record = record
+        self.image_builder = image_builder if image_builder is not None else ImagePayloadBuilder()
+        # heavy dependencies (KG access, OpenAI SDK) are loaded on first use, i.e., not for '--help'
+        from saliency_kd.knowledge_graph_query_tool import KnowledgeGraphQueryTool
+        self.kgqt = KnowledgeGraphQueryTool(dataset=dataset)
 
     def prompt_gpt(self, model: str, input_prompt: List[Dict]) -> str:
         """
@@ -45,51 +78,66 @@ class LLMAnalysis:
         :param input_prompt: input prompt(s)
         :return: parsed GPT response string
         """
+        return self.request_gpt(model, input_prompt).split("\n")[-1]
+
+    @timed("llm_request")
+    def request_gpt(self, model: str, input_prompt: List[Dict], text_format: Optional[Dict] = None) -> str:
+        """
+        Sends the prompt to the GPT model.
+
+        :param model: LLM (OpenAI) model to be used
+        :param input_prompt: input prompt(s)
+        :param text_format: format of the response, e.g., a JSON schema (structured output) - plain text by default
+        :return: complete GPT response string
+        """
+        start = time.perf_counter()
         response = self.client.responses.create(
             # "o3-2025-04-16" (best, but expensive), "gpt-4o" (works), "gpt-4.1", "gpt-4.1-2025-04-14", "gpt-4o-mini"
             model=model,
             # max_tokens=300,  # controlling costs (meant for responses)
-            input=input_prompt
+            input=input_prompt,
+            **({"text": {"format": text_format}} if text_format is not None else {})
         )
-        print("response..")
-        print(response.id)
-        print(response.model)
-        print(response.output_text)
-        print(response.temperature)
-        print(response.max_output_tokens)
-        print(response.usage)
-        # print(response.usage.input_tokens)
-        # print(response.usage.output_tokens)
-        # print(response.usage.total_tokens)
-
-        return response.output_text.split("\n")[-1]
+        if self.record is not None:
+            record_response(response, self.record)
+        count("llm_requests")
+        count("input_tokens", response.usage.input_tokens)
+        count("output_tokens", response.usage.output_tokens)
+        # prompt prefix served from the provider-side cache (requires identical prefixes, e.g., class descriptions)
+        count("cached_input_tokens", response.usage.input_tokens_details.cached_tokens)
+        logger.info("response..\n%s", response.output_text)
+        logger.debug(
+            "id: %s, model: %s, temperature: %s, max output tokens: %s, usage: %s", response.id, response.model,
+            response.temperature, response.max_output_tokens, response.usage
+        )
+        if metrics_enabled():
+            log_metrics(
+                "llm_response", model=response.model, latency_s=time.perf_counter() - start,
+                input_tokens=response.usage.input_tokens, output_tokens=response.usage.output_tokens,
+                payload_bytes=json_size(input_prompt)
+            )
+        return response.output_text
 
-    @staticmethod
-    def get_centroid_img_base64(llm_input: str) -> str:
+    def get_centroid_img_url(self, llm_input: str) -> str:
         """
-        Retrieves the centroid image as base64-coded string.
+        Retrieves the (prepared) centroid image as data URL.
 
-        :param llm_input: input signals (img) for LLM analysis
-        :return: centroid image as base64-coded string
+        :param llm_input: input signals (img: '.png' or centroids to be rendered: '.npy') for LLM analysis
+        :return: centroid image as data URL
         """
-        assert llm_input.endswith(".png")
-        # read img as binary
-        with open(llm_input, "rb") as signal_img:
-            return base64.b64encode(signal_img.read()).decode('utf-8')
+        return self.image_builder.data_url(llm_input)
 
-    @staticmethod
-    def get_cluster_img_base64() -> str:
+    def get_cluster_img_url(self, path: str = CLUSTER_IMG) -> str:
         """
-        Retrieves the cluster image as base64-coded string.
+        Retrieves the (prepared) cluster image as data URL.
 
-        :return: cluster image as base64-coded string
+        :param path: cluster image
+        :return: cluster image as data URL
         """
-        # read img as binary
-        with open("img/filtered_clusters.png", "rb") as signal_img:
-            return base64.b64encode(signal_img.read()).decode('utf-8')
+        return self.image_builder.data_url(path)
 
     @staticmethod
-    def get_centroids_ts(llm_input: str) -> np.ndarray:
+    def get_centroids_ts(llm_input: str) -> "np.ndarray":
         """
         Retrieves the centroid time series as numpy array.
 
@@ -97,21 +145,150 @@ class LLMAnalysis:
         :return: centroid time series
         """
         assert llm_input.endswith(".npy")
+        import numpy as np
         return np.load(llm_input)
 
-    def gen_prompt_img(self, llm_input: str) -> List[Dict]:
+    @staticmethod
+    def gen_class_prompt(name_desc_pairs: List[Tuple[str, str]]) -> str:
+        """
+        Generates the class description part of the prompt.
+
+        :param name_desc_pairs: class descriptions
+        :return: class descriptions (one per line)
+        """
+        return "\n".join([i[0] + ": " + i[1] for i in name_desc_pairs])
+
+    @staticmethod
+    def serialize_signal(signal: "np.ndarray") -> str:
+        """
+        Serializes the specified signal for the prompt.
+
+        :param signal: signal (centroid)
+        :return: space separated values (rounded to two decimals)
+        """
+        return " ".join([str(round(v, 2)) for v in signal.tolist()])
+
+    @staticmethod
+    def gen_text_format(class_names: List[str], descriptions: bool = True) -> Dict:
+        """
+        Generates the JSON schema of the predictions (structured output) - the classes are restricted to the known ones.
+
+        :param class_names: names of the classes
+        :param descriptions: whether a description precedes each prediction (analysis), or only the classes are
+                             requested (formatting)
+        :return: text format of the Responses API
+        """
+        properties = {"signal": {"type": "integer"}}
+        if descriptions:
+            properties["description"] = {"type": "string"}
+        properties["predicted_class"] = {"type": "string", "enum": list(class_names) + [NO_MATCH]}
+        return {
+            "type": "json_schema",
+            "name": "predictions",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "predictions": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": properties,
+                            "required": list(properties),
+                            "additionalProperties": False
+                        }
+                    }
+                },
+                "required": ["predictions"],
+                "additionalProperties": False
+            }
+        }
+
+    @staticmethod
+    def parse_structured_predictions(response: str) -> List[str]:
+        """
+        Parses the predicted classes of a structured (JSON) response.
+
+        :param response: complete GPT response string
+        :return: predicted class per signal (empty if the response is malformed)
+        """
+        try:
+            predictions = json.loads(response)["predictions"]
+            return [p["predicted_class"] for p in sorted(predictions, key=lambda p: p.get("signal", 0))]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return []
+
+    @staticmethod
+    def parse_predicted_classes(response: str, class_names: List[str]) -> List[str]:
+        """
+        Parses the predicted classes of a plain text response, i.e., the last line consisting only of (comma separated)
+        known classes - alternatives in brackets and markdown decoration are ignored, blank lines are skipped.
+
+        :param response: complete GPT response string
+        :param class_names: names of the known classes
+        :return: predicted class per signal (empty if the response is malformed)
+        """
+        known = set(class_names) | {NO_MATCH}
+        for line in reversed(response.splitlines()):
+            # e.g., '**Predicted classes:** class_1, class_7 (alternative: class_8), class_3'
+            line = re.sub(r"\([^)]*\)|\[[^]]*]", "", line).split(":")[-1]
+            tokens = [t.strip(" *`'\".") for t in re.split(r"[,;]", line)]
+            tokens = [t for t in tokens if len(t) > 0]
+            if len(tokens) > 0 and all(t in known for t in tokens):
+                return tokens
+        return []
+
+    def predict(
+            self, model: str, input_prompt: List[Dict], class_names: List[str], structured: bool = False
+    ) -> List[str]:
+        """
+        Prompts the GPT model and parses the predicted classes - a malformed response is followed up by a cheap
+        'format only' request extracting the predictions from the response (instead of re-running the whole prompt).
+
+        :param model: LLM (OpenAI) model to be used
+        :param input_prompt: input prompt(s)
+        :param class_names: names of the known classes
+        :param structured: whether the response is requested as JSON (structured output)
+        :return: predicted class per signal
+        """
+        if structured:
+            response = self.request_gpt(model, input_prompt, self.gen_text_format(class_names))
+            predictions = self.parse_structured_predictions(response)
+        else:
+            response = self.request_gpt(model, input_prompt)
+            predictions = self.parse_predicted_classes(response, class_names)
+        if len(predictions) > 0:
+            return predictions
+        logger.warning("malformed response - requesting the predictions only (%s)", FORMAT_MODEL)
+        count("format_retries")
+        format_prompt = [{"role": "user", "content": [{
+            "type": "input_text", "text": FORMAT_PROMPT.format(classes=", ".join(class_names)) + response
+        }]}]
+        predictions = self.parse_structured_predictions(
+            self.request_gpt(FORMAT_MODEL, format_prompt, self.gen_text_format(class_names, descriptions=False))
+        )
+        if len(predictions) == 0:
+            logger.error("no predictions could be extracted from the response")
+        return predictions
+
+    @timed("prompt_building")
+    def gen_prompt_img(
+            self, llm_input: str, name_desc_pairs: Optional[List[Tuple[str, str]]] = None, structured: bool = False
+    ) -> List[Dict]:
         """
         Generates prompt for textual description of input image.
 
-        :param llm_input: input signals (img) for LLM analysis
+        :param llm_input: input signals (img: '.png' or centroids to be rendered: '.npy') for LLM analysis
+        :param name_desc_pairs: class descriptions (queried from the KG if not specified)
+        :param structured: whether the predictions are requested as JSON (structured output)
         :return: prompt for GPT model
         """
-        name_desc_pairs = self.kgqt.query_all_fault_desc()
-        class_prompt = "\n".join([i[0] + ": " + i[1] for i in name_desc_pairs])
-        prompt = INIT_PROMPT + class_prompt + MODE_PROMPT_IMG + PROMPT_APPENDIX + END_NOTE
-        print("-----------------------------------------------------")
-        print("prompt..\n", prompt)
-        print("-----------------------------------------------------")
+        if name_desc_pairs is None:
+            name_desc_pairs = self.kgqt.query_all_fault_desc()
+        class_prompt = self.gen_class_prompt(name_desc_pairs)
+        end_note = STRUCTURED_NOTE if structured else END_NOTE
+        prompt = INIT_PROMPT + class_prompt + MODE_PROMPT_IMG + PROMPT_APPENDIX + end_note
+        logger.debug("%s\nprompt..\n%s\n%s", SEPARATOR, prompt, SEPARATOR)
         return [
             {
                 "role": "user",
@@ -122,32 +299,37 @@ class LLMAnalysis:
                     },
                     # {
                     #     "type": "input_image",
-                    #     "image_url": f"data:image/png;base64,{self.get_cluster_img_base64()}"
+                    #     "image_url": self.get_cluster_img_url()
                     # },
                     {
                         "type": "input_image",
-                        "image_url": f"data:image/png;base64,{self.get_centroid_img_base64(llm_input)}"
+                        "image_url": self.get_centroid_img_url(llm_input)
                     }
                 ]
             }
         ]
 
-    def gen_prompt_ts(self, llm_input: str) -> List[Dict]:
+    @timed("prompt_building")
+    def gen_prompt_ts(
+            self, llm_input: str, name_desc_pairs: Optional[List[Tuple[str, str]]] = None, structured: bool = False
+    ) -> List[Dict]:
         """
         Generates prompt for textual description of time series signals.
 
         :param llm_input: input signals (ts) for LLM analysis
+        :param name_desc_pairs: class descriptions (queried from the KG if not specified)
+        :param structured: whether the predictions are requested as JSON (structured output)
         :return: prompt for GPT model
         """
-        name_desc_pairs = self.kgqt.query_all_fault_desc()
-        class_prompt = "\n".join([i[0] + ": " + i[1] for i in name_desc_pairs])
+        if name_desc_pairs is None:
+            name_desc_pairs = self.kgqt.query_all_fault_desc()
+        class_prompt = self.gen_class_prompt(name_desc_pairs)
         arr = self.get_centroids_ts(llm_input)
-        centroid_lst = [" ".join([str(round(v, 2)) for v in c.tolist()]) for i, c in enumerate(arr)]
+        centroid_lst = [self.serialize_signal(c) for c in arr]
         str_centroids = "\n\n".join(f"signal {i + 1}:\n{c}" for i, c in enumerate(centroid_lst))
-        prompt = INIT_PROMPT + class_prompt + MODE_PROMPT_TS + PROMPT_APPENDIX + END_NOTE + "\n\n" + str_centroids
-        print("-----------------------------------------------------")
-        print("prompt..\n", prompt)
-        print("-----------------------------------------------------")
+        end_note = STRUCTURED_NOTE if structured else END_NOTE
+        prompt = INIT_PROMPT + class_prompt + MODE_PROMPT_TS + PROMPT_APPENDIX + end_note + "\n\n" + str_centroids
+        logger.debug("%s\nprompt..\n%s\n%s", SEPARATOR, prompt, SEPARATOR)
         return [
             {
                 "role": "user",
@@ -160,6 +342,53 @@ class LLMAnalysis:
             }
         ]
 
+    @timed("llm_analysis")
+    async def analyze(
+            self, mode: str, llm_input: str, model: str, structured: bool = False
+    ) -> Tuple[List[str], List[Tuple[str, str, str]]]:
+        """
+        Analyzes the input signals with the LLM and enriches the predictions with symbolic information from the KG.
+        The fault information of every known fault is prefetched while the class descriptions are retrieved and the
+        LLM request is in flight, i.e., all predicted classes are resolved without an additional round trip.
+
+        :param mode: time series analysis ('ts') or image analysis ('img')
+        :param llm_input: input signals for LLM analysis
+        :param model: LLM (OpenAI) model to be used
+        :param structured: whether the predictions are requested as JSON (structured output)
+        :return: (predicted class per signal, symbolic information obtained from the KG for the predicted classes)
+        """
+        import asyncio  # already loaded by the running event loop
+        loop = asyncio.get_running_loop()
+        try:
+            prefetch = asyncio.ensure_future(self.kgqt.query_all_fault_information_async(verbose=False))
+            name_desc_pairs = await self.kgqt.query_all_fault_desc_async()
+            if mode == "img":
+                prompt = self.gen_prompt_img(llm_input, name_desc_pairs, structured)
+            else:
+                prompt = self.gen_prompt_ts(llm_input, name_desc_pairs, structured)
+            class_names = [name for name, _ in name_desc_pairs]
+            # the (blocking) LLM request runs in a worker thread, the event loop keeps serving the KG requests
+            predicted_classes = await loop.run_in_executor(
+                None, self.predict, model, prompt, class_names, structured
+            )
+            fault_info = await prefetch
+        finally:
+            await self.kgqt.fuseki_connection.close_async_client()
+        return predicted_classes, self.resolve_fault_information(predicted_classes, fault_info)
+
+    @staticmethod
+    def resolve_fault_information(
+            predicted_classes: List[str], fault_info: Dict[str, List[Tuple[str, str, str]]]
+    ) -> List[Tuple[str, str, str]]:
+        """
+        Resolves the symbolic information of the predicted classes (each class once, in order of the predictions).
+
+        :param predicted_classes: predicted class per signal
+        :param fault_info: fault information per fault name
+        :return: symbolic information obtained from the KG for the predicted classes
+        """
+        return [info for name in dict.fromkeys(predicted_classes) for info in fault_info.get(name, [])]
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='analyze signals with LLM')
@@ -176,17 +405,69 @@ if __name__ == "__main__":
         default="o3-2025-04-16",
         help="choose LLM model between o3-2025-04-16 (default), gpt-4o, gpt-4.1, gpt-4.1-2025-04-14 and gpt-4o-mini"
     )
+    parser.add_argument(
+        '--dataset', type=str, default=None, help='dataset (named graph in the KG) the class descriptions stem from'
+    )
+    parser.add_argument(
+        '--log-level', choices=LOG_LEVELS, default="INFO",
+        help='INFO logs the responses, DEBUG additionally the prompts'
+    )
+    parser.add_argument('--metrics', type=str, default=None, help='file the metrics are appended to (JSON lines)')
+    parser.add_argument(
+        '--base-url', type=str, default=None, help='base URL of the Responses API, e.g., the local mock server'
+    )
+    parser.add_argument('--record', type=str, default=None, help='file the responses are recorded to (.jsonl)')
+    parser.add_argument(
+        '--structured', action='store_true', help='request the predictions as JSON (structured output)'
+    )
+    parser.add_argument('--img-size', type=int, default=IMG_MAX_SIZE, help='max width / height of the images (img)')
+    parser.add_argument('--img-colors', type=int, default=IMG_COLORS, help='number of palette colors (img, PNG)')
+    parser.add_argument('--img-format', choices=list(IMG_FORMATS), default="png", help='image payload format (img)')
+    parser.add_argument(
+        '--worker', type=str, nargs='?', const=LLM_WORKER_SOCKET, default=None,
+        help='send the analysis to the running LLM worker (Unix socket, see llm_worker.py) instead of running it here'
+    )
+    parser.add_argument(
+        '--profile', type=str, default=None, help='print the per-stage summary and write the profile report (JSON)'
+    )
+    parser.add_argument('--cprofile', type=str, default=None, help='dump cProfile statistics to the file (.prof)')
     args = parser.parse_args()
-    llma = LLMAnalysis()
-    if args.mode == "ts":
-        predicted_class = llma.prompt_gpt(args.model, llma.gen_prompt_ts(args.input))
-    elif args.mode == "img":
-        predicted_class = llma.prompt_gpt(args.model, llma.gen_prompt_img(args.input))
+    if args.worker is not None:
+        # thin client - clients, connection pools, inputs and KG results are kept warm by the worker, i.e., the
+        # API, logging and payload options are those the worker was started with
+        local_only = ["base_url", "record", "log_level", "metrics", "profile", "cprofile", "img_size", "img_colors",
+                      "img_format"]
+        ignored = [opt for opt in local_only if getattr(args, opt) != parser.get_default(opt)]
+        if len(ignored) > 0:
+            parser.error(
+                "not applicable with --worker (configured when starting llm_worker.py): "
+                + ", ".join("--" + opt.replace("_", "-") for opt in ignored)
+            )
+        from saliency_kd.llm_worker import request_worker
+        res = request_worker(
+            {
+                "mode": args.mode, "input": os.path.abspath(args.input), "model": args.model, "dataset": args.dataset,
+                "structured": args.structured
+            },
+            args.worker
+        )
+        if "error" in res:
+            raise RuntimeError(res["error"])
+        predicted_classes, additional_info = res["pred_classes"], [tuple(info) for info in res["additional_info"]]
     else:
-        predicted_class = llma.prompt_gpt(args.model, llma.gen_prompt_ts(args.input))
-    print("pred class:", predicted_class)
-
-    # retrieve additional symbolic information
-    kgqt = KnowledgeGraphQueryTool()
+        import asyncio
+        configure_logging(args.log_level, args.metrics)
+        llma = LLMAnalysis(
+            args.dataset, create_client(args.base_url), args.record,
+            ImagePayloadBuilder(args.img_size, args.img_colors, args.img_format)
+        )
+        with cprofile(args.cprofile):
+            predicted_classes, additional_info = asyncio.run(
+                llma.analyze(args.mode, args.input, args.model, args.structured)
+            )
+        if args.profile is not None:
+            print(summary_table())
+            write_report(args.profile)
+    print("pred class:", ", ".join(predicted_classes))
     print("additional symbolic information obtained from KG:")
-    print(kgqt.query_fault_information_by_name(predicted_class))
+    print(additional_info)
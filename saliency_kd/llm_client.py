@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+from typing import Optional, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+# placeholder key for local endpoints (e.g., the mock server), which don't check it
+LOCAL_API_KEY = "local"
+MAX_RETRIES = 2
+TIMEOUT = 600.0
+
+
+def create_client(
+        base_url: Optional[str] = None, api_key: Optional[str] = None, transport: Optional[Any] = None,
+        timeout: float = TIMEOUT, max_retries: int = MAX_RETRIES
+) -> "OpenAI":
+    """
+    Creates the OpenAI client used for the LLM requests, e.g., pointing to the local mock server for offline load tests:
+        create_client(base_url="http://127.0.0.1:8000/v1")
+
+    :param base_url: base URL of the (Responses) API - OpenAI's API if not specified
+    :param api_key: API key - read from 'secret_config' if not specified (not required for local endpoints)
+    :param transport: HTTP transport of the underlying httpx client, e.g., a mock transport or one with a limited
+                      connection pool
+    :param timeout: request timeout in seconds
+    :param max_retries: number of retries on connection errors, 429 and 5xx responses (SDK backoff)
+    :return: OpenAI client
+    """
+    # the SDK takes ~0.5s to import, i.e., it's only loaded once a client is actually needed
+    from openai import OpenAI, DefaultHttpxClient
+    if api_key is None:
+        try:
+            from saliency_kd.secret_config import OPENAI_API_KEY as api_key
+        except ImportError:
+            if base_url is None:
+                raise
+            api_key = LOCAL_API_KEY
+    http_client = DefaultHttpxClient(transport=transport) if transport is not None else None
+    return OpenAI(
+        api_key=api_key, base_url=base_url, http_client=http_client, timeout=timeout, max_retries=max_retries
+    )
+
+
+def record_response(response: Any, path: str) -> None:
+    """
+    Appends the specified response to the recordings (JSON lines) that can be replayed by the mock server.
+
+    :param response: response of the Responses API
+    :param path: recordings file ('.jsonl')
+    """
+    with open(path, "a") as f:
+        f.write(response.model_dump_json() + "\n")
@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import json
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Optional, TYPE_CHECKING
+
+from saliency_kd.config import EVAL_RESULTS_DIR
+from saliency_kd.llm_analysis import LLMAnalysis, NO_MATCH
+from saliency_kd.llm_client import create_client
+from saliency_kd.logger import get_logger, configure_logging, LOG_LEVELS
+from saliency_kd.profiling import timed, count
+from saliency_kd.prompt_batching import MAX_CONCURRENT_REQUESTS
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from openai import OpenAI
+
+logger = get_logger("llm_evaluation")
+
+# one row per (run, signal) - the string columns are stored dictionary-encoded (categorical)
+RESULT_COLUMNS = [
+    "run_id", "dataset", "input", "model", "mode", "repetition", "signal", "predicted_class", "true_class",
+    "latency_s", "error"
+]
+CATEGORICAL_COLUMNS = ["dataset", "input", "model", "mode", "predicted_class", "true_class"]
+# z-score of the (Wilson) confidence intervals (95 %)
+CONFIDENCE_Z = 1.96
+# run logs ('output_<timestamp>.txt' of 'run_exp.sh', 'llm_matching_*.txt') - one 'pred class:' line per run
+PRED_CLASS_PATTERN = re.compile(r"^pred class:\s*(.*)$")
+RESPONSE_ID_PATTERN = re.compile(r"^resp_\w+$")
+NO_MATCH_ALIASES = {"none", "no_match", "no match", "-"}
+
+
+class LLMEvaluation:
+    """
+    Evaluates repeated LLM matching runs, i.e., schedules the repetitions concurrently (or parses the logs of previous
+    runs), stores the per-signal predictions in a columnar results store (Parquet) and computes the agreement across
+    the runs, the accuracy against the ground truth labels of the centroids and their confidence intervals.
+    """
+
+    def __init__(self, client: Optional["OpenAI"] = None, max_workers: int = MAX_CONCURRENT_REQUESTS) -> None:
+        """
+        Initializes the evaluation.
+
+        :param client: OpenAI client (see 'llm_client.create_client') - only required for running new repetitions
+        :param max_workers: max number of concurrent LLM requests
+        """
+        self.client = client
+        self.max_workers = max_workers
+
+    @staticmethod
+    def gen_rows(
+            run_id: str, dataset: Optional[str], llm_input: str, model: str, mode: str, repetition: int,
+            predicted_classes: List[str], true_classes: Optional[List[Optional[str]]], latency_s: float = float("nan"),
+            error: Optional[str] = None
+    ) -> Dict[str, List]:
+        """
+        Generates the result rows of a single run - missing predictions (fewer than labeled centroids) are None.
+
+        :param run_id: ID of the run
+        :param dataset: dataset the class descriptions stem from
+        :param llm_input: input signals of the run
+        :param model: LLM (OpenAI) model
+        :param mode: time series analysis ('ts') or image analysis ('img')
+        :param repetition: number of the repetition
+        :param predicted_classes: predicted class per signal
+        :param true_classes: ground truth class per signal (centroid) - None if unknown
+        :param latency_s: latency of the run (incl. format retries)
+        :param error: error of the run (no predictions)
+        :return: result columns of the run
+        """
+        true_classes = true_classes or []
+        n_signals = max(len(predicted_classes), len(true_classes), 1)
+        return {
+            "run_id": [run_id] * n_signals,
+            "dataset": [dataset or ""] * n_signals,
+            "input": [llm_input] * n_signals,
+            "model": [model] * n_signals,
+            "mode": [mode] * n_signals,
+            "repetition": [repetition] * n_signals,
+            "signal": list(range(n_signals)),
+            "predicted_class": [
+                predicted_classes[i] if i < len(predicted_classes) else None for i in range(n_signals)
+            ],
+            "true_class": [true_classes[i] if i < len(true_classes) else None for i in range(n_signals)],
+            "latency_s": [latency_s] * n_signals,
+            "error": [error] * n_signals
+        }
+
+    @staticmethod
+    def to_frame(rows: List[Dict[str, List]]) -> "pd.DataFrame":
+        """
+        Concatenates the result rows to a (columnar) data frame.
+
+        :param rows: result columns per run
+        :return: results
+        """
+        import pandas as pd
+        df = pd.DataFrame({col: [v for r in rows for v in r[col]] for col in RESULT_COLUMNS})
+        df["true_class"] = df["true_class"].astype(object)
+        return df.astype({col: "category" for col in CATEGORICAL_COLUMNS})
+
+    @timed("evaluation_runs")
+    def run(
+            self, inputs: List[Tuple[str, Optional[str]]], models: List[str], repetitions: int, mode: str = "ts",
+            structured: bool = False, truth: Optional[Dict[str, List[Optional[str]]]] = None
+    ) -> "pd.DataFrame":
+        """
+        Runs the repetitions of the LLM matching for each input and model concurrently. The KG is queried and the
+        prompt is built once per input, i.e., the repetitions only cost the LLM requests.
+
+        :param inputs: (input signals, dataset) pairs
+        :param models: LLM (OpenAI) models to be evaluated
+        :param repetitions: number of repetitions per input and model
+        :param mode: time series analysis ('ts') or image analysis ('img')
+        :param structured: whether the predictions are requested as JSON (structured output)
+        :param truth: ground truth class per centroid per input
+        :return: results (one row per run and signal)
+        """
+        truth = truth or {}
+        client = self.client if self.client is not None else create_client()
+        analyses = {dataset: LLMAnalysis(dataset, client) for dataset in dict.fromkeys(ds for _, ds in inputs)}
+        class_descs = {dataset: llma.kgqt.query_all_fault_desc() for dataset, llma in analyses.items()}
+        prompts = {}
+        for llm_input, dataset in inputs:
+            gen_prompt = analyses[dataset].gen_prompt_img if mode == "img" else analyses[dataset].gen_prompt_ts
+            prompts[(llm_input, dataset)] = gen_prompt(llm_input, class_descs[dataset], structured)
+        jobs = [(llm_input, dataset, model, rep) for llm_input, dataset in inputs for model in models
+                for rep in range(repetitions)]
+        logger.info("%d runs (%d inputs, %d models, %d repetitions)", len(jobs), len(inputs), len(models), repetitions)
+
+        def request(job: Tuple[str, Optional[str], str, int]) -> Dict[str, List]:
+            llm_input, dataset, model, rep = job
+            class_names = [name for name, _ in class_descs[dataset]]
+            start = time.perf_counter()
+            try:
+                predicted_classes = analyses[dataset].predict(
+                    model, prompts[(llm_input, dataset)], class_names, structured
+                )
+                error = None if len(predicted_classes) > 0 else "no predictions"
+            except Exception as e:
+                logger.error("run failed (%s, %s, repetition %d): %s", llm_input, model, rep, e)
+                predicted_classes, error = [], f"{type(e).__name__}: {e}"
+            count("evaluated_runs")
+            return self.gen_rows(
+                uuid.uuid4().hex, dataset, llm_input, model, mode, rep, predicted_classes, truth.get(llm_input),
+                time.perf_counter() - start, error
+            )
+
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            rows = list(executor.map(request, jobs))
+        return self.to_frame(rows)
+
+    @staticmethod
+    def normalize_class(name: str) -> str:
+        """
+        Normalizes a predicted class of the run logs (markdown decoration, notations of 'no match').
+
+        :param name: predicted class as logged
+        :return: normalized class name
+        """
+        name = name.strip(" *`'\".")
+        return NO_MATCH if name.lower() in NO_MATCH_ALIASES else name
+
+    @timed("evaluation_parsing")
+    def parse_log(
+            self, path: str, dataset: Optional[str] = None, model: str = "unknown", mode: str = "ts",
+            true_classes: Optional[List[Optional[str]]] = None
+    ) -> "pd.DataFrame":
+        """
+        Parses the predictions of previous runs from the log, e.g., the 'output_<timestamp>.txt' of 'run_exp.sh' or the
+        'llm_matching_*.txt' files - the model of a run is taken from the logged response (if available).
+
+        :param path: run log
+        :param dataset: dataset of the runs
+        :param model: model of the runs (if not logged)
+        :param mode: analysis mode of the runs
+        :param true_classes: ground truth class per centroid
+        :return: results (one row per run and signal)
+        """
+        rows = []
+        run_model = model
+        with open(path, "r") as f:
+            lines = [line.strip() for line in f]
+        for i, line in enumerate(lines):
+            if RESPONSE_ID_PATTERN.match(line) and i + 1 < len(lines) and len(lines[i + 1]) > 0:
+                run_model = lines[i + 1]
+            match = PRED_CLASS_PATTERN.match(line)
+            if match:
+                predicted_classes = [self.normalize_class(c) for c in match.group(1).split(",") if c.strip()]
+                rows.append(self.gen_rows(
+                    f"{os.path.basename(path)}:{len(rows)}", dataset, path, run_model, mode, len(rows),
+                    predicted_classes, true_classes, error=None if len(predicted_classes) > 0 else "no predictions"
+                ))
+                run_model = model
+        logger.info("%d runs parsed from %s", len(rows), path)
+        return self.to_frame(rows)
+
+    @staticmethod
+    def save(results: "pd.DataFrame", results_dir: str = EVAL_RESULTS_DIR) -> str:
+        """
+        Appends the results to the store, i.e., writes them as new Parquet file to the results directory.
+
+        :param results: results to be stored
+        :param results_dir: directory of the results store
+        :return: path of the written file
+        """
+        os.makedirs(results_dir, exist_ok=True)
+        path = os.path.join(results_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{uuid.uuid4().hex[:8]}.parquet")
+        results.to_parquet(path, index=False)
+        logger.info("%d rows written to %s", len(results), path)
+        return path
+
+    @staticmethod
+    def load(results_dir: str = EVAL_RESULTS_DIR) -> "pd.DataFrame":
+        """
+        Loads all results of the store.
+
+        :param results_dir: directory of the results store
+        :return: results
+        """
+        import pandas as pd
+        files = sorted(f for f in os.listdir(results_dir) if f.endswith(".parquet"))
+        assert len(files) > 0, f"no results in {results_dir}"
+        results = pd.concat([pd.read_parquet(os.path.join(results_dir, f)) for f in files], ignore_index=True)
+        return results.astype({col: "category" for col in CATEGORICAL_COLUMNS})
+
+    @staticmethod
+    def wilson_interval(successes: "pd.Series", n: "pd.Series", z: float = CONFIDENCE_Z) -> Tuple:
+        """
+        Computes the Wilson score intervals of the specified proportions (vectorized).
+
+        :param successes: number of successes per group
+        :param n: number of trials per group
+        :param z: z-score of the confidence level
+        :return: (lower bounds, upper bounds) - NaN for groups without trials
+        """
+        import numpy as np
+        n = n.astype(float).where(n > 0)
+        p = successes / n
+        center = (p + z ** 2 / (2 * n)) / (1 + z ** 2 / n)
+        margin = z / (1 + z ** 2 / n) * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2))
+        return center - margin, center + margin
+
+    @timed("evaluation_summary")
+    def summarize(self, results: "pd.DataFrame") -> Tuple["pd.DataFrame", "pd.DataFrame"]:
+        """
+        Summarizes the results (vectorized), i.e., per signal the modal prediction and the agreement across the runs
+        (share of runs predicting the modal class), and per dataset and model the accuracy against the ground truth
+        (signals with known ground truth) with its confidence interval, the share of runs matching all signals
+        correctly and the mean agreement.
+
+        :param results: results (one row per run and signal)
+        :return: (summary per dataset, input, model and signal, summary per dataset and model)
+        """
+        keys = ["dataset", "input", "model", "signal"]
+        df = results[results["error"].isna()].copy()
+        df["predicted_class"] = df["predicted_class"].astype(object).fillna("")
+        df["labeled"] = df["true_class"].notna()
+        df["correct"] = df["labeled"] & (df["predicted_class"] == df["true_class"].astype(object))
+
+        votes = df.groupby(keys + ["predicted_class"], observed=True).size().rename("votes").reset_index()
+        votes = votes.sort_values(keys + ["votes"], ascending=[True] * len(keys) + [False])
+        modal = votes.drop_duplicates(keys).set_index(keys)
+        per_signal = df.groupby(keys, observed=True).agg(
+            runs=("run_id", "size"), labeled=("labeled", "sum"), correct=("correct", "sum"),
+            true_class=("true_class", "first")
+        )
+        per_signal["modal_class"] = modal["predicted_class"]
+        per_signal["agreement"] = modal["votes"] / per_signal["runs"]
+        per_signal["accuracy"] = per_signal["correct"] / per_signal["labeled"].where(per_signal["labeled"] > 0)
+        per_signal["ci_low"], per_signal["ci_high"] = self.wilson_interval(
+            per_signal["correct"], per_signal["labeled"]
+        )
+
+        per_run = df.groupby(["dataset", "model", "run_id"], observed=True).agg(
+            labeled=("labeled", "sum"), correct=("correct", "sum")
+        )
+        per_run["all_correct"] = (per_run["labeled"] > 0) & (per_run["correct"] == per_run["labeled"])
+        per_model = per_run.groupby(["dataset", "model"], observed=True).agg(
+            runs=("labeled", "size"), labeled=("labeled", "sum"), correct=("correct", "sum"),
+            all_correct=("all_correct", "mean")
+        )
+        per_model["failed_runs"] = results[results["error"].notna()].groupby(
+            ["dataset", "model"], observed=True
+        )["run_id"].nunique()
+        per_model["failed_runs"] = per_model["failed_runs"].fillna(0).astype(int)
+        per_model["accuracy"] = per_model["correct"] / per_model["labeled"].where(per_model["labeled"] > 0)
+        per_model["ci_low"], per_model["ci_high"] = self.wilson_interval(per_model["correct"], per_model["labeled"])
+        per_model["agreement"] = per_signal.groupby(["dataset", "model"], observed=True)["agreement"].mean()
+        return per_signal.reset_index(), per_model.reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='evaluate repeated LLM matching runs (agreement, accuracy, CIs)')
+    parser.add_argument(
+        '--input', type=str, nargs='*', default=[], help='centroids for LLM processing (new runs) or run logs (--logs)'
+    )
+    parser.add_argument(
+        '--dataset', type=str, nargs='*', default=[],
+        help='dataset (named graph) per input - a single dataset applies to all inputs'
+    )
+    parser.add_argument(
+        "--model", type=str, nargs='+',
+        choices=["o3-2025-04-16", "gpt-4o", "gpt-4.1", "gpt-4.1-2025-04-14", "gpt-4o-mini"],
+        default=["o3-2025-04-16"], help="LLM model(s) to be evaluated"
+    )
+    parser.add_argument('--mode', choices=["ts", "img"], default="ts", help='analysis mode')
+    parser.add_argument('--repetitions', type=int, default=20, help='number of runs per input and model')
+    parser.add_argument('--structured', action='store_true', help='request the predictions as JSON')
+    parser.add_argument(
+        '--truth', type=str, default=None,
+        help='ground truth labels of the centroids (.json), e.g., {"<input>": ["class_1", null, "class_3"]}'
+    )
+    parser.add_argument('--logs', action='store_true', help='parse the inputs as logs of previous runs')
+    parser.add_argument('--max-workers', type=int, default=MAX_CONCURRENT_REQUESTS, help='max concurrent requests')
+    parser.add_argument(
+        '--base-url', type=str, default=None, help='base URL of the Responses API, e.g., the local mock server'
+    )
+    parser.add_argument('--results', type=str, default=EVAL_RESULTS_DIR, help='directory of the results store')
+    parser.add_argument('--no-save', action='store_true', help='only summarize, do not append to the results store')
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default="INFO", help='DEBUG additionally logs the prompts')
+    args = parser.parse_args()
+    assert len(args.dataset) in (0, 1, len(args.input)), "specify a single dataset or one per input"
+    datasets = args.dataset * len(args.input) if len(args.dataset) == 1 else args.dataset or [None] * len(args.input)
+
+    import pandas as pd
+    configure_logging(args.log_level)
+    ground_truth = {}
+    if args.truth is not None:
+        with open(args.truth, "r") as f:
+            ground_truth = json.load(f)
+    evaluation = LLMEvaluation(None, args.max_workers)
+    if len(args.input) == 0:
+        # summary of the stored results
+        res = evaluation.load(args.results)
+    elif args.logs:
+        res = pd.concat([
+            evaluation.parse_log(path, ds, args.model[0], args.mode, ground_truth.get(path))
+            for path, ds in zip(args.input, datasets)
+        ], ignore_index=True)
+    else:
+        evaluation.client = create_client(args.base_url)
+        res = evaluation.run(
+            list(zip(args.input, datasets)), args.model, args.repetitions, args.mode, args.structured, ground_truth
+        )
+    if len(args.input) > 0 and not args.no_save:
+        evaluation.save(res, args.results)
+    signal_summary, model_summary = evaluation.summarize(res)
+    with pd.option_context("display.max_rows", None, "display.width", 200, "display.float_format", "{:.3f}".format):
+        print(signal_summary.drop(columns=["labeled", "correct"]).to_string(index=False))
+        print()
+        print(model_summary.to_string(index=False))
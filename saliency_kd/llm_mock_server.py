@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Optional, Tuple
+
+HOST = "127.0.0.1"
+PORT = 8000
+RESPONSES_PATH = "/v1/responses"
+STATS_PATH = "/stats"
+ERROR_CODES = (429, 500, 503)
+DEFAULT_OUTPUT_TEXT = "signal 1: mock description\nclass_1"
+
+
+class LLMMockServer:
+    """
+    Local stand-in for the OpenAI Responses API, i.e., replays recorded responses (incl. usage) with configurable
+    latency and error rate - for load testing the LLM pipeline offline.
+    """
+
+    def __init__(
+            self, recordings: Optional[str] = None, latency: float = 0.0, jitter: float = 0.0,
+            error_rate: float = 0.0, error_codes: Tuple[int, ...] = ERROR_CODES, seed: Optional[int] = None,
+            host: str = HOST, port: int = PORT
+    ) -> None:
+        """
+        Initializes the mock server.
+
+        :param recordings: recorded responses (JSON lines, see 'llm_client.record_response') replayed round-robin -
+                           a canned response is used if not specified
+        :param latency: mean response latency in seconds
+        :param jitter: max deviation from the mean latency in seconds (uniform)
+        :param error_rate: fraction of requests answered with an error (status drawn from 'error_codes')
+        :param error_codes: HTTP status codes of the injected errors
+        :param seed: random seed (reproducible latencies and errors)
+        :param host: host to bind to
+        :param port: port to bind to (0: any free port)
+        """
+        self.recordings = recordings
+        self.responses = self.load_recordings(recordings) if recordings is not None else [self.canned_response()]
+        self.replay = itertools.cycle(self.responses)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_codes = error_codes
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+        self.server = ThreadingHTTPServer((host, port), self.gen_handler())
+
+    @property
+    def url(self) -> str:
+        """
+        Base URL to be passed to the client factory, e.g., 'http://127.0.0.1:8000/v1'.
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @staticmethod
+    def load_recordings(path: str) -> List[Dict]:
+        """
+        Loads the recorded responses.
+
+        :param path: recordings file ('.jsonl')
+        :return: recorded responses
+        """
+        with open(path, "r") as f:
+            responses = [json.loads(line) for line in f if line.strip()]
+        assert len(responses) > 0, f"no recorded responses in {path}"
+        return responses
+
+    @staticmethod
+    def canned_response() -> Dict:
+        """
+        Generates the canned response used if no recordings are specified.
+
+        :return: response of the Responses API
+        """
+        return {
+            "id": "resp_mock",
+            "object": "response",
+            "created_at": int(time.time()),
+            "status": "completed",
+            "model": "mock",
+            "output": [{
+                "id": "msg_mock",
+                "type": "message",
+                "status": "completed",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": DEFAULT_OUTPUT_TEXT, "annotations": []}]
+            }],
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "temperature": 1.0,
+            "max_output_tokens": None,
+            "usage": {
+                "input_tokens": 5000,
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": 800,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": 5800
+            }
+        }
+
+    @staticmethod
+    def gen_schema_instance(schema: Dict) -> object:
+        """
+        Generates a minimal instance of the specified JSON schema (first enum value, one array item, ...).
+
+        :param schema: JSON schema
+        :return: instance of the schema
+        """
+        if "enum" in schema:
+            return schema["enum"][0]
+        if schema.get("type") == "object":
+            return {
+                key: LLMMockServer.gen_schema_instance(prop) for key, prop in schema.get("properties", {}).items()
+            }
+        if schema.get("type") == "array":
+            return [LLMMockServer.gen_schema_instance(schema.get("items", {}))]
+        return {"string": "mock", "integer": 1, "number": 0.0, "boolean": False}.get(schema.get("type"))
+
+    def next_response(self, model: Optional[str], text_format: Optional[Dict] = None) -> Dict:
+        """
+        Retrieves the next (recorded) response - with a fresh ID and the requested model. The canned response of a
+        structured output request (JSON schema) is an instance of the schema.
+
+        :param model: model of the request
+        :param text_format: requested format of the response ('text.format' of the request)
+        :return: response of the Responses API
+        """
+        with self.lock:
+            response = dict(next(self.replay))
+        response["id"] = "resp_" + uuid.uuid4().hex
+        if model is not None:
+            response["model"] = model
+        if self.recordings is None and text_format is not None and text_format.get("type") == "json_schema":
+            text = json.dumps(self.gen_schema_instance(text_format["schema"]))
+            response["output"] = [{**response["output"][0], "content": [{
+                "type": "output_text", "text": text, "annotations": []
+            }]}]
+        return response
+
+    def draw_delay_and_error(self) -> Tuple[float, Optional[int]]:
+        """
+        Draws the latency and (optionally) the error of a request.
+
+        :return: (latency in seconds, error status code or None)
+        """
+        with self.lock:
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            error = self.rng.choice(self.error_codes) if self.rng.random() < self.error_rate else None
+        return delay, error
+
+    def update_stats(self, key: str, value: int = 1) -> None:
+        """
+        Updates the request statistics (served at '/stats').
+
+        :param key: statistic to be updated, e.g., 'requests'
+        :param value: increment
+        """
+        with self.lock:
+            self.stats[key] += value
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def gen_handler(self) -> type:
+        """
+        Generates the request handler bound to this server.
+
+        :return: request handler class
+        """
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def reply(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self) -> None:
+                if self.path != STATS_PATH:
+                    self.reply(404, {"error": {"message": "not found"}})
+                    return
+                with mock.lock:
+                    stats = dict(mock.stats)
+                self.reply(200, stats)
+
+            def do_POST(self) -> None:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path != RESPONSES_PATH:
+                    self.reply(404, {"error": {"message": "not found"}})
+                    return
+                mock.update_stats("requests")
+                mock.update_stats("in_flight")
+                try:
+                    delay, error = mock.draw_delay_and_error()
+                    time.sleep(delay)
+                    if error is not None:
+                        mock.update_stats("errors")
+                        self.reply(
+                            error, {"error": {"message": "injected error", "type": "mock_error", "code": error}},
+                            {"Retry-After": "0"} if error == 429 else None
+                        )
+                    else:
+                        self.reply(200, mock.next_response(
+                            request.get("model"), (request.get("text") or {}).get("format")
+                        ))
+                finally:
+                    mock.update_stats("in_flight", -1)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
+
+    def start(self) -> "LLMMockServer":
+        """
+        Serves the requests in a background thread (e.g., within a benchmark).
+
+        :return: the mock server
+        """
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='local mock of the OpenAI Responses API (offline load testing)')
+    parser.add_argument('--recordings', type=str, default=None, help='recorded responses to be replayed (.jsonl)')
+    parser.add_argument('--latency', type=float, default=0.0, help='mean response latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='max deviation from the mean latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with an error')
+    parser.add_argument(
+        '--error-codes', type=int, nargs='+', default=list(ERROR_CODES), help='HTTP status codes of the injected errors'
+    )
+    parser.add_argument('--seed', type=int, default=None, help='random seed')
+    parser.add_argument('--host', type=str, default=HOST, help='host to bind to')
+    parser.add_argument('--port', type=int, default=PORT, help='port to bind to')
+    args = parser.parse_args()
+
+    mock_server = LLMMockServer(
+        args.recordings, args.latency, args.jitter, args.error_rate, tuple(args.error_codes), args.seed, args.host,
+        args.port
+    )
+    print("serving the Responses API at", mock_server.url, "- request statistics at", STATS_PATH)
+    try:
+        mock_server.server.serve_forever()
+    except KeyboardInterrupt:
+        mock_server.stop()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import json
+import os
+import socket
+from typing import List, Dict, Tuple, Optional, Union, Callable, TYPE_CHECKING
+
+from saliency_kd.config import LLM_WORKER_SOCKET
+from saliency_kd.llm_analysis import LLMAnalysis
+from saliency_kd.logger import get_logger, configure_logging, LOG_LEVELS
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = get_logger("llm_worker")
+
+# requests / responses are JSON lines - e.g., {"mode": "ts", "input": "...", "model": "...", "dataset": "Mallat",
+# "structured": false} or {"cmd": "refresh" | "stats" | "shutdown"}
+ENCODING = "utf-8"
+READ_LIMIT = 1 << 20
+
+
+class CachedLLMAnalysis(LLMAnalysis):
+    """
+    LLM analysis caching the parsed inputs (centroids) by path and modification time - the encoded images are
+    cached by the image payload builder.
+    """
+
+    def __init__(self, dataset: Optional[str], client) -> None:
+        """
+        Initializes the cached LLM analysis.
+
+        :param dataset: dataset the KG queries are scoped to
+        :param client: (shared) OpenAI client
+        """
+        super().__init__(dataset, client)
+        self.input_cache: Dict[Tuple[str, str, int], Union["np.ndarray", str]] = {}
+
+    def get_cached_input(self, llm_input: str, load: Callable) -> Union["np.ndarray", str]:
+        """
+        Retrieves the parsed input - only loaded again if the file changed.
+
+        :param llm_input: input signals for LLM analysis
+        :param load: loading function, e.g., 'LLMAnalysis.get_centroids_ts'
+        :return: parsed input
+        """
+        key = (load.__name__, os.path.abspath(llm_input), os.stat(llm_input).st_mtime_ns)
+        if key not in self.input_cache:
+            self.input_cache[key] = load(llm_input)
+        return self.input_cache[key]
+
+    def get_centroids_ts(self, llm_input: str) -> "np.ndarray":
+        return self.get_cached_input(llm_input, LLMAnalysis.get_centroids_ts)
+
+
+class LLMWorker:
+    """
+    Long-lived LLM analysis worker serving requests via a Unix socket, i.e., the OpenAI client, the connection pools,
+    the parsed inputs and the KG results are kept warm across invocations (the CLI becomes a thin client).
+    """
+
+    def __init__(self, socket_path: str = LLM_WORKER_SOCKET, base_url: Optional[str] = None) -> None:
+        """
+        Initializes the worker.
+
+        :param socket_path: path of the Unix socket to listen on
+        :param base_url: base URL of the Responses API (e.g., the local mock server) - OpenAI's API if not specified
+        """
+        from saliency_kd.llm_client import create_client
+        self.socket_path = socket_path
+        self.client = create_client(base_url)
+        # dataset -> analysis (sharing the OpenAI client)
+        self.analyses: Dict[Optional[str], CachedLLMAnalysis] = {}
+        # dataset -> (class descriptions, fault information per class)
+        self.kg_results: Dict[Optional[str], Tuple[List[Tuple[str, str]], Dict[str, List[Tuple[str, str, str]]]]] = {}
+        self.stats = {"requests": 0, "errors": 0, "kg_queries": 0}
+        self.server = None
+        self.shutdown = None
+
+    def get_analysis(self, dataset: Optional[str]) -> CachedLLMAnalysis:
+        """
+        Retrieves the (warm) analysis of the specified dataset.
+
+        :param dataset: dataset the KG queries are scoped to
+        :return: LLM analysis
+        """
+        if dataset not in self.analyses:
+            self.analyses[dataset] = CachedLLMAnalysis(dataset, self.client)
+        return self.analyses[dataset]
+
+    async def get_kg_results(
+            self, dataset: Optional[str]
+    ) -> Tuple[List[Tuple[str, str]], Dict[str, List[Tuple[str, str, str]]]]:
+        """
+        Retrieves the class descriptions and fault information of the specified dataset - queried once, afterwards
+        served from memory (until refreshed).
+
+        :param dataset: dataset the KG queries are scoped to
+        :return: (class descriptions, fault information per class)
+        """
+        if dataset not in self.kg_results:
+            import asyncio
+            kgqt = self.get_analysis(dataset).kgqt
+            self.kg_results[dataset] = await asyncio.gather(
+                kgqt.query_all_fault_desc_async(), kgqt.query_all_fault_information_async(verbose=False)
+            )
+            self.stats["kg_queries"] += 2
+        return self.kg_results[dataset]
+
+    async def analyze(
+            self, mode: str, llm_input: str, model: str, dataset: Optional[str], structured: bool = False
+    ) -> Tuple[List[str], List[Tuple[str, str, str]]]:
+        """
+        Analyzes the input signals with the LLM and enriches the predictions with symbolic information from the KG
+        (cf. 'LLMAnalysis.analyze', but with warm clients and cached KG results).
+
+        :param mode: time series analysis ('ts') or image analysis ('img')
+        :param llm_input: input signals for LLM analysis
+        :param model: LLM (OpenAI) model to be used
+        :param dataset: dataset the KG queries are scoped to
+        :param structured: whether the predictions are requested as JSON (structured output)
+        :return: (predicted class per signal, symbolic information obtained from the KG for the predicted classes)
+        """
+        import asyncio
+        llma = self.get_analysis(dataset)
+        name_desc_pairs, fault_info = await self.get_kg_results(dataset)
+        if mode == "img":
+            prompt = llma.gen_prompt_img(llm_input, name_desc_pairs, structured)
+        else:
+            prompt = llma.gen_prompt_ts(llm_input, name_desc_pairs, structured)
+        predicted_classes = await asyncio.get_running_loop().run_in_executor(
+            None, llma.predict, model, prompt, [name for name, _ in name_desc_pairs], structured
+        )
+        return predicted_classes, llma.resolve_fault_information(predicted_classes, fault_info)
+
+    async def handle_request(self, request: Dict) -> Dict:
+        """
+        Handles the specified request.
+
+        :param request: analysis request or command
+        :return: response
+        """
+        cmd = request.get("cmd", "analyze")
+        if cmd == "stats":
+            return {**self.stats, "datasets": [str(d) for d in self.analyses], "cached_inputs": sum(
+                len(llma.input_cache) for llma in self.analyses.values()
+            )}
+        if cmd == "refresh":
+            self.kg_results.clear()
+            for llma in self.analyses.values():
+                llma.input_cache.clear()
+            return {"refreshed": True}
+        if cmd == "shutdown":
+            return {"shutdown": True}
+        self.stats["requests"] += 1
+        try:
+            predicted_classes, additional_info = await self.analyze(
+                request.get("mode", "ts"), request["input"], request["model"], request.get("dataset"),
+                request.get("structured", False)
+            )
+            return {"pred_classes": predicted_classes, "additional_info": additional_info}
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.exception("request failed: %s", request)
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    async def handle_connection(self, reader, writer) -> None:
+        """
+        Serves the requests (JSON lines) of a client connection.
+
+        :param reader: stream reader of the connection
+        :param writer: stream writer of the connection
+        """
+        shutdown = False
+        try:
+            while not shutdown and (line := await reader.readline()):
+                try:
+                    response = await self.handle_request(json.loads(line))
+                except json.JSONDecodeError as e:
+                    response = {"error": f"invalid request: {e}"}
+                writer.write((json.dumps(response) + "\n").encode(ENCODING))
+                await writer.drain()
+                shutdown = response.get("shutdown", False)
+        finally:
+            writer.close()
+            # stopped only after the response is sent, i.e., no request is cancelled
+            if shutdown:
+                self.shutdown.set()
+
+    async def serve(self) -> None:
+        """
+        Listens on the Unix socket until a shutdown request is received.
+        """
+        import asyncio
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+        self.server = await asyncio.start_unix_server(self.handle_connection, self.socket_path, limit=READ_LIMIT)
+        logger.info("LLM worker listening on %s", self.socket_path)
+        self.shutdown = asyncio.Event()
+        try:
+            async with self.server:
+                await self.shutdown.wait()
+        finally:
+            for llma in self.analyses.values():
+                await llma.kgqt.fuseki_connection.close_async_client()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+
+def request_worker(request: Dict, socket_path: str = LLM_WORKER_SOCKET) -> Dict:
+    """
+    Sends the specified request to the worker (thin client).
+
+    :param request: analysis request or command, e.g., {"cmd": "stats"}
+    :param socket_path: path of the worker's Unix socket
+    :return: response
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(request) + "\n").encode(ENCODING))
+        with sock.makefile("r", encoding=ENCODING) as f:
+            return json.loads(f.readline())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='persistent LLM analysis worker (Unix socket, JSON lines)')
+    parser.add_argument('--socket', type=str, default=LLM_WORKER_SOCKET, help='path of the Unix socket')
+    parser.add_argument(
+        '--base-url', type=str, default=None, help='base URL of the Responses API, e.g., the local mock server'
+    )
+    parser.add_argument(
+        '--log-level', choices=LOG_LEVELS, default="INFO",
+        help='INFO logs the responses, DEBUG additionally the prompts'
+    )
+    parser.add_argument('--metrics', type=str, default=None, help='file the metrics are appended to (JSON lines)')
+    parser.add_argument(
+        '--cmd', choices=["stats", "refresh", "shutdown"], default=None,
+        help='send the command to the running worker instead of starting one'
+    )
+    args = parser.parse_args()
+
+    if args.cmd is not None:
+        print(request_worker({"cmd": args.cmd}, args.socket))
+    else:
+        import asyncio
+        configure_logging(args.log_level, args.metrics)
+        asyncio.run(LLMWorker(args.socket, args.base_url).serve())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import json
+import logging
+import sys
+from typing import Optional, Any
+
+ROOT_LOGGER = "saliency_kd"
+METRICS_LOGGER = ROOT_LOGGER + ".metrics"
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+LOG_FORMAT = "%(message)s"
+SEPARATOR = "-----------------------------------------------------"
+
+metrics_logger = logging.getLogger(METRICS_LOGGER)
+# metrics are only recorded when a sink is configured
+metrics_logger.propagate = False
+metrics_logger.setLevel(logging.CRITICAL + 1)
+
+
+class JsonMetricsFormatter(logging.Formatter):
+    """
+    Formats metric records as JSON lines, e.g., {"time": ..., "event": "llm_response", "latency_s": 3.2, ...}.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Formats the specified metric record.
+
+        :param record: metric record (metrics in 'record.metrics')
+        :return: JSON line
+        """
+        return json.dumps({"time": round(record.created, 3), "event": record.getMessage(), **record.metrics})
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Returns the logger of the specified module (child of the package logger, also when run as script).
+
+    :param name: module name, e.g., 'llm_analysis'
+    :return: logger
+    """
+    return logging.getLogger(ROOT_LOGGER + "." + name)
+
+
+def configure_logging(level: str = "WARNING", metrics_file: Optional[str] = None) -> None:
+    """
+    Configures the package logging, i.e., the level of the (stdout) log and, optionally, the JSON metrics sink.
+
+    :param level: log level, e.g., 'INFO' - prompts and queries are only logged on 'DEBUG'
+    :param metrics_file: file the metrics (latency, token usage, payload bytes) are appended to as JSON lines
+    """
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    if not root.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+    if metrics_file is not None:
+        handler = logging.FileHandler(metrics_file)
+        handler.setFormatter(JsonMetricsFormatter())
+        metrics_logger.addHandler(handler)
+        metrics_logger.setLevel(logging.INFO)
+
+
+def metrics_enabled() -> bool:
+    """
+    Checks whether a metrics sink is configured - expensive metrics (e.g., payload sizes) should only be computed
+    if this is the case.
+
+    :return: whether metrics are recorded
+    """
+    return metrics_logger.isEnabledFor(logging.INFO)
+
+
+def log_metrics(event: str, **metrics) -> None:
+    """
+    Records the specified metrics in the JSON sink (no-op if none is configured).
+
+    :param event: name of the event, e.g., 'kg_query'
+    :param metrics: JSON serializable metrics, e.g., latency_s=0.02
+    """
+    if metrics_enabled():
+        metrics_logger.info(event, extra={"metrics": metrics})
+
+
+def json_size(obj: Any) -> int:
+    """
+    Size of the JSON serialization of the specified object, e.g., the payload of an LLM request.
+
+    :param obj: JSON serializable object
+    :return: number of bytes
+    """
+    return len(json.dumps(obj).encode())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+SIGNAL_CHANNEL = 0
+SALIENCY_CHANNEL = 1
+
+
+def znorm_channels(tensor: np.ndarray, channels: Sequence[int] = (SALIENCY_CHANNEL,)) -> np.ndarray:
+    """
+    Z-normalizes the specified channels of each time series in place (cf. 'TimeSeriesScalerMeanVariance', i.e.,
+    NaN-aware statistics, constant series are only centered).
+
+    :param tensor: time series of shape (n, len, d)
+    :param channels: channels to be normalized
+    :return: normalized tensor (same array)
+    """
+    for channel in channels:
+        # strided view, i.e., normalized in place
+        values = tensor[:, :, channel]
+        mean = np.nanmean(values, axis=1, keepdims=True, dtype=np.float64)
+        std = np.nanstd(values, axis=1, keepdims=True, dtype=np.float64)
+        std[std == 0.] = 1.
+        np.subtract(values, mean, out=values, casting="unsafe")
+        np.divide(values, std, out=values, casting="unsafe")
+    return tensor
+
+
+def valid_saliency_indices(saliency_maps: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Determines the indices of the valid saliency maps - NaN maps (constant attribution, min-max normalized) can't
+    be clustered.
+
+    :param saliency_maps: saliency maps, one per signal
+    :return: indices of the valid saliency maps
+    """
+    return np.array(
+        [i for i, saliency_map in enumerate(saliency_maps) if not np.isnan(saliency_map[0])], dtype=np.int64
+    )
+
+
+def build_multivariate_tensor(
+        signals: np.ndarray, saliency_maps: Union[np.ndarray, Dict[str, np.ndarray], Iterable[np.ndarray]],
+        znorm: Sequence[int] = (SALIENCY_CHANNEL,), drop_nan: bool = True, out: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Builds the multivariate (signal + saliency map) time series in the (n, len, 2) layout used by tslearn, i.e.,
+    the signals and saliency maps are written into one preallocated contiguous float32 array and normalized in place
+    (replaces the object array of [signal, saliency map] pairs of 'saliency_kd.ipynb' and its transposition).
+
+    :param signals: signals of shape (n, len) or (n, 1, len), e.g., the test signals
+    :param saliency_maps: saliency maps (one per signal), e.g., the 'var_attr_maps' dictionary of the notebook
+    :param znorm: channels that are z-normalized (per time series), e.g., (1,) for Z_NORM_SALIENCY_MAPS
+    :param drop_nan: whether signals with NaN saliency maps are dropped
+    :param out: optional preallocated output array of shape (m, len, 2), float32
+    :return: (multivariate time series of shape (m, len, 2), indices of the used signals)
+    """
+    if isinstance(saliency_maps, dict):
+        saliency_maps = saliency_maps.values()
+    if not isinstance(saliency_maps, np.ndarray):
+        # references only - materialized once, not per sample
+        saliency_maps = list(saliency_maps)
+    assert len(signals) == len(saliency_maps)
+    indices = valid_saliency_indices(saliency_maps) if drop_nan else np.arange(len(signals))
+    sample_len = np.shape(signals[0])[-1]
+    if out is None:
+        out = np.empty((len(indices), sample_len, 2), dtype=np.float32)
+    assert out.shape == (len(indices), sample_len, 2) and out.dtype == np.float32
+    for row, idx in enumerate(indices):
+        out[row, :, SIGNAL_CHANNEL] = np.reshape(signals[idx], -1)
+        out[row, :, SALIENCY_CHANNEL] = np.reshape(saliency_maps[idx], -1)
+    return znorm_channels(out, znorm), indices
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import cProfile
+import functools
+import inspect
+import json
+import platform
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Callable, Iterator, Optional
+
+# stage name -> {'calls': int, 'total_s': float, 'max_s': float}
+STAGES: Dict[str, Dict] = {}
+# counter name (e.g., 'http_calls', 'bytes_received', 'input_tokens') -> value
+COUNTERS: Dict[str, int] = {}
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Times the enclosed block and accumulates the duration for the specified stage, e.g.:
+        with stage("kg_query"):
+            ...
+
+    :param name: name of the stage, e.g., 'kg_query', 'prompt_building', 'llm_request', 'dtw_assignment'
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        entry = STAGES.get(name)
+        if entry is None:
+            entry = STAGES[name] = {'calls': 0, 'total_s': 0.0, 'max_s': 0.0}
+        entry['calls'] += 1
+        entry['total_s'] += duration
+        entry['max_s'] = max(entry['max_s'], duration)
+
+
+def timed(name: str) -> Callable:
+    """
+    Decorator timing each call of the decorated function (or coroutine function) as the specified stage.
+
+    :param name: name of the stage
+    :return: decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name: str, value: int = 1) -> None:
+    """
+    Increments the specified counter.
+
+    :param name: name of the counter, e.g., 'http_calls', 'bytes_sent', 'bytes_received', 'output_tokens'
+    :param value: increment
+    """
+    COUNTERS[name] = COUNTERS.get(name, 0) + value
+
+
+def reset() -> None:
+    """
+    Resets all stages and counters, e.g., between benchmark runs.
+    """
+    STAGES.clear()
+    COUNTERS.clear()
+
+
+def summary_table() -> str:
+    """
+    Generates the per-stage summary table (sorted by total time) followed by the counters.
+
+    :return: summary table
+    """
+    lines = [f"{'stage':<32} {'calls':>8} {'total [s]':>12} {'mean [ms]':>12} {'max [ms]':>12}"]
+    for name, entry in sorted(STAGES.items(), key=lambda item: -item[1]['total_s']):
+        lines.append(
+            f"{name:<32} {entry['calls']:>8} {entry['total_s']:>12.3f} "
+            f"{entry['total_s'] / entry['calls'] * 1000:>12.2f} {entry['max_s'] * 1000:>12.2f}"
+        )
+    for name, value in sorted(COUNTERS.items()):
+        lines.append(f"{name:<32} {value:>8}")
+    return "\n".join(lines)
+
+
+def report() -> Dict:
+    """
+    Machine-readable profile report (e.g., to be diffed between versions).
+
+    :return: stages, counters and environment information
+    """
+    return {
+        "time": round(time.time(), 3),
+        "argv": sys.argv,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "stages": {name: dict(entry) for name, entry in sorted(STAGES.items())},
+        "counters": dict(sorted(COUNTERS.items()))
+    }
+
+
+def write_report(path: str) -> None:
+    """
+    Writes the profile report to the specified JSON file.
+
+    :param path: JSON file
+    """
+    with open(path, "w") as f:
+        json.dump(report(), f, indent=2)
+
+
+@contextmanager
+def cprofile(path: Optional[str]) -> Iterator[None]:
+    """
+    Optionally runs the enclosed block under cProfile and dumps the statistics to the specified file (to be inspected
+    with, e.g., 'python -m pstats' or snakeviz). For sampling without instrumentation overhead, use py-spy instead:
+    'py-spy record -o profile.svg -- python saliency_kd/llm_analysis.py ...'.
+
+    :param path: file the cProfile statistics are dumped to ('.prof') - profiling is disabled if none is specified
+    """
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Optional, TYPE_CHECKING
+
+from saliency_kd.llm_analysis import LLMAnalysis, INIT_PROMPT, MODE_PROMPT_TS, PROMPT_APPENDIX
+from saliency_kd.llm_client import create_client
+from saliency_kd.logger import get_logger, configure_logging, LOG_LEVELS, SEPARATOR
+from saliency_kd.profiling import timed, count
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+logger = get_logger("prompt_batching")
+
+# max (estimated) input tokens per request and max signals per request (bounds the length of the response)
+TOKEN_BUDGET = 16000
+MAX_SIGNALS_PER_REQUEST = 16
+MAX_CONCURRENT_REQUESTS = 4
+# conservative estimate for the serialized signals (e.g., '-0.87 ' ~ 3 tokens) - no tokenizer required
+CHARS_PER_TOKEN = 3
+PREDICTIONS_MARKER = "PREDICTIONS:"
+BATCH_END_NOTE = ("\nEnd the response with a line '" + PREDICTIONS_MARKER + "' followed by one line per signal in the"
+                  " form 'signal <number>: <predicted class>' - the class exactly in the above notation.")
+PREDICTION_PATTERN = re.compile(r"^\W*signal\s+(\d+)\W*\s*[:\-]\s*(.+?)\s*$", re.IGNORECASE)
+
+
+class PromptBatchPlanner:
+    """
+    Packs the centroids of multiple inputs into as few LLM requests as fit the token budget. All requests of a dataset
+    share the same preamble (class descriptions and instructions), i.e., the provider-side prompt caching can hit, and
+    the multi-line answers are parsed back into per-input predictions.
+    """
+
+    def __init__(self, token_budget: int = TOKEN_BUDGET, max_signals: int = MAX_SIGNALS_PER_REQUEST) -> None:
+        """
+        Initializes the batch planner.
+
+        :param token_budget: max (estimated) number of input tokens per request
+        :param max_signals: max number of signals per request
+        """
+        self.token_budget = token_budget
+        self.max_signals = max_signals
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """
+        Estimates the number of tokens of the specified text.
+
+        :param text: text to be estimated
+        :return: (over-)estimated number of tokens
+        """
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+    @staticmethod
+    def gen_preamble(name_desc_pairs: List[Tuple[str, str]]) -> str:
+        """
+        Generates the preamble shared by all requests of a dataset (identical prefix for prompt caching).
+
+        :param name_desc_pairs: class descriptions of the dataset
+        :return: preamble
+        """
+        return (INIT_PROMPT + LLMAnalysis.gen_class_prompt(name_desc_pairs) + MODE_PROMPT_TS + PROMPT_APPENDIX
+                + BATCH_END_NOTE)
+
+    @timed("prompt_building")
+    def plan(
+            self, inputs: List[Tuple[str, Optional[str]]], class_descs: Dict[Optional[str], List[Tuple[str, str]]]
+    ) -> List[Dict]:
+        """
+        Packs the signals of the specified inputs into requests (per dataset, in input order).
+
+        :param inputs: (input signals ('.npy'), dataset) pairs
+        :param class_descs: class descriptions per dataset
+        :return: batches - {'dataset': ..., 'preamble': ..., 'signals': [(input, signal idx, serialized signal)],
+                 'tokens': estimated number of input tokens}
+        """
+        batches = []
+        for dataset in dict.fromkeys(dataset for _, dataset in inputs):
+            preamble = self.gen_preamble(class_descs[dataset])
+            preamble_tokens = self.estimate_tokens(preamble)
+            batch = None
+            for llm_input in dict.fromkeys(llm_input for llm_input, ds in inputs if ds == dataset):
+                for idx, signal in enumerate(LLMAnalysis.get_centroids_ts(llm_input)):
+                    text = LLMAnalysis.serialize_signal(signal)
+                    # + header of the signal ('signal <n>:') and the separating blank lines
+                    tokens = self.estimate_tokens(text) + 5
+                    if batch is None or len(batch['signals']) >= self.max_signals or (
+                            len(batch['signals']) > 0 and batch['tokens'] + tokens > self.token_budget
+                    ):
+                        batch = {'dataset': dataset, 'preamble': preamble, 'signals': [], 'tokens': preamble_tokens}
+                        batches.append(batch)
+                    batch['signals'].append((llm_input, idx, text))
+                    batch['tokens'] += tokens
+        for batch in batches:
+            if batch['tokens'] > self.token_budget:
+                logger.warning("request exceeds the token budget (%d > %d)", batch['tokens'], self.token_budget)
+        count("batched_signals", sum(len(batch['signals']) for batch in batches))
+        return batches
+
+    @staticmethod
+    def gen_prompt(batch: Dict) -> List[Dict]:
+        """
+        Generates the prompt of the specified batch.
+
+        :param batch: batch of signals
+        :return: prompt for GPT model
+        """
+        str_signals = "\n\n".join(f"signal {i + 1}:\n{text}" for i, (_, _, text) in enumerate(batch['signals']))
+        prompt = batch['preamble'] + "\n\n" + str_signals
+        logger.debug("%s\nprompt..\n%s\n%s", SEPARATOR, prompt, SEPARATOR)
+        return [{"role": "user", "content": [{"type": "input_text", "text": prompt}]}]
+
+    @staticmethod
+    def parse_predictions(response: str, batch: Dict) -> Dict[str, Dict[int, Optional[str]]]:
+        """
+        Parses the per-signal predictions of the specified response (following the last predictions marker, or the
+        whole response if there is none - later lines take precedence).
+
+        :param response: complete GPT response string
+        :param batch: batch the response belongs to
+        :return: prediction (None if missing) per signal idx per input
+        """
+        lines = response.splitlines()
+        start = max([i for i, line in enumerate(lines) if PREDICTIONS_MARKER.lower() in line.lower()], default=0)
+        predictions = {}
+        for line in lines[start:]:
+            match = PREDICTION_PATTERN.match(line)
+            if match:
+                predictions[int(match.group(1))] = match.group(2).strip("*` ")
+        res = {}
+        for i, (llm_input, idx, _) in enumerate(batch['signals']):
+            res.setdefault(llm_input, {})[idx] = predictions.get(i + 1)
+        missing = sum(1 for i in range(len(batch['signals'])) if i + 1 not in predictions)
+        if missing > 0:
+            logger.warning("%d of %d predictions missing in the response", missing, len(batch['signals']))
+            count("missing_predictions", missing)
+        return res
+
+    def run(
+            self, inputs: List[Tuple[str, Optional[str]]], model: str, client: Optional["OpenAI"] = None,
+            max_workers: int = MAX_CONCURRENT_REQUESTS
+    ) -> Dict[str, List[Optional[str]]]:
+        """
+        Classifies the signals of the specified inputs in as few requests as possible. The first request of each
+        dataset is sent before the others, i.e., the remaining ones can hit the cached preamble.
+
+        :param inputs: (input signals ('.npy'), dataset) pairs
+        :param model: LLM (OpenAI) model to be used
+        :param client: OpenAI client (see 'llm_client.create_client')
+        :param max_workers: max number of concurrent requests
+        :return: predicted class (None if missing) per signal per input
+        """
+        client = client if client is not None else create_client()
+        analyses = {dataset: LLMAnalysis(dataset, client) for dataset in dict.fromkeys(ds for _, ds in inputs)}
+        class_descs = {dataset: llma.kgqt.query_all_fault_desc() for dataset, llma in analyses.items()}
+        batches = self.plan(inputs, class_descs)
+        logger.info(
+            "%d signals of %d inputs in %d requests", sum(len(b['signals']) for b in batches), len(inputs), len(batches)
+        )
+
+        def request(batch: Dict) -> str:
+            return analyses[batch['dataset']].request_gpt(model, self.gen_prompt(batch))
+
+        first = {}
+        for i, batch in enumerate(batches):
+            first.setdefault(batch['dataset'], i)
+        with ThreadPoolExecutor(max_workers) as executor:
+            responses = dict(zip(first.values(), executor.map(request, [batches[i] for i in first.values()])))
+            rest = [i for i in range(len(batches)) if i not in responses]
+            responses.update(zip(rest, executor.map(request, [batches[i] for i in rest])))
+
+        predictions: Dict[str, Dict[int, Optional[str]]] = {llm_input: {} for llm_input, _ in inputs}
+        for i, batch in enumerate(batches):
+            for llm_input, preds in self.parse_predictions(responses[i], batch).items():
+                predictions[llm_input].update(preds)
+        return {llm_input: [preds[idx] for idx in sorted(preds)] for llm_input, preds in predictions.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='classify the centroids of multiple inputs in batched LLM requests')
+    parser.add_argument('--input', type=str, nargs='+', required=True, help='centroids for LLM processing (.npy)')
+    parser.add_argument(
+        '--dataset', type=str, nargs='*', default=[],
+        help='dataset (named graph) per input - a single dataset applies to all inputs'
+    )
+    parser.add_argument(
+        "--model",
+        choices=["o3-2025-04-16", "gpt-4o", "gpt-4.1", "gpt-4.1-2025-04-14", "gpt-4o-mini"],
+        default="o3-2025-04-16",
+        help="choose LLM model between o3-2025-04-16 (default), gpt-4o, gpt-4.1, gpt-4.1-2025-04-14 and gpt-4o-mini"
+    )
+    parser.add_argument('--token-budget', type=int, default=TOKEN_BUDGET, help='max input tokens per request')
+    parser.add_argument('--max-signals', type=int, default=MAX_SIGNALS_PER_REQUEST, help='max signals per request')
+    parser.add_argument(
+        '--base-url', type=str, default=None, help='base URL of the Responses API, e.g., the local mock server'
+    )
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default="INFO", help='DEBUG additionally logs the prompts')
+    parser.add_argument('--metrics', type=str, default=None, help='file the metrics are appended to (JSON lines)')
+    args = parser.parse_args()
+    assert len(args.dataset) in (0, 1, len(args.input)), "specify a single dataset or one per input"
+    datasets = args.dataset * len(args.input) if len(args.dataset) == 1 else args.dataset or [None] * len(args.input)
+
+    configure_logging(args.log_level, args.metrics)
+    planner = PromptBatchPlanner(args.token_budget, args.max_signals)
+    res = planner.run(list(zip(args.input, datasets)), args.model, create_client(args.base_url))
+    for input_path, predicted_classes in res.items():
+        print(input_path + ":", ", ".join(str(pred) for pred in predicted_classes))
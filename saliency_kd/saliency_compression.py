@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import os
+from typing import Dict, Optional, Tuple
+
+import joblib
+import numpy as np
+
+from saliency_kd.clustering_metrics import clustering_scores
+from saliency_kd.profiling import timed
+
+METHODS = ["paa", "topk", "pca"]
+N_SEGMENTS = 32  # PAA segments (paa, topk)
+TOP_K = 8  # segments kept per saliency map (topk)
+N_COMPONENTS = 16  # PCA basis size (pca)
+SEED = 42
+N_INIT = 5
+
+
+def segment_bounds(sz: int, n_segments: int) -> np.ndarray:
+    """
+    Determines the bounds of the (almost) equal-width PAA segments.
+
+    :param sz: length of the time series
+    :param n_segments: number of segments
+    :return: segment bounds, shape (n_segments + 1,)
+    """
+    assert 0 < n_segments <= sz
+    return np.linspace(0, sz, n_segments + 1).round().astype(np.int64)
+
+
+def paa(maps: np.ndarray, n_segments: int) -> np.ndarray:
+    """
+    Piecewise aggregate approximation (mean per segment) of the specified saliency maps.
+
+    :param maps: saliency maps of shape (n, sz)
+    :param n_segments: number of segments
+    :return: PAA coefficients of shape (n, n_segments)
+    """
+    bounds = segment_bounds(maps.shape[1], n_segments)
+    return np.add.reduceat(np.asarray(maps, dtype=np.float64), bounds[:-1], axis=1) / np.diff(bounds)
+
+
+def paa_reconstruct(coefficients: np.ndarray, sz: int) -> np.ndarray:
+    """
+    Reconstructs the (piecewise constant) saliency maps from the PAA coefficients.
+
+    :param coefficients: PAA coefficients of shape (n, n_segments)
+    :param sz: length of the time series
+    :return: reconstructed saliency maps of shape (n, sz)
+    """
+    return np.repeat(coefficients, np.diff(segment_bounds(sz, coefficients.shape[1])), axis=1)
+
+
+class SaliencyCompressor:
+    """
+    Compact representation of the saliency maps - after ReLU and normalization most of the mass sits in a few
+    regions, i.e., the maps are well approximated by
+        - 'paa': the segment means (piecewise aggregate approximation),
+        - 'topk': the k most salient PAA segments per map (sparse: segment indices + values, remaining segments 0),
+        - 'pca': the coefficients w.r.t. a PCA basis fitted per dataset.
+    The reduced features are scaled such that their Euclidean distances approximate (PAA: lower-bound) the
+    Euclidean distances of the dense maps, i.e., the distance computations (elbow, clustering, metrics) can run in
+    the reduced space.
+    """
+
+    def __init__(
+            self, method: str = "paa", n_segments: int = N_SEGMENTS, top_k: int = TOP_K,
+            n_components: int = N_COMPONENTS
+    ) -> None:
+        """
+        Initializes the saliency compressor.
+
+        :param method: compact representation, i.e., 'paa', 'topk' or 'pca'
+        :param n_segments: number of PAA segments ('paa', 'topk')
+        :param top_k: number of segments kept per map ('topk')
+        :param n_components: size of the PCA basis ('pca')
+        """
+        assert method in METHODS
+        self.method = method
+        self.n_segments = n_segments
+        self.top_k = top_k
+        self.n_components = n_components
+        self.sz = None
+        # PCA basis (fitted per dataset)
+        self.mean = None
+        self.components = None
+        self.explained_variance_ratio = None
+
+    @timed("saliency_compression_fit")
+    def fit(self, maps: np.ndarray) -> "SaliencyCompressor":
+        """
+        Fits the compressor to the saliency maps of a dataset (PCA basis; PAA and top-k only record the length).
+
+        :param maps: saliency maps of shape (n, sz)
+        :return: fitted compressor
+        """
+        maps = np.asarray(maps, dtype=np.float64)
+        self.sz = maps.shape[1]
+        if self.method == "pca":
+            self.mean = maps.mean(axis=0)
+            _, singular_values, vt = np.linalg.svd(maps - self.mean, full_matrices=False)
+            self.components = vt[:self.n_components]
+            variance = singular_values ** 2
+            self.explained_variance_ratio = variance[:self.n_components] / variance.sum()
+        return self
+
+    def transform(self, maps: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Compresses the specified saliency maps.
+
+        :param maps: saliency maps of shape (n, sz)
+        :return: (coefficients, segment indices ('topk' only, else None)) - coefficients of shape (n, n_segments),
+                 (n, top_k) or (n, n_components)
+        """
+        assert self.sz == maps.shape[1], "compressor not fitted to the length of the maps"
+        if self.method == "pca":
+            return (np.asarray(maps, dtype=np.float64) - self.mean) @ self.components.T, None
+        coefficients = paa(maps, self.n_segments)
+        if self.method == "paa":
+            return coefficients, None
+        # k most salient segments, ordered by position
+        indices = np.sort(np.argpartition(-coefficients, self.top_k - 1, axis=1)[:, :self.top_k], axis=1)
+        return np.take_along_axis(coefficients, indices, axis=1), indices.astype(np.uint16)
+
+    def inverse_transform(self, coefficients: np.ndarray, indices: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Reconstructs the (dense) saliency maps from the compact representation.
+
+        :param coefficients: coefficients (see 'transform')
+        :param indices: segment indices ('topk')
+        :return: reconstructed saliency maps of shape (n, sz)
+        """
+        if self.method == "pca":
+            return coefficients @ self.components + self.mean
+        return paa_reconstruct(self.densify(coefficients, indices), self.sz)
+
+    def densify(self, coefficients: np.ndarray, indices: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Scatters the top-k coefficients into the PAA segments (remaining segments 0).
+
+        :param coefficients: coefficients (see 'transform')
+        :param indices: segment indices ('topk')
+        :return: PAA coefficients of shape (n, n_segments)
+        """
+        if indices is None:
+            return coefficients
+        dense = np.zeros((len(coefficients), self.n_segments))
+        np.put_along_axis(dense, indices.astype(np.int64), coefficients, axis=1)
+        return dense
+
+    def features(self, maps: np.ndarray) -> np.ndarray:
+        """
+        Reduced features of the specified saliency maps, i.e., the input for the distance computations - the PAA
+        coefficients are weighted by the square root of their segment widths (Euclidean lower bound).
+
+        :param maps: saliency maps of shape (n, sz)
+        :return: reduced features of shape (n, n_features)
+        """
+        coefficients, indices = self.transform(maps)
+        if self.method == "pca":
+            return coefficients
+        return self.densify(coefficients, indices) * np.sqrt(np.diff(segment_bounds(self.sz, self.n_segments)))
+
+    def n_bytes(self, n: int) -> int:
+        """
+        Storage size of the compact representation of n saliency maps (float32 coefficients, uint16 indices).
+
+        :param n: number of saliency maps
+        :return: number of bytes (including the PCA basis)
+        """
+        if self.method == "pca":
+            return 4 * (n * self.n_components + (self.n_components + 1) * self.sz)
+        if self.method == "topk":
+            return n * self.top_k * (4 + 2)
+        return 4 * n * self.n_segments
+
+    def reconstruction_report(self, maps: np.ndarray) -> Dict:
+        """
+        Reports the reconstruction error and the compression of the specified saliency maps.
+
+        :param maps: saliency maps of shape (n, sz)
+        :return: {'rmse': ..., 'relative_error': ..., 'compression_ratio': ..., ...}
+        """
+        maps = np.asarray(maps, dtype=np.float64)
+        residuals = maps - self.inverse_transform(*self.transform(maps))
+        rel_errors = np.linalg.norm(residuals, axis=1) / np.maximum(np.linalg.norm(maps, axis=1), 1e-12)
+        report = {
+            "method": self.method,
+            "n": len(maps),
+            "rmse": float(np.sqrt(np.mean(residuals ** 2))),
+            "relative_error": float(np.mean(rel_errors)),
+            "max_relative_error": float(np.max(rel_errors)),
+            "compression_ratio": 4 * maps.size / self.n_bytes(len(maps))
+        }
+        if self.method == "pca":
+            report["explained_variance"] = float(self.explained_variance_ratio.sum())
+        return report
+
+
+def labels_per_signal(pred_labels: np.ndarray, gt_labels_per_cluster: Dict[int, list]) -> np.ndarray:
+    """
+    Assigns the ground truth labels stored per cluster to the clustered signals (in signal order).
+
+    :param pred_labels: cluster assignment of each signal, shape (n,)
+    :param gt_labels_per_cluster: ground truth labels per cluster (in signal order)
+    :return: ground truth label of each signal, shape (n,)
+    """
+    pred_labels = np.asarray(pred_labels)
+    labels_true = np.empty(len(pred_labels), dtype=np.int64)
+    for cluster, labels in gt_labels_per_cluster.items():
+        labels_true[pred_labels == cluster] = labels
+    return labels_true
+
+
+def reduce_channels(series: np.ndarray, compressor: SaliencyCompressor) -> np.ndarray:
+    """
+    Reduced features of each channel of the specified series - one compressor (e.g., PCA basis) with the settings of
+    the specified one is fitted per channel.
+
+    :param series: series of shape (n, sz) or (n, sz, d), e.g., signal + saliency map
+    :param compressor: compressor providing the settings (method, segments, top-k, components)
+    :return: reduced features of shape (n, n_features, d)
+    """
+    series = np.asarray(series, dtype=np.float64)
+    series = series[:, :, np.newaxis] if series.ndim == 2 else series
+    features = []
+    for channel in range(series.shape[2]):
+        channel_compressor = SaliencyCompressor(
+            compressor.method, compressor.n_segments, compressor.top_k, compressor.n_components
+        ).fit(series[:, :, channel])
+        features.append(channel_compressor.features(series[:, :, channel]))
+    return np.stack(features, axis=-1)
+
+
+@timed("saliency_compression_compare")
+def compare_clustering(
+        series: np.ndarray, labels_pred: np.ndarray, labels_true: np.ndarray, k: int,
+        compressor: SaliencyCompressor, n_init: int = N_INIT
+) -> Dict:
+    """
+    Compares the clustering of the artifact (DTW k-means of the dense series) with the clustering of the reduced
+    series w.r.t. the ground truth (ARI / NMI) and their agreement. PAA and top-k features are (shorter) time series,
+    i.e., they are clustered by DTW k-means as well (constrained as configured, see 'configure_dtw'); the PCA
+    coefficients have no temporal order and are clustered by (Euclidean) k-means.
+
+    :param series: clustered series of the artifact, shape (n, sz) or (n, sz, d), e.g., signal + saliency map
+    :param labels_pred: cluster assignment of the artifact, shape (n,)
+    :param labels_true: ground truth labels, shape (n,)
+    :param k: number of clusters
+    :param compressor: compressor providing the settings of the reduced representation
+    :param n_init: number of k-means runs
+    :return: {'dense_ari': ..., 'reduced_ari': ..., 'dense_nmi': ..., 'reduced_nmi': ..., 'agreement_ari': ...}
+    """
+    features = reduce_channels(series, compressor)
+    if compressor.method == "pca":
+        from sklearn.cluster import KMeans
+        reduced = KMeans(n_clusters=k, n_init=n_init, random_state=SEED).fit_predict(
+            features.reshape(len(features), -1)
+        )
+    else:
+        from tslearn.clustering import TimeSeriesKMeans
+        from saliency_kd.dtw_distance import get_dtw_config
+        reduced = TimeSeriesKMeans(
+            n_clusters=k, n_init=n_init, metric="dtw", metric_params=get_dtw_config().tslearn_params(features.shape[1]),
+            random_state=SEED
+        ).fit_predict(features)
+    labels_pred = np.asarray(labels_pred)
+    dense_scores, reduced_scores = clustering_scores(labels_true, labels_pred), clustering_scores(labels_true, reduced)
+    return {
+        "dense_ari": dense_scores["ari"], "reduced_ari": reduced_scores["ari"],
+        "dense_nmi": dense_scores["nmi"], "reduced_nmi": reduced_scores["nmi"],
+        "agreement_ari": clustering_scores(labels_pred, reduced)["ari"]
+    }
+
+
+def load_clustering(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Loads the clustered series and the cluster assignment of the specified clustering artifact.
+
+    :param path: clustering artifact (model, pred_labels, ground_truth_per_cluster, centroids, clustered_signals)
+    :return: (series of shape (n, sz) or (n, sz, d), cluster assignment, ground truth labels, k)
+    """
+    _, pred_labels, gt_labels_per_cluster, centroids, signals = joblib.load(path, mmap_mode="r")
+    pred_labels = np.asarray(pred_labels)
+    return np.asarray(signals), pred_labels, labels_per_signal(pred_labels, gt_labels_per_cluster), len(centroids)
+
+
+def saliency_channel(series: np.ndarray) -> np.ndarray:
+    """
+    Saliency maps of the clustered series - the saliency channel of multivariate clusterings or the signals of
+    saliency clusterings ('dba_km_saliency_*.pkl').
+
+    :param series: clustered series of shape (n, sz) or (n, sz, 2)
+    :return: saliency maps of shape (n, sz)
+    """
+    return series[:, :, 1] if series.ndim == 3 else series
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='compact (PAA / top-k / PCA) representation of the saliency maps')
+    parser.add_argument(
+        '--input', type=str, nargs='+', required=True,
+        help='clustering artifacts, e.g., trained_models/multivariate_Mallat_class_0_znorm_len_256.pkl'
+    )
+    parser.add_argument('--method', choices=METHODS, nargs='+', default=METHODS, help='compact representation(s)')
+    parser.add_argument('--segments', type=int, default=N_SEGMENTS, help='number of PAA segments (paa, topk)')
+    parser.add_argument('--top-k', type=int, default=TOP_K, help='segments kept per saliency map (topk)')
+    parser.add_argument('--components', type=int, default=N_COMPONENTS, help='size of the PCA basis (pca)')
+    parser.add_argument(
+        '--compare', action='store_true',
+        help="compare the ARI / NMI of the artifact's clustering and the clustering of the reduced series"
+    )
+    args = parser.parse_args()
+
+    for artifact in args.input:
+        clustered_series, pred, gt_labels, n_clusters = load_clustering(artifact)
+        saliency_maps = saliency_channel(clustered_series)
+        print(os.path.basename(artifact), saliency_maps.shape)
+        for m in args.method:
+            comp = SaliencyCompressor(m, args.segments, args.top_k, args.components).fit(saliency_maps)
+            res = comp.reconstruction_report(saliency_maps)
+            if args.compare:
+                res.update(compare_clustering(clustered_series, pred, gt_labels, n_clusters, comp))
+            print("\t" + ", ".join(
+                f"{key}: {val:.3f}" if isinstance(val, float) else f"{key}: {val}" for key, val in res.items()
+            ))
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import time
+from typing import List, Dict, Tuple, Optional
+
+import joblib
+import numpy as np
+import torch
+from tsai.all import get_attribution_map
+from tsai.models.XCMPlus import XCMPlus
+from tslearn.preprocessing import TimeSeriesResampler, TimeSeriesScalerMeanVariance
+
+from saliency_kd.config import FUSEKI_URL
+from saliency_kd.dtw_distance import (
+    to_time_series_dataset, keogh_envelope, nearest_centroid, get_dtw_config, DTWConfig
+)
+from saliency_kd.knowledge_graph_query_tool import KnowledgeGraphQueryTool
+from saliency_kd.multivariate_tensor import build_multivariate_tensor, SALIENCY_CHANNEL
+from saliency_kd.profiling import timed, count
+from saliency_kd.xcm_inference import XCMInference
+
+
+class SubclassAssignmentService:
+    """
+    Assigns new signals to the subclasses (clusters) identified for the predicted class without reclustering.
+    The XCM model and the cluster centroids are loaded once; each incoming signal is classified, its saliency map
+    is computed and it is assigned to the nearest centroid of the predicted class (banded DTW with LB_Keogh pruning).
+    """
+
+    def __init__(
+            self, model_dir: str, centroid_paths: List[str], class_names: List[List[str]],
+            dtw_window: Optional[float] = None, kg_url: str = FUSEKI_URL, z_norm: bool = True,
+            dataset: Optional[str] = None, dtw_config: Optional[DTWConfig] = None
+    ) -> None:
+        """
+        Initializes the assignment service.
+
+        :param model_dir: directory containing the exported tsai learner ('export')
+        :param centroid_paths: centroid files ('.npy' or clustering '.pkl') - one per predicted class (class index)
+        :param class_names: subclass names (e.g., 'class_1') of the centroids - one list per predicted class
+        :param dtw_window: Sakoe-Chiba window (fraction of the series length or absolute number of time steps) -
+                           overrides the constraint of the global DTW configuration (if no 'dtw_config' is specified)
+        :param kg_url: URL of the server hosting the knowledge graph
+        :param z_norm: whether the signals and saliency maps are z-normalized (as for the clustering)
+        :param dataset: dataset the KG queries are scoped to (named graph), e.g., 'Mallat'
+        :param dtw_config: DTW configuration of the assignment - precedence: 'dtw_config', the global configuration
+                           (see 'configure_dtw') with the Sakoe-Chiba 'dtw_window', the global configuration
+        """
+        if len(centroid_paths) != len(class_names):
+            raise ValueError(f"{len(centroid_paths)} centroid files, but {len(class_names)} lists of subclass names")
+        self.xcm_inference = XCMInference(model_dir)
+        self.model = self.xcm_inference.model
+        n_classes = self.xcm_inference.learn.dls.c
+        if len(centroid_paths) != n_classes:
+            raise ValueError(
+                f"{len(centroid_paths)} centroid files for a model with {n_classes} classes (one file per class)"
+            )
+        self.centroids = [self.load_centroids(path) for path in centroid_paths]
+        for path, centroids, names in zip(centroid_paths, self.centroids, class_names):
+            if len(centroids) != len(names):
+                raise ValueError(f"{len(centroids)} centroids in {path}, but {len(names)} subclass names")
+        self.class_names = class_names
+        self.sample_len = self.centroids[0].shape[1]
+        # multivariate centroids (signal + saliency map) require the saliency maps of the incoming signals
+        self.multivariate = self.centroids[0].shape[2] == 2
+        if dtw_config is None:
+            dtw_config = get_dtw_config()
+            if dtw_window is not None:
+                dtw_config = DTWConfig(**{**dtw_config.to_dict(), "constraint": "sakoe_chiba", "window": dtw_window})
+        self.dtw_config = dtw_config
+        self.radius = dtw_config.radius(self.sample_len)
+        self.envelopes = [keogh_envelope(centroids, self.radius) for centroids in self.centroids]
+        self.z_norm = z_norm
+        self.kgqt = KnowledgeGraphQueryTool(kg_url=kg_url, dataset=dataset)
+        self.kg_info_cache = {}
+        self.latencies = []
+
+    @staticmethod
+    def load_centroids(path: str) -> np.ndarray:
+        """
+        Loads the cluster centroids, either from a '.npy' file (e.g., 'centroids4llm.npy') or from the pickled
+        clustering results ('dba_km_*.pkl').
+
+        :param path: path to the centroid file
+        :return: centroids of shape (k, sz, d)
+        """
+        if path.endswith(".pkl"):
+            # (model, pred_labels, ground_truth_per_cluster, centroids, clustered_signals)
+            return to_time_series_dataset(joblib.load(path)[3])
+        assert path.endswith(".npy")
+        return to_time_series_dataset(np.load(path))
+
+    @timed("preprocessing")
+    def preprocess(self, signals: np.ndarray) -> np.ndarray:
+        """
+        Resamples the raw signals to the centroid length and z-normalizes them.
+
+        :param signals: raw signals of shape (n, len)
+        :return: preprocessed signals of shape (n, sample_len)
+        """
+        signals = TimeSeriesResampler(sz=self.sample_len).fit_transform(signals[:, :, np.newaxis])
+        if self.z_norm:
+            signals = TimeSeriesScalerMeanVariance().fit_transform(signals)
+        return signals.squeeze(-1)
+
+    @timed("saliency_maps")
+    def gen_saliency_maps(self, signals: np.ndarray) -> np.ndarray:
+        """
+        Generates the (min-max normalized) variable attribution maps of the XCM model for the specified signals.
+        The z-normalization (if enabled) is applied in place when building the multivariate queries.
+
+        :param signals: preprocessed signals of shape (n, sample_len)
+        :return: saliency maps of shape (n, sample_len)
+        """
+        if type(self.model) == XCMPlus:
+            layers = [self.model.backbone.conv2dblock, self.model.backbone.conv1dblock]
+        else:  # XCM
+            layers = [self.model.conv2dblock, self.model.conv1dblock]
+        saliency_maps = np.empty(signals.shape, dtype=np.float32)
+        for idx, signal in enumerate(torch.tensor(signals[:, np.newaxis, :], dtype=torch.float32)):
+            var_attr_map = get_attribution_map(self.model, layers, signal, detach=True, apply_relu=True)[0]
+            var_attr_map = (var_attr_map - var_attr_map.min()) / (var_attr_map.max() - var_attr_map.min())
+            saliency_maps[idx] = var_attr_map.cpu().numpy()[0]
+        return saliency_maps
+
+    @timed("classification")
+    def predict_classes(self, signals: np.ndarray) -> np.ndarray:
+        """
+        Predicts the (binary) classes of the specified signals with the XCM model.
+
+        :param signals: preprocessed signals of shape (n, sample_len)
+        :return: predicted class indices (index of the centroid file), shape (n,)
+        """
+        return self.xcm_inference.predict_indices(signals)
+
+    def get_kg_info(self, name: str) -> List[Tuple[str, str, str]]:
+        """
+        Retrieves the symbolic fault information for the specified subclass (cached per subclass).
+
+        :param name: name of the subclass, e.g., 'class_1'
+        :return: fault information stored in the knowledge graph
+        """
+        if name not in self.kg_info_cache:
+            self.kg_info_cache[name] = self.kgqt.query_fault_information_by_name(name, verbose=False)
+        return self.kg_info_cache[name]
+
+    def assign(self, signals: np.ndarray) -> List[Dict]:
+        """
+        Assigns a micro-batch of raw signals to the subclasses of their predicted classes.
+
+        :param signals: raw signals of shape (n, len)
+        :return: assignment per signal (predicted class, subclass name, DTW distance, KG information)
+        """
+        start = time.perf_counter()
+        signals = self.preprocess(np.asarray(signals, dtype=np.float64))
+        pred_classes = self.predict_classes(signals)
+        if self.multivariate:
+            znorm = (SALIENCY_CHANNEL,) if self.z_norm else ()
+            queries, _ = build_multivariate_tensor(signals, self.gen_saliency_maps(signals), znorm, drop_nan=False)
+        else:
+            queries = signals[:, :, np.newaxis]
+        assignments = []
+        for query, pred in zip(queries, pred_classes):
+            if np.isnan(query).any():  # NaN saliency maps can't be assigned (as in the clustering)
+                assignments.append({"class": int(pred), "subclass": None, "dtw_dist": None, "kg_info": []})
+                continue
+            lower, upper = self.envelopes[pred]
+            idx, dist, n_pruned = nearest_centroid(query, self.centroids[pred], lower, upper, self.dtw_config)
+            count("dtw_pruned", n_pruned)
+            name = self.class_names[pred][idx]
+            assignments.append(
+                {"class": int(pred), "subclass": name, "dtw_dist": dist, "kg_info": self.get_kg_info(name)}
+            )
+        self.latencies.append(time.perf_counter() - start)
+        return assignments
+
+    def assign_batched(self, signals: np.ndarray, batch_size: int) -> List[Dict]:
+        """
+        Assigns the specified raw signals in micro-batches.
+
+        :param signals: raw signals of shape (n, len)
+        :param batch_size: number of signals per micro-batch
+        :return: assignment per signal
+        """
+        assignments = []
+        for i in range(0, len(signals), batch_size):
+            assignments.extend(self.assign(signals[i:i + batch_size]))
+        return assignments
+
+    def latency_report(self) -> Dict[str, float]:
+        """
+        Summarizes the micro-batch latencies measured so far.
+
+        :return: number of batches, p50 and p99 latency (ms) - only the number of batches if none was processed
+        """
+        if len(self.latencies) == 0:
+            return {"batches": 0}
+        latencies = np.array(self.latencies) * 1000
+        return {
+            "batches": len(latencies),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 2)
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='assign new signals to the identified subclasses')
+    parser.add_argument('--input', type=str, required=True, help='signals to be assigned (.npy, shape (n, len))')
+    parser.add_argument('--model', type=str, default='export', help='directory of the exported tsai learner')
+    parser.add_argument(
+        '--centroids', type=str, nargs='+', required=True,
+        help='centroids per predicted class, e.g., llm_input/Mallat/class_0/centroids4llm.npy (class 0 first)'
+    )
+    parser.add_argument(
+        '--names', type=str, nargs='+', required=True,
+        help='comma separated subclass names per centroid file, e.g., class_1,class_7,class_3'
+    )
+    parser.add_argument('--batch-size', type=int, default=32, help='micro-batch size')
+    parser.add_argument(
+        '--window', type=float, default=None,
+        help='Sakoe-Chiba window (fraction of len, or time steps if >= 1) - default: global DTW configuration'
+    )
+    parser.add_argument('--dataset', type=str, default=None, help='dataset (named graph) the KG queries are scoped to')
+    args = parser.parse_args()
+
+    service = SubclassAssignmentService(
+        args.model, args.centroids, [n.split(",") for n in args.names],
+        int(args.window) if args.window is not None and args.window >= 1 else args.window, dataset=args.dataset
+    )
+    for i, assignment in enumerate(service.assign_batched(np.load(args.input), args.batch_size)):
+        print("signal", i, "-->", assignment)
+    print("latency:", service.latency_report())
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import json
+import os
+from functools import lru_cache
+from typing import List, Dict
+
+from saliency_kd.config import SYMBOLIC_FAULT_INFO_DIR
+
+DEFAULT_VARIANT = "LLM_FINAL"
+
+
+def list_datasets(directory: str = SYMBOLIC_FAULT_INFO_DIR) -> List[str]:
+    """
+    Lists the datasets symbolic fault information is available for.
+
+    :param directory: directory containing the symbolic fault information ('<dataset>/<variant>.json')
+    :return: names of the datasets
+    """
+    return sorted(d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d)))
+
+
+def list_variants(dataset: str, directory: str = SYMBOLIC_FAULT_INFO_DIR) -> List[str]:
+    """
+    Lists the available variants of the symbolic fault information of the specified dataset, e.g., 'LLM_FINAL'.
+
+    :param dataset: name of the dataset
+    :param directory: directory containing the symbolic fault information
+    :return: names of the variants
+    """
+    return sorted(f[:-len(".json")] for f in os.listdir(os.path.join(directory, dataset)) if f.endswith(".json"))
+
+
+@lru_cache(maxsize=None)
+def load_symbolic_fault_info(
+        dataset: str, variant: str = DEFAULT_VARIANT, directory: str = SYMBOLIC_FAULT_INFO_DIR
+) -> List[Dict[str, str]]:
+    """
+    Loads the symbolic fault information (class descriptions) of the specified dataset - on demand, i.e., only the
+    requested file is parsed (once).
+
+    :param dataset: name of the dataset, e.g., 'Mallat'
+    :param variant: variant of the descriptions, e.g., 'LLM_FINAL' (default) or 'LLM'
+    :param directory: directory containing the symbolic fault information
+    :return: fault information (name, fault_desc, severity) per class, ordered by class
+    """
+    with open(os.path.join(directory, dataset, variant + ".json"), "r", encoding="utf-8") as f:
+        return json.load(f)["classes"]
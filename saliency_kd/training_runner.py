@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import json
+import os
+import random
+from typing import Iterator, Tuple, Optional
+
+import numpy as np
+import torch
+from sklearn.model_selection import StratifiedShuffleSplit
+from tsai.all import (
+    TSDatasets, TSDataLoaders, TSStandardize, Categorize, DataLoaders, Learner, Callback, accuracy
+)
+from tsai.models.ResNet import ResNet
+from tsai.models.XCM import XCM
+from tsai.models.XCMPlus import XCMPlus
+
+from saliency_kd.config import TRAINED_MODELS_CACHE_DIR
+from saliency_kd.dataset_cache import DatasetCache
+
+ARCHITECTURES = {"XCM": XCM, "XCMPlus": XCMPlus, "ResNet": ResNet}
+CHECKPOINT = "checkpoint.pth"
+EXPORT_DIR = "export"
+
+
+class PreBatchedLoader:
+    """
+    Data loader that holds the whole (already standardized) dataset as one contiguous float32 tensor (pinned if CUDA
+    is available) and yields views of it as batches, i.e., there is no per-sample collation and no per-batch
+    transform. It provides the parts of the fastai data loader interface the training loop of 'Learner' uses
+    ('__len__', '__iter__' and 'to'), i.e., it can be wrapped in fastai's 'DataLoaders' and trained with
+    'fit_one_cycle'. The shuffling depends on the epoch (set by 'EpochShuffle'), which keeps resuming reproducible.
+    """
+
+    def __init__(self, samples: np.ndarray, labels: np.ndarray, batch_size: int, shuffle: bool, seed: int) -> None:
+        """
+        Initializes the loader.
+
+        :param samples: samples of shape (n, vars, len)
+        :param labels: label indices of shape (n,)
+        :param batch_size: number of samples per batch
+        :param shuffle: whether the samples are shuffled each epoch
+        :param seed: seed of the (epoch-dependent) shuffling
+        """
+        self.samples = torch.from_numpy(np.ascontiguousarray(samples, dtype=np.float32))
+        self.labels = torch.from_numpy(np.ascontiguousarray(labels, dtype=np.int64))
+        if torch.cuda.is_available():
+            self.samples = self.samples.pin_memory()
+            self.labels = self.labels.pin_memory()
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        self.device = torch.device("cpu")
+        if shuffle:
+            # buffers the shuffled epoch is written into - allocated once
+            self.shuffled_samples = torch.empty_like(self.samples)
+            self.shuffled_labels = torch.empty_like(self.labels)
+
+    def set_epoch(self, epoch: int) -> None:
+        """
+        Sets the epoch, which determines the shuffling (reproducible when resuming).
+
+        :param epoch: current epoch
+        """
+        self.epoch = epoch
+
+    def to(self, device: torch.device) -> "PreBatchedLoader":
+        """
+        Sets the device the batches are copied to (called by fastai's 'DataLoaders').
+
+        :param device: target device
+        :return: loader
+        """
+        self.device = device
+        return self
+
+    def __len__(self) -> int:
+        return (len(self.samples) + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        samples, labels = self.samples, self.labels
+        if self.shuffle:
+            perm = torch.randperm(len(samples), generator=torch.Generator().manual_seed(self.seed + self.epoch))
+            samples = torch.index_select(self.samples, 0, perm, out=self.shuffled_samples)
+            labels = torch.index_select(self.labels, 0, perm, out=self.shuffled_labels)
+        for i in range(0, len(samples), self.batch_size):
+            yield (samples[i:i + self.batch_size].to(self.device, non_blocking=True),
+                   labels[i:i + self.batch_size].to(self.device, non_blocking=True))
+
+
+class EpochShuffle(Callback):
+    """
+    Callback that passes the current epoch to the pre-batched training loader before each epoch.
+    """
+
+    def before_epoch(self) -> None:
+        """
+        Sets the epoch of the training loader, i.e., its shuffling.
+        """
+        self.learn.dls.train.set_epoch(self.epoch)
+
+
+class TrainingCheckpoint(Callback):
+    """
+    Callback that saves the training state (model, optimizer, RNG states) after each epoch, i.e., an interrupted
+    'fit_one_cycle' can be resumed with 'start_epoch' (the one cycle schedule is derived from the epoch).
+    """
+
+    def __init__(self, path: str, start_epoch: int = 0) -> None:
+        """
+        Initializes the checkpoint callback.
+
+        :param path: file the training state is saved to
+        :param start_epoch: first epoch that is actually trained (skipped epochs are not saved again)
+        """
+        self.path = path
+        self.start_epoch = start_epoch
+
+    def after_epoch(self) -> None:
+        """
+        Saves the training state after the current epoch (atomically, an interruption leaves the previous one).
+        """
+        if self.epoch < self.start_epoch:
+            return
+        torch.save({
+            "epoch": self.epoch,
+            "model": self.learn.model.state_dict(),
+            "optimizer": self.learn.opt.state_dict(),
+            "torch_rng": torch.get_rng_state(),
+            "np_rng": np.random.get_state(),
+            "rng": random.getstate()
+        }, self.path + ".tmp")
+        os.replace(self.path + ".tmp", self.path)
+
+
+class TrainingRunner:
+    """
+    Deterministic, resumable training of the (tsai) classifiers with model caching.
+    Trained models are cached keyed by (dataset, binary split, architecture, preprocessing and training config), i.e.,
+    retraining only happens if the inputs change; interrupted training is resumed from the last checkpoint.
+    """
+
+    def __init__(
+            self, dataset: str, arch: str = "XCM", binary: bool = True, target_len: int = 256, znorm: bool = True,
+            epochs: int = 300, lr_max: float = 1e-3, batch_size: int = 32, seed: int = 23,
+            cache_dir: str = TRAINED_MODELS_CACHE_DIR, dataset_cache: Optional[DatasetCache] = None
+    ) -> None:
+        """
+        Initializes the training runner.
+
+        :param dataset: name of the dataset, e.g., 'Mallat'
+        :param arch: architecture to be trained, i.e., 'XCM', 'XCMPlus' or 'ResNet'
+        :param binary: whether the binary (label subsumption) variant of the dataset is used
+        :param target_len: length the samples are resampled to
+        :param znorm: whether each sample is z-normalized individually
+        :param epochs: number of epochs (one cycle policy)
+        :param lr_max: maximum learning rate (one cycle policy)
+        :param batch_size: training batch size
+        :param seed: seed for the validation split, the weight init and the shuffling
+        :param cache_dir: directory the trained models are cached in
+        :param dataset_cache: (memory-mapped) dataset cache
+        """
+        assert arch in ARCHITECTURES
+        self.dataset = dataset
+        self.arch = arch
+        self.binary = binary
+        self.target_len = target_len
+        self.znorm = znorm
+        self.epochs = epochs
+        self.lr_max = lr_max
+        self.batch_size = batch_size
+        self.seed = seed
+        self.dataset_cache = DatasetCache() if dataset_cache is None else dataset_cache
+        self.config = {
+            "dataset": dataset,
+            "source": self.dataset_cache.content_hash(dataset, "TRAIN"),
+            "binary": binary,
+            "arch": arch,
+            "preprocessing": self.dataset_cache.preprocessing_hash(target_len, znorm),
+            "batch_tfms": ["TSStandardize"],
+            "epochs": epochs,
+            "lr_max": lr_max,
+            "batch_size": batch_size,
+            "seed": seed
+        }
+        variant = "binary" if binary else "multiclass"
+        self.model_dir = os.path.join(cache_dir, f"{dataset}_{variant}_{arch}_{DatasetCache.hash_config(self.config)}")
+
+    def set_seed(self) -> None:
+        """
+        Seeds all random number generators and enables deterministic algorithms.
+        """
+        random.seed(self.seed)
+        np.random.seed(self.seed)
+        torch.manual_seed(self.seed)
+        torch.use_deterministic_algorithms(True, warn_only=True)
+        torch.backends.cudnn.benchmark = False
+
+    def load_data(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Loads the (preprocessed) training data from the dataset cache and splits it (stratified, 80 / 20).
+
+        :return: (train samples, train labels, valid samples, valid labels), samples of shape (n, 1, len)
+        """
+        view = self.dataset_cache.load_view(
+            self.dataset, "TRAIN", binary=self.binary, zero_based=True, target_len=self.target_len, znorm=self.znorm
+        )
+        labels, samples = np.asarray(view.labels), view.samples
+        sss = StratifiedShuffleSplit(n_splits=1, test_size=0.2, random_state=self.seed)
+        train_idx, valid_idx = next(sss.split(np.zeros(len(labels)), labels))
+        # tsai layout: (samples, variables, length)
+        samples = samples[:, np.newaxis, :]
+        return samples[train_idx], labels[train_idx], samples[valid_idx], labels[valid_idx]
+
+    def is_trained(self) -> bool:
+        """
+        Checks whether a trained model for the current configuration is cached.
+
+        :return: whether the model is cached
+        """
+        return os.path.isfile(os.path.join(self.model_dir, EXPORT_DIR, "learner.pkl"))
+
+    def build_learner(
+            self, x_train: np.ndarray, y_train: np.ndarray, x_valid: np.ndarray, y_valid: np.ndarray
+    ) -> Learner:
+        """
+        Builds the tsai learner as in 'saliency_kd.ipynb', i.e., the data loaders standardize each batch
+        (TSStandardize) and the exported learner applies the same batch transforms at inference time.
+
+        :param x_train: training samples
+        :param y_train: training labels
+        :param x_valid: validation samples
+        :param y_valid: validation labels
+        :return: learner
+        """
+        x = np.concatenate([x_train, x_valid])
+        y = np.concatenate([y_train, y_valid])
+        splits = (list(range(len(x_train))), list(range(len(x_train), len(x))))
+        dsets = TSDatasets(x, y, tfms=[None, [Categorize()]], splits=splits, inplace=True)
+        dls = TSDataLoaders.from_dsets(
+            dsets.train, dsets.valid, bs=[self.batch_size, 2 * self.batch_size], batch_tfms=[TSStandardize()],
+            num_workers=0
+        )
+        if self.arch == "ResNet":
+            model = ARCHITECTURES[self.arch](dls.vars, dls.c)
+        else:
+            model = ARCHITECTURES[self.arch](dls.vars, dls.c, dls.len)
+        return Learner(dls, model, metrics=accuracy)
+
+    def build_pre_batched_dls(
+            self, dls: DataLoaders, x_train: np.ndarray, y_train: np.ndarray, x_valid: np.ndarray,
+            y_valid: np.ndarray
+    ) -> DataLoaders:
+        """
+        Builds the pre-batched data loaders the model is trained with. The samples are standardized once with the
+        statistics TSStandardize fitted on the tsai data loaders and the labels are mapped to the indices of their
+        vocab, i.e., the batches equal the ones of the tsai data loaders, which are still exported for inference.
+
+        :param dls: tsai data loaders of the learner (fitted TSStandardize, vocab)
+        :param x_train: training samples
+        :param y_train: training labels
+        :param x_valid: validation samples
+        :param y_valid: validation labels
+        :return: pre-batched data loaders
+        """
+        standardize = next(tfm for tfm in dls.after_batch.fs if isinstance(tfm, TSStandardize))
+        mean, std = standardize.mean.cpu().numpy(), standardize.std.cpu().numpy()
+        o2i = dls.vocab.o2i
+        train_dl = PreBatchedLoader(
+            (x_train - mean) / std, np.array([o2i[label] for label in y_train]), self.batch_size, shuffle=True,
+            seed=self.seed
+        )
+        valid_dl = PreBatchedLoader(
+            (x_valid - mean) / std, np.array([o2i[label] for label in y_valid]), 2 * self.batch_size,
+            shuffle=False, seed=self.seed
+        )
+        return DataLoaders(train_dl, valid_dl, path=dls.path, device=torch.device(
+            "cuda" if torch.cuda.is_available() else "cpu"
+        ))
+
+    def train(self) -> str:
+        """
+        Trains the model unless it is cached; interrupted training is resumed from the last checkpoint.
+
+        :return: directory of the exported learner (to be loaded with tsai's 'load_all')
+        """
+        export_dir = os.path.join(self.model_dir, EXPORT_DIR)
+        if self.is_trained():
+            print("cached model found:", export_dir)
+            return export_dir
+        os.makedirs(self.model_dir, exist_ok=True)
+        self.set_seed()
+        data = self.load_data()
+        learn = self.build_learner(*data)
+        tsai_dls = learn.dls
+        learn.dls = self.build_pre_batched_dls(tsai_dls, *data)
+
+        start_epoch = 0
+        checkpoint_path = os.path.join(self.model_dir, CHECKPOINT)
+        if os.path.isfile(checkpoint_path):
+            checkpoint = torch.load(checkpoint_path, map_location="cpu", weights_only=False)
+            learn.model.load_state_dict(checkpoint["model"])
+            learn.create_opt()
+            learn.opt.load_state_dict(checkpoint["optimizer"])
+            torch.set_rng_state(checkpoint["torch_rng"])
+            np.random.set_state(checkpoint["np_rng"])
+            random.setstate(checkpoint["rng"])
+            start_epoch = checkpoint["epoch"] + 1
+            print("resuming training from epoch", start_epoch)
+
+        learn.fit_one_cycle(
+            self.epochs, lr_max=self.lr_max, cbs=[EpochShuffle(), TrainingCheckpoint(checkpoint_path, start_epoch)],
+            start_epoch=start_epoch
+        )
+        # the exported learner standardizes its inputs with the (identical) batch transform of the tsai data loaders
+        learn.dls = tsai_dls
+        learn.save_all(path=export_dir, dls_fname='dls', model_fname='model', learner_fname='learner')
+        with open(os.path.join(self.model_dir, "train_config.json"), "w") as f:
+            json.dump(self.config, f, indent=4)
+        return export_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='train (or load cached) classifier for dataset')
+    parser.add_argument('--dataset', type=str, required=True, help='dataset to train on, e.g., Mallat')
+    parser.add_argument('--arch', choices=list(ARCHITECTURES.keys()), default="XCM", help='architecture')
+    parser.add_argument('--multiclass', action='store_true', help='use the multiclass instead of the binary labels')
+    parser.add_argument('--epochs', type=int, default=300, help='number of epochs')
+    parser.add_argument('--batch-size', type=int, default=32, help='training batch size')
+    args = parser.parse_args()
+
+    runner = TrainingRunner(
+        args.dataset, args.arch, not args.multiclass, epochs=args.epochs, batch_size=args.batch_size
+    )
+    print("trained model:", runner.train())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import os
+from typing import Iterator, Optional
+
+import numpy as np
+import torch
+from tsai.all import load_all
+
+N_THREADS = 4  # upper bound for the intra-op CPU threads used by torch
+BATCH_SIZE = 256
+
+
+class XCMInference:
+    """
+    CPU-first inference for the exported (tsai) classifiers, e.g., XCM.
+    The signals are streamed through the learner in batches of configurable size with a bounded number of CPU threads.
+    """
+
+    def __init__(self, model_dir: str = "export", num_threads: int = N_THREADS, batch_size: int = BATCH_SIZE) -> None:
+        """
+        Initializes the inference utility, i.e., loads the exported learner onto the CPU.
+
+        :param model_dir: directory containing the exported tsai learner
+        :param num_threads: number of CPU threads used by torch
+        :param batch_size: number of signals per batch
+        """
+        torch.set_num_threads(num_threads)
+        self.learn = load_all(
+            path=model_dir, dls_fname='dls', model_fname='model', learner_fname='learner', device='cpu'
+        )
+        self.model = self.learn.model.cpu().eval()
+        self.batch_size = batch_size
+
+    @staticmethod
+    def to_tsai_layout(signals: np.ndarray) -> np.ndarray:
+        """
+        Brings the signals into the layout expected by tsai, i.e., (samples, variables, length).
+
+        :param signals: signals of shape (n, len) or (n, vars, len)
+        :return: float32 signals of shape (n, vars, len)
+        """
+        signals = np.asarray(signals, dtype=np.float32)
+        return signals[:, np.newaxis, :] if signals.ndim == 2 else signals
+
+    def predict_proba_batches(self, signals: np.ndarray) -> Iterator[np.ndarray]:
+        """
+        Streams the signals through the learner batch by batch.
+
+        :param signals: signals of shape (n, len) or (n, vars, len)
+        :return: class probabilities per batch, each of shape (batch, n_classes)
+        """
+        signals = self.to_tsai_layout(signals)
+        with torch.inference_mode():
+            for i in range(0, len(signals), self.batch_size):
+                probabilities, _, _ = self.learn.get_X_preds(
+                    signals[i:i + self.batch_size], bs=self.batch_size, with_decoded=False
+                )
+                yield np.asarray(probabilities)
+
+    def predict_proba(self, signals: np.ndarray) -> np.ndarray:
+        """
+        Predicts the class probabilities of the specified signals.
+
+        :param signals: signals of shape (n, len) or (n, vars, len)
+        :return: class probabilities, shape (n, n_classes)
+        """
+        return np.concatenate(list(self.predict_proba_batches(signals)))
+
+    def predict_indices(self, signals: np.ndarray) -> np.ndarray:
+        """
+        Predicts the class indices (positions in the learner's vocab) of the specified signals.
+
+        :param signals: signals of shape (n, len) or (n, vars, len)
+        :return: predicted class indices (int), shape (n,)
+        """
+        return np.concatenate(
+            [probabilities.argmax(axis=-1) for probabilities in self.predict_proba_batches(signals)]
+        ).astype(int)
+
+    def predict(self, signals: np.ndarray) -> np.ndarray:
+        """
+        Predicts the classes of the specified signals, i.e., the labels of the learner's vocab (as the decoded
+        predictions of tsai's 'get_X_preds').
+
+        :param signals: signals of shape (n, len) or (n, vars, len)
+        :return: predicted class labels, shape (n,)
+        """
+        return np.array(list(self.learn.dls.vocab))[self.predict_indices(signals)]
+
+    def export(self, path: str, sample_len: int, fmt: str = "torchscript", n_vars: Optional[int] = None) -> None:
+        """
+        Exports the bare model (without the batch transforms of the data loaders, e.g., TSStandardize) to TorchScript
+        or ONNX.
+
+        :param path: file to export the model to
+        :param sample_len: length of the signals
+        :param fmt: export format, i.e., 'torchscript' or 'onnx'
+        :param n_vars: number of variables of the signals (taken from the learner's data loaders by default)
+        """
+        assert fmt in ["torchscript", "onnx"]
+        n_vars = self.learn.dls.vars if n_vars is None else n_vars
+        example = torch.zeros((1, n_vars, sample_len), dtype=torch.float32)
+        if fmt == "torchscript":
+            torch.jit.trace(self.model, example).save(path)
+        else:
+            torch.onnx.export(
+                self.model, example, path, input_names=["signals"], output_names=["logits"],
+                dynamic_axes={"signals": {0: "batch"}, "logits": {0: "batch"}}
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='batched CPU inference with the exported classifier')
+    parser.add_argument('--input', type=str, required=True, help='signals to be classified (.npy)')
+    parser.add_argument('--model', type=str, default='export', help='directory of the exported tsai learner')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='number of signals per batch')
+    parser.add_argument('--threads', type=int, default=N_THREADS, help='number of CPU threads used by torch')
+    parser.add_argument('--output', type=str, default='predictions.npy', help='file the predictions are saved to')
+    parser.add_argument(
+        '--export', choices=["torchscript", "onnx"], default=None,
+        help='additionally export the model to TorchScript (model.pt) or ONNX (model.onnx)'
+    )
+    args = parser.parse_args()
+
+    xcm_inference = XCMInference(args.model, args.threads, args.batch_size)
+    test_signals = np.load(args.input)
+    predictions = xcm_inference.predict(test_signals)
+    np.save(args.output, predictions)
+    labels, counts = np.unique(predictions, return_counts=True)
+    print("predictions saved to", args.output, "- class distribution:", dict(zip(labels.tolist(), counts.tolist())))
+    if args.export is not None:
+        export_path = os.path.join(args.model, "model.pt" if args.export == "torchscript" else "model.onnx")
+        xcm_inference.export(export_path, test_signals.shape[-1], args.export)
+        print("model exported to", export_path)